@@ -1,16 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../../context/AuthContext';
-import { workoutAPI, weightAPI, nutritionAPI, goalsAPI } from '../../services/api';
+import { dashboardAPI } from '../../services/api';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
 export default function Dashboard() {
   const navigate = useNavigate();
   const { logout } = useAuth();
-  const [workouts, setWorkouts] = useState([]);
-  const [weights, setWeights] = useState([]);
-  const [nutrition, setNutrition] = useState([]);
-  const [goals, setGoals] = useState([]);
+  const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -19,16 +16,8 @@ export default function Dashboard() {
 
   const loadData = async () => {
     try {
-      const [w, wt, n, g] = await Promise.all([
-        workoutAPI.getAll(30),
-        weightAPI.getAll(90),
-        nutritionAPI.getAll(30),
-        goalsAPI.getAll(),
-      ]);
-      setWorkouts(w.data);
-      setWeights(wt.data);
-      setNutrition(n.data);
-      setGoals(g.data);
+      const res = await dashboardAPI.get();
+      setSummary(res.data);
     } catch (err) {
       console.error('Error loading data:', err);
     }
@@ -37,6 +26,11 @@ export default function Dashboard() {
 
   if (loading) return <div style={{ padding: '20px' }}>Loading...</div>;
 
+  const workouts = summary ? summary.workouts : { count: 0, recent: [] };
+  const nutrition = summary ? summary.nutrition : { count: 0 };
+  const weights = summary ? summary.weight.series : [];
+  const goals = summary ? summary.goals : { active: 0 };
+
   const chartData = weights.map((w) => ({
     date: new Date(w.date).toLocaleDateString(),
     weight: w.weight,
@@ -80,11 +74,11 @@ export default function Dashboard() {
 
       <div style={{ display: 'grid', gridTemplateColumns: 'repeat(4, 1fr)', gap: '20px', marginBottom: '20px' }}>
         <div style={{ border: '1px solid #ccc', padding: '15px' }}>
-          <h3>{workouts.length}</h3>
+          <h3>{workouts.count}</h3>
           <p>Workouts (30 days)</p>
         </div>
         <div style={{ border: '1px solid #ccc', padding: '15px' }}>
-          <h3>{nutrition.length}</h3>
+          <h3>{nutrition.count}</h3>
           <p>Nutrition Logs</p>
         </div>
         <div style={{ border: '1px solid #ccc', padding: '15px' }}>
@@ -92,7 +86,7 @@ export default function Dashboard() {
           <p>Weight Entries</p>
         </div>
         <div style={{ border: '1px solid #ccc', padding: '15px' }}>
-          <h3>{goals.filter((g) => !g.completed).length}</h3>
+          <h3>{goals.active}</h3>
           <p>Active Goals</p>
         </div>
       </div>
@@ -114,13 +108,13 @@ export default function Dashboard() {
 
       <div style={{ border: '1px solid #ccc', padding: '15px' }}>
         <h2>Recent Workouts</h2>
-        {workouts.length === 0 ? (
+        {workouts.recent.length === 0 ? (
           <p>No workouts yet</p>
         ) : (
           <ul>
-            {workouts.slice(0, 5).map((w) => (
+            {workouts.recent.map((w) => (
               <li key={w.id} style={{ marginBottom: '10px' }}>
-                {new Date(w.date).toLocaleDateString()} - {w.exercises.length} exercises
+                {new Date(w.date).toLocaleDateString()} - {w.exercise_count} exercises
               </li>
             ))}
           </ul>
@@ -88,10 +88,10 @@ export default function GoalsPage() {
                 <div>
                   <h3>{goal.goal_type}</h3>
                   <p>
-                    Target: {goal.target_value} ({goal.period}) - Progress: {goal.current_value}
+                    Target: {goal.target_value} ({goal.period}) - Progress: {goal.current_value} ({goal.progress_percent}%)
                   </p>
                   <div style={{ width: '300px', height: '20px', backgroundColor: '#eee', borderRadius: '5px', overflow: 'hidden' }}>
-                    <div style={{ width: `${Math.min((goal.current_value / goal.target_value) * 100, 100)}%`, height: '100%', backgroundColor: '#4CAF50' }} />
+                    <div style={{ width: `${goal.progress_percent}%`, height: '100%', backgroundColor: '#4CAF50' }} />
                   </div>
                 </div>
                 <button onClick={() => handleDelete(goal.id)} style={{ padding: '8px' }}>
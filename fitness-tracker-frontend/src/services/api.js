@@ -73,4 +73,9 @@ export const goalsAPI = {
   delete: (id) => api.delete(`/goals/${id}`),
 };
 
+// Dashboard endpoint (server-side summary)
+export const dashboardAPI = {
+  get: () => api.get('/dashboard'),
+};
+
 export default api;
\ No newline at end of file
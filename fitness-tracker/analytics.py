@@ -0,0 +1,365 @@
+"""
+Vectorized analytics over a user's history.
+
+Data is read with one Core query per report (no ORM objects) into columnar
+NumPy arrays; everything after that is array math, so 100k+ rows take
+milliseconds.
+
+Strength, per exercise:
+
+- e1RM per set with the Epley formula, weight * (1 + reps / 30); a single
+  rep counts as the weight itself.
+- per-session (per-workout) best e1RM, top weight, volume and set count,
+  via ufunc.reduceat over the session boundaries.
+- rolling volume: the sum of session volume over the trailing window of
+  days, via a cumulative sum and searchsorted.
+- personal records: sessions whose best e1RM beats every earlier session
+  (a running maximum), plus the heaviest weight for each rep count.
+
+Weight trend:
+
+- logs are averaged per day, then smoothed with a time-aware exponential
+  moving average (a gap of half_life days halves an old point's weight).
+  The recursion is solved in closed form with cumulative sums, in chunks
+  short enough that the exponentials stay within float range.
+- weekly rate: least-squares slope of the trend over the last rate_days.
+- projection: when the trend reaches each active weight goal's target at
+  the current rate.
+"""
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+from models import db, WorkoutExercise, WorkoutSet, WeightLog
+from exercises import find_exercise
+
+DEFAULT_ROLLING_DAYS = 28
+MAX_REP_RECORD = 12  # rep maxes are reported for 1..12 reps
+DEFAULT_HALF_LIFE_DAYS = 7
+DEFAULT_RATE_DAYS = 28
+# Longest stretch (in time constants) solved at once; exp(EMA_CHUNK_SPAN)
+# must stay far below the float64 maximum
+EMA_CHUNK_SPAN = 200
+
+
+# ===== STRENGTH =====
+
+
+def load_exercise_sets(user_id, name):
+    """
+    The user's sets of an exercise as columnar arrays, oldest first
+
+    The name is looked up in the exercise catalog, so it matches regardless
+    of case and spacing; the sets are then one range of the
+    (user_id, exercise_id, date) index.
+
+    Returns:
+        dict of equal-length arrays: workout_id, date (datetime64[s]), reps,
+        weight; or None if there are no sets
+    """
+    exercise = find_exercise(user_id, name)
+    if exercise is None:
+        return None
+
+    rows = db.session.execute(
+        select(
+            WorkoutExercise.workout_id,
+            # Parsed by NumPy below rather than row by row by SQLAlchemy
+            type_coerce(WorkoutExercise.date, String),
+            WorkoutSet.reps,
+            WorkoutSet.weight,
+        )
+        .join(WorkoutSet, WorkoutSet.exercise_id == WorkoutExercise.id)
+        .where(
+            WorkoutExercise.user_id == user_id,
+            WorkoutExercise.exercise_id == exercise.id,
+        )
+        .order_by(
+            WorkoutExercise.date, WorkoutExercise.workout_id, WorkoutSet.set_number
+        )
+    ).all()
+    if not rows:
+        return None
+
+    workout_ids, dates, reps, weights = zip(*rows)
+    return {
+        "workout_id": np.array(workout_ids, dtype=np.int64),
+        "date": np.array(dates, dtype="datetime64[s]"),
+        "reps": np.array(reps, dtype=np.int64),
+        "weight": np.array(weights, dtype=np.float64),
+    }
+
+
+def estimated_1rm(reps, weight):
+    """Epley e1RM for every set (0 for sets with no reps)"""
+    e1rm = weight * (1 + reps / 30.0)
+    e1rm = np.where(reps == 1, weight, e1rm)
+    return np.where(reps > 0, e1rm, 0.0)
+
+
+def session_stats(sets, rolling_days=DEFAULT_ROLLING_DAYS):
+    """
+    Per-session aggregates for sets from load_exercise_sets()
+
+    Returns:
+        dict of arrays, one entry per session (workout), oldest first
+    """
+    workout_ids = sets["workout_id"]
+    reps, weight = sets["reps"], sets["weight"]
+    e1rm = estimated_1rm(reps, weight)
+    volume = reps * weight
+
+    # Sets are ordered by workout, so each session is a contiguous run
+    starts = np.flatnonzero(np.r_[True, workout_ids[1:] != workout_ids[:-1]])
+    best_e1rm = np.maximum.reduceat(e1rm, starts)
+    session_volume = np.add.reduceat(volume, starts)
+
+    days = sets["date"][starts].astype("datetime64[D]")
+    cumulative = np.r_[0.0, np.cumsum(session_volume)]
+    window_start = np.searchsorted(
+        days, days - np.timedelta64(rolling_days - 1, "D"), side="left"
+    )
+    rolling_volume = cumulative[1:] - cumulative[window_start]
+
+    previous_best = np.r_[-np.inf, np.maximum.accumulate(best_e1rm)[:-1]]
+
+    return {
+        "workout_id": workout_ids[starts],
+        "date": sets["date"][starts],
+        "sets": np.diff(np.r_[starts, len(workout_ids)]),
+        "reps": np.add.reduceat(reps, starts),
+        "top_weight": np.maximum.reduceat(weight, starts),
+        "volume": session_volume,
+        "best_e1rm": best_e1rm,
+        "rolling_volume": rolling_volume,
+        "pr": best_e1rm > previous_best,
+    }
+
+
+def rep_maxes(sets):
+    """
+    Heaviest weight lifted for each rep count from 1 to MAX_REP_RECORD
+
+    Ties go to the earliest set. Returns a list of dicts ordered by reps.
+    """
+    reps, weight = sets["reps"], sets["weight"]
+    candidates = np.flatnonzero((reps >= 1) & (reps <= MAX_REP_RECORD))
+    if not len(candidates):
+        return []
+
+    # Sort by reps, then weight, then earliest first; the last of each
+    # reps group is its record
+    order = candidates[np.lexsort((-candidates, weight[candidates], reps[candidates]))]
+    sorted_reps = reps[order]
+    last = np.flatnonzero(np.r_[sorted_reps[1:] != sorted_reps[:-1], True])
+    best = order[last]
+
+    return [
+        {"reps": r, "weight": w, "date": d, "workout_id": wid}
+        for r, w, d, wid in zip(
+            reps[best].tolist(),
+            weight[best].tolist(),
+            np.datetime_as_string(sets["date"][best], unit="s").tolist(),
+            sets["workout_id"][best].tolist(),
+        )
+    ]
+
+
+def exercise_report(sets, rolling_days=DEFAULT_ROLLING_DAYS, since=None):
+    """
+    JSON-serializable progression report for sets from load_exercise_sets()
+
+    Sessions are returned column-wise (one list per field) so serializing
+    them needs no per-row Python. Records and totals cover all history;
+    since (datetime64) only limits the sessions listed.
+    """
+    sessions = session_stats(sets, rolling_days)
+    reps, weight = sets["reps"], sets["weight"]
+    e1rm = estimated_1rm(reps, weight)
+
+    best_set = int(np.argmax(e1rm))
+    heaviest_set = int(np.argmax(weight))
+
+    def set_record(index, value):
+        return {
+            "value": round(float(value), 1),
+            "reps": int(reps[index]),
+            "weight": float(weight[index]),
+            "date": np.datetime_as_string(sets["date"][index], unit="s").item(),
+            "workout_id": int(sets["workout_id"][index]),
+        }
+
+    listed = slice(None)
+    if since is not None:
+        listed = slice(int(np.searchsorted(sessions["date"], since, side="left")), None)
+
+    sessions_listed = {
+        "workout_id": sessions["workout_id"][listed].tolist(),
+        "date": np.datetime_as_string(sessions["date"][listed], unit="s").tolist(),
+        "sets": sessions["sets"][listed].tolist(),
+        "reps": sessions["reps"][listed].tolist(),
+        "top_weight": sessions["top_weight"][listed].tolist(),
+        "volume": np.round(sessions["volume"][listed], 1).tolist(),
+        "best_e1rm": np.round(sessions["best_e1rm"][listed], 1).tolist(),
+        "rolling_volume": np.round(sessions["rolling_volume"][listed], 1).tolist(),
+        "pr": sessions["pr"][listed].tolist(),
+    }
+
+    return {
+        "summary": {
+            "sessions": len(sessions["workout_id"]),
+            "total_sets": len(reps),
+            "total_reps": int(reps.sum()),
+            "total_volume": round(float((reps * weight).sum()), 1),
+            "first_date": np.datetime_as_string(sets["date"][0], unit="s").item(),
+            "last_date": np.datetime_as_string(sets["date"][-1], unit="s").item(),
+        },
+        "personal_records": {
+            "e1rm": set_record(best_set, e1rm[best_set]),
+            "heaviest": set_record(heaviest_set, weight[heaviest_set]),
+            "rep_maxes": rep_maxes(sets),
+        },
+        "rolling_days": rolling_days,
+        "sessions": sessions_listed,
+    }
+
+
+# ===== WEIGHT TREND =====
+
+
+def load_daily_weights(user_id):
+    """
+    The user's weight logs averaged per day, oldest first
+
+    Returns:
+        (days as datetime64[D], weights) arrays, or None if nothing is logged
+    """
+    rows = db.session.execute(
+        select(type_coerce(WeightLog.date, String), WeightLog.weight)
+        .where(WeightLog.user_id == user_id)
+        .order_by(WeightLog.date)
+    ).all()
+    if not rows:
+        return None
+
+    dates, weights = zip(*rows)
+    days = np.array(dates, dtype="datetime64[s]").astype("datetime64[D]")
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    totals = np.bincount(day_index, weights=np.array(weights, dtype=np.float64))
+    return unique_days, totals / np.bincount(day_index)
+
+
+def exponential_trend(days, values, half_life_days=DEFAULT_HALF_LIFE_DAYS):
+    """
+    Time-aware EMA: trend[i] = trend[i-1] + a_i * (values[i] - trend[i-1])
+
+    a_i = 1 - exp(-gap_i / tau) with tau = half_life / ln 2, and trend[0] is
+    values[0]. With u_i = (t_i - t_0) / tau the recursion unrolls to
+    trend[i] = exp(-u_i) * (trend[0] + sum_j<=i a_j * values[j] * exp(u_j)),
+    which is evaluated with cumsum per chunk of at most EMA_CHUNK_SPAN.
+    """
+    tau = half_life_days / np.log(2)
+    # Past EMA_CHUNK_SPAN time constants the old trend has no weight left, so
+    # longer gaps are capped; this keeps every exponent below the span
+    gaps = np.minimum(np.diff(days).astype(np.float64) / tau, EMA_CHUNK_SPAN)
+    elapsed = np.r_[0.0, np.cumsum(gaps)]
+    alpha = -np.expm1(-gaps)
+
+    trend = np.empty_like(values)
+    trend[0] = values[0]
+    start = 1
+    while start < len(values):
+        # Exponents are measured from the last point of the previous chunk
+        origin = elapsed[start - 1]
+        end = int(np.searchsorted(elapsed, origin + EMA_CHUNK_SPAN, side="right"))
+
+        u = elapsed[start:end] - origin
+        weighted = np.cumsum(alpha[start - 1 : end - 1] * values[start:end] * np.exp(u))
+        trend[start:end] = np.exp(-u) * (trend[start - 1] + weighted)
+        start = end
+
+    return trend
+
+
+def weekly_rate(days, trend, rate_days=DEFAULT_RATE_DAYS):
+    """Least-squares slope of the trend over its last rate_days, per week"""
+    recent = days >= days[-1] - np.timedelta64(rate_days - 1, "D")
+    if recent.sum() < 2:
+        return None
+
+    x = (days[recent] - days[-1]).astype(np.float64)
+    y = trend[recent]
+    x_centered = x - x.mean()
+    slope = (x_centered * (y - y.mean())).sum() / (x_centered**2).sum()
+    return float(slope * 7)
+
+
+def goal_projection(goal, last_day, current, rate):
+    """When the trend reaches a weight goal's target at the current rate"""
+    remaining = goal.target_value - current
+    projection = {
+        "goal_id": goal.id,
+        "target": goal.target_value,
+        "remaining": round(remaining, 1),
+        "period_end": goal.period_end.isoformat() if goal.period_end else None,
+        "projected_date": None,
+        "days_to_goal": None,
+        "on_track": False,
+    }
+
+    if abs(remaining) < 0.05:
+        projection.update(days_to_goal=0, projected_date=str(last_day), on_track=True)
+        return projection
+    if not rate or remaining * rate <= 0:
+        # Flat or heading away from the target
+        return projection
+
+    days_to_goal = int(np.ceil(remaining / (rate / 7)))
+    projected = last_day + np.timedelta64(days_to_goal, "D")
+    projection.update(
+        days_to_goal=days_to_goal,
+        projected_date=str(projected),
+        on_track=goal.period_end is None
+        or bool(projected <= np.datetime64(goal.period_end.date())),
+    )
+    return projection
+
+
+def weight_trend_report(
+    days,
+    weights,
+    goals=(),
+    half_life_days=DEFAULT_HALF_LIFE_DAYS,
+    rate_days=DEFAULT_RATE_DAYS,
+    since=None,
+):
+    """
+    JSON-serializable trend report for arrays from load_daily_weights()
+
+    The trend is computed over all history; since (datetime64[D]) only
+    limits the points listed. goals are the active weight goals to project.
+    """
+    trend = exponential_trend(days, weights, half_life_days)
+    rate = weekly_rate(days, trend, rate_days)
+    current = float(trend[-1])
+
+    listed = slice(None)
+    if since is not None:
+        listed = slice(int(np.searchsorted(days, since, side="left")), None)
+
+    return {
+        "half_life_days": half_life_days,
+        "current": {
+            "date": str(days[-1]),
+            "weight": round(float(weights[-1]), 1),
+            "trend": round(current, 1),
+        },
+        "weekly_rate": round(rate, 2) if rate is not None else None,
+        "projections": [
+            goal_projection(goal, days[-1], current, rate) for goal in goals
+        ],
+        "points": {
+            "date": np.datetime_as_string(days[listed]).tolist(),
+            "weight": np.round(weights[listed], 1).tolist(),
+            "trend": np.round(trend[listed], 2).tolist(),
+        },
+    }
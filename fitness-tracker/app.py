@@ -5,37 +5,52 @@ Purpose: Initializes app, database, health check,
 error handling, and registering blueprints.
 """
 
-import os
-from datetime import timedelta
 from dotenv import load_dotenv
-from flask import Flask, request
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
+from config import get_config
 from models import db
+from database import init_database
+from replicas import init_replicas
+from shard_directory import init_sharding
+from migrations import init_schema
+from commands import register_commands
+from request_logging import init_request_logging
+from metrics import init_metrics, render_metrics
+from cache import init_cache
+from suggest import init_suggestions
+from jobs import init_jobs
 from routes.auth import auth_bp
 from routes.workouts import workouts_bp
 from routes.nutrition import nutrition_bp
 from routes.weight import weight_bp
 from routes.goals import goals_bp
 from routes.templates import templates_bp
+from routes.dashboard import dashboard_bp
+from routes.sync import sync_bp
+from routes.imports import imports_bp
+from routes.exports import exports_bp
+from routes.jobs import jobs_bp
+from routes.analytics import analytics_bp
+from routes.exercises import exercises_bp
 
 load_dotenv()
 
 
-def create_app():
-    """Application factory - creates and configures Flask app"""
+def create_app(config_class=None):
+    """
+    Application factory - creates and configures Flask app
+
+    Uses the Config class for FLASK_ENV (see config.py) unless one is given.
+    """
     app = Flask(__name__)
 
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
-        "DATABASE_URL", "sqlite:///fitness.db"
-    )
-    app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=30)
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.from_object(config_class or get_config())
 
-    db.init_app(app)
+    init_database(app, db)
     jwt = JWTManager(app)
     CORS(
         app,
@@ -43,25 +58,12 @@ def create_app():
         supports_credentials=True,
     )
 
-    @app.before_request
-    def log_request_info():
-        if request.endpoint not in ["health", "static"]:
-            print(f"\n=== {request.method} {request.path} ===")
-            auth_header = request.headers.get("Authorization")
-
-            if auth_header and request.method != "OPTIONS":
-                print(f"Authorization header present")
-                try:
-                    token = auth_header.replace("Bearer ", "")
-                    from flask_jwt_extended import decode_token
-
-                    decoded = decode_token(token, allow_expired=True)
-                    print(f"Decoded token claims: {decoded}")
-                    print(
-                        f"Identity (sub): {decoded.get('sub')}, Type: {type(decoded.get('sub'))}"
-                    )
-                except Exception as e:
-                    print(f"Error decoding token (non-fatal): {e}")
+    init_request_logging(app)
+    init_metrics(app)
+    init_cache(app)
+    init_suggestions(app)
+    init_replicas(app)
+    init_sharding(app)
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(workouts_bp, url_prefix="/api/workouts")
@@ -69,12 +71,26 @@ def create_app():
     app.register_blueprint(nutrition_bp, url_prefix="/api/nutrition")
     app.register_blueprint(weight_bp, url_prefix="/api/weight")
     app.register_blueprint(goals_bp, url_prefix="/api/goals")
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    app.register_blueprint(sync_bp, url_prefix="/api/sync")
+    app.register_blueprint(imports_bp, url_prefix="/api/import")
+    app.register_blueprint(exports_bp, url_prefix="/api/export")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
+    app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
+    app.register_blueprint(exercises_bp, url_prefix="/api/exercises")
 
     @app.route("/health", methods=["GET"])
     def health():
         """Health check endpoint"""
         return {"status": "Good", "service": "fitness-tracker-api"}, 200
 
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Per-route latency, SQL and response size metrics (Prometheus text)"""
+        if not app.config["METRICS_ENABLED"]:
+            return {"error": "Not found"}, 404
+        return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
     @app.errorhandler(400)
     def bad_request(error):
         return {"error": "Bad request"}, 400
@@ -92,8 +108,12 @@ def create_app():
         db.session.rollback()
         return {"error": "Internal server error"}, 500
 
-    with app.app_context():
-        db.create_all()
+    register_commands(app)
+
+    # Creates a new database; existing ones are upgraded with `upgrade-db`
+    if init_schema(app):
+        # Only once the schema is current, so the jobs table exists
+        init_jobs(app)
 
     return app
 
@@ -0,0 +1,54 @@
+"""
+Shared request handling for the batch create endpoints.
+
+A batch body is {"items": [...]}. Every item is validated with the same
+parser the single-record endpoint uses before anything is written, so a
+batch is all-or-nothing: either every item is inserted or the response
+lists the index and error of each invalid item.
+
+Config (app.config):
+    BATCH_MAX_ITEMS     largest accepted batch (default 1000)
+"""
+
+from flask import current_app, jsonify
+
+
+def validate_batch(data, parse):
+    """
+    Validate a batch request body with a per-item parser
+
+    parse(item) must return (fields, error) with exactly one of them None.
+
+    Returns:
+        (rows, None) when every item is valid, else (None, error_response)
+    """
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": "items must be a non-empty list"}), 400)
+
+    max_items = current_app.config.get("BATCH_MAX_ITEMS", 1000)
+    if len(items) > max_items:
+        return None, (
+            jsonify({"error": f"Batch too large (max {max_items} items)"}),
+            413,
+        )
+
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            fields, error = None, "Item must be an object"
+        else:
+            fields, error = parse(item)
+
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            rows.append(fields)
+
+    if errors:
+        return None, (
+            jsonify({"error": "Validation failed", "errors": errors}),
+            400,
+        )
+
+    return rows, None
@@ -0,0 +1,495 @@
+"""
+API load test and benchmark harness.
+
+Seeds a throwaway SQLite database with synthetic users and history, then
+drives every blueprint endpoint through the Flask test client from a pool of
+concurrent workers and reports p50/p95/p99 latency, throughput and SQL
+statements per request. Results are written as JSON so runs can be diffed
+between commits.
+
+Usage (from fitness-tracker/):
+    python -m benchmarks.api_benchmark --users 200 --days 365 --requests 5000
+    python -m benchmarks.api_benchmark --output before.json
+    python -m benchmarks.api_benchmark --output after.json --compare before.json
+
+Scale is fully configurable (e.g. --users 10000 --days 730); seeding writes
+with batched executemany INSERTs, one user at a time, so memory stays flat.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# The app reads its settings from the environment at import/creation time
+BENCH_DB = os.path.join(tempfile.gettempdir(), "fitness_benchmark.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DB}")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+os.environ.setdefault("REQUEST_LOGGING_ENABLED", "false")
+# Only delete the database file if it is the harness's own scratch file
+OWNS_DB = os.environ["DATABASE_URL"] == f"sqlite:///{BENCH_DB}"
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models import (
+    db,
+    User,
+    Workout,
+    WorkoutExercise,
+    WorkoutSet,
+    NutritionLog,
+    WeightLog,
+    Goal,
+    WorkoutTemplate,
+    TemplateExercise,
+)
+from rollups import rebuild_rollups
+from exercises import backfill_exercise_catalog
+from goal_progress import recompute_goal
+
+EXERCISES = [
+    "Bench Press",
+    "Squat",
+    "Deadlift",
+    "Overhead Press",
+    "Barbell Row",
+    "Pull Up",
+    "Lunge",
+    "Leg Press",
+]
+
+
+# ===== SQL COUNTING =====
+
+_local = threading.local()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    _local.statements = getattr(_local, "statements", 0) + 1
+
+
+# ===== SEEDING =====
+
+
+def remove_db(path):
+    """Delete a SQLite database file and its WAL/shared-memory companions"""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def seed(app, users, days, workouts_per_week, exercises, sets, rng):
+    """Create users with `days` of workouts, nutrition and weight history"""
+    password = generate_password_hash("benchmark")
+    start = datetime.utcnow() - timedelta(days=days)
+    tokens, item_ids = {}, {}
+
+    with app.app_context():
+        for n in range(users):
+            user = User(
+                username=f"bench{n}", email=f"bench{n}@example.com", password=password
+            )
+            db.session.add(user)
+            db.session.flush()
+            _seed_user(user.id, start, days, workouts_per_week, exercises, sets, rng)
+            db.session.commit()
+            tokens[user.id] = create_access_token(identity=str(user.id))
+            item_ids[user.id] = {
+                "workout_id": _first_id(Workout, user.id),
+                "nutrition_id": _first_id(NutritionLog, user.id),
+                "weight_id": _first_id(WeightLog, user.id),
+                "goal_id": _first_id(Goal, user.id),
+                "template_id": _first_id(WorkoutTemplate, user.id),
+            }
+
+        # Derived tables are rebuilt from the raw rows in one pass
+        rebuild_rollups()
+        backfill_exercise_catalog()
+        for goal in Goal.query.all():
+            recompute_goal(goal)
+        db.session.commit()
+
+    return tokens, item_ids
+
+
+def _first_id(model, user_id):
+    return db.session.scalar(
+        db.select(model.id).filter_by(user_id=user_id).order_by(model.id).limit(1)
+    )
+
+
+def _seed_user(user_id, start, days, workouts_per_week, exercises, sets, rng):
+    nutrition, weights, workouts = [], [], []
+    weight = rng.uniform(140, 220)
+
+    for day in range(days):
+        date = start + timedelta(days=day, hours=rng.randint(6, 20))
+        nutrition.append(
+            {
+                "user_id": user_id,
+                "date": date,
+                "protein": rng.uniform(80, 220),
+                "carbs": rng.uniform(100, 350),
+                "fats": rng.uniform(40, 120),
+                "calories": rng.uniform(1600, 3200),
+            }
+        )
+        weight += rng.uniform(-0.6, 0.5)
+        weights.append({"user_id": user_id, "date": date, "weight": round(weight, 1)})
+        if rng.random() < workouts_per_week / 7:
+            workouts.append({"user_id": user_id, "date": date})
+
+    db.session.execute(NutritionLog.__table__.insert(), nutrition)
+    db.session.execute(WeightLog.__table__.insert(), weights)
+    if workouts:
+        db.session.execute(Workout.__table__.insert(), workouts)
+
+    workout_ids = db.session.scalars(
+        db.select(Workout.id).filter_by(user_id=user_id).order_by(Workout.id)
+    ).all()
+    exercise_rows = [
+        {"workout_id": workout_id, "name": name}
+        for workout_id in workout_ids
+        for name in rng.sample(EXERCISES, exercises)
+    ]
+    if exercise_rows:
+        db.session.execute(WorkoutExercise.__table__.insert(), exercise_rows)
+
+    exercise_ids = db.session.scalars(
+        db.select(WorkoutExercise.id)
+        .join(Workout)
+        .filter(Workout.user_id == user_id)
+        .order_by(WorkoutExercise.id)
+    ).all()
+    set_rows = [
+        {
+            "exercise_id": exercise_id,
+            "set_number": number,
+            "reps": rng.randint(3, 12),
+            "weight": float(rng.randrange(45, 315, 5)),
+        }
+        for exercise_id in exercise_ids
+        for number in range(1, sets + 1)
+    ]
+    if set_rows:
+        db.session.execute(WorkoutSet.__table__.insert(), set_rows)
+
+    for goal_type, target in [
+        ("weight", 170),
+        ("calories", 60000),
+        ("workout_count", 12),
+    ]:
+        db.session.add(
+            Goal(
+                user_id=user_id,
+                goal_type=goal_type,
+                target_value=target,
+                period="month",
+            )
+        )
+
+    template = WorkoutTemplate(user_id=user_id, name="Full Body")
+    template.exercises = [
+        TemplateExercise(name=name, sets=sets, reps="8-10")
+        for name in EXERCISES[:exercises]
+    ]
+    db.session.add(template)
+
+
+# ===== WORKLOAD =====
+
+
+def workout_payload(rng, exercises, sets):
+    return {
+        "exercises": [
+            {
+                "name": name,
+                "sets": [
+                    {"set_number": n, "reps": rng.randint(3, 12), "weight": 135.0}
+                    for n in range(1, sets + 1)
+                ],
+            }
+            for name in rng.sample(EXERCISES, exercises)
+        ]
+    }
+
+
+def build_scenarios(exercises, sets):
+    """
+    (name, weight, method, path, body factory) for every endpoint.
+
+    Weights roughly follow real traffic: reads dominate, writes are rarer.
+    Paths may reference the user's seeded item ids, e.g. {workout_id}.
+    """
+    return [
+        ("dashboard", 10, "GET", "/api/dashboard", None),
+        ("workouts.list", 8, "GET", "/api/workouts?days=30", None),
+        ("workouts.page", 4, "GET", "/api/workouts?days=3650&limit=20", None),
+        ("workouts.get", 3, "GET", "/api/workouts/{workout_id}", None),
+        (
+            "workouts.create",
+            3,
+            "POST",
+            "/api/workouts",
+            lambda r: workout_payload(r, exercises, sets),
+        ),
+        ("nutrition.list", 6, "GET", "/api/nutrition?days=30", None),
+        ("nutrition.page", 3, "GET", "/api/nutrition?days=3650&limit=50", None),
+        ("nutrition.get", 2, "GET", "/api/nutrition/{nutrition_id}", None),
+        (
+            "nutrition.create",
+            3,
+            "POST",
+            "/api/nutrition",
+            lambda r: {
+                "protein": 150,
+                "carbs": 200,
+                "fats": 70,
+                "calories": r.uniform(1800, 2600),
+            },
+        ),
+        ("weight.list", 6, "GET", "/api/weight?days=90", None),
+        ("weight.get", 2, "GET", "/api/weight/{weight_id}", None),
+        (
+            "weight.create",
+            3,
+            "POST",
+            "/api/weight",
+            lambda r: {"weight": r.uniform(150, 200)},
+        ),
+        ("goals.list", 4, "GET", "/api/goals", None),
+        ("goals.get", 1, "GET", "/api/goals/{goal_id}", None),
+        ("templates.list", 3, "GET", "/api/templates", None),
+        ("templates.get", 1, "GET", "/api/templates/{template_id}", None),
+        (
+            "templates.create",
+            1,
+            "POST",
+            "/api/templates",
+            lambda r: {
+                "name": "Bench Day",
+                "exercises": [{"name": "Bench Press", "sets": 3, "reps": "5"}],
+            },
+        ),
+        ("health", 1, "GET", "/health", None),
+    ]
+
+
+def run_workload(app, tokens, item_ids, scenarios, total_requests, workers, rng_seed):
+    """Fire total_requests weighted-random requests from `workers` threads"""
+    names = [s[0] for s in scenarios]
+    weights = [s[1] for s in scenarios]
+    by_name = {s[0]: s for s in scenarios}
+    user_ids = list(tokens)
+    results = {name: {"latencies": [], "statements": [], "errors": 0} for name in names}
+    lock = threading.Lock()
+    clients = threading.local()
+
+    plan_rng = random.Random(rng_seed)
+    plan = [
+        (
+            plan_rng.choices(names, weights)[0],
+            plan_rng.choice(user_ids),
+            plan_rng.random(),
+        )
+        for _ in range(total_requests)
+    ]
+
+    def fire(step):
+        name, user_id, body_seed = step
+        _, _, method, path, body = by_name[name]
+        if not hasattr(clients, "client"):
+            clients.client = app.test_client()
+
+        kwargs = {"headers": {"Authorization": f"Bearer {tokens[user_id]}"}}
+        if body:
+            kwargs["json"] = body(random.Random(body_seed))
+
+        _local.statements = 0
+        started = time.perf_counter()
+        response = clients.client.open(
+            path.format(**item_ids[user_id]), method=method, **kwargs
+        )
+        elapsed = time.perf_counter() - started
+
+        with lock:
+            result = results[name]
+            result["latencies"].append(elapsed)
+            result["statements"].append(_local.statements)
+            if response.status_code >= 400:
+                result["errors"] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(fire, plan))
+    wall_seconds = time.perf_counter() - started
+
+    return results, wall_seconds
+
+
+# ===== REPORTING =====
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+def summarize(results, wall_seconds):
+    endpoints = {}
+    total = 0
+    for name, result in sorted(results.items()):
+        latencies = sorted(result["latencies"])
+        if not latencies:
+            continue
+        total += len(latencies)
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": result["errors"],
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+            "sql_statements_mean": round(statistics.mean(result["statements"]), 2),
+            "sql_statements_max": max(result["statements"]),
+        }
+
+    return {
+        "total_requests": total,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(total / wall_seconds, 1) if wall_seconds else None,
+        "endpoints": endpoints,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    summary = report["summary"]
+    print(
+        f"\n{summary['total_requests']} requests in {summary['wall_seconds']}s "
+        f"({summary['throughput_rps']} req/s)\n"
+    )
+    header = (
+        f"{'endpoint':<20}{'n':>7}{'err':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'sql':>7}"
+    )
+    if baseline:
+        header += f"{'p50 delta':>12}"
+    print(header)
+
+    base_endpoints = baseline["summary"]["endpoints"] if baseline else {}
+    for name, stats in summary["endpoints"].items():
+        line = (
+            f"{name:<20}{stats['requests']:>7}{stats['errors']:>6}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+            f"{stats['sql_statements_mean']:>7.1f}"
+        )
+        if name in base_endpoints:
+            before = base_endpoints[name]["p50_ms"]
+            change = (stats["p50_ms"] - before) / before * 100 if before else 0
+            line += f"{change:>+11.1f}%"
+        print(line)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365, help="history per user")
+    parser.add_argument("--workouts-per-week", type=float, default=4)
+    parser.add_argument("--exercises", type=int, default=5, help="per workout")
+    parser.add_argument("--sets", type=int, default=4, help="per exercise")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to diff against")
+    parser.add_argument(
+        "--keep-db", action="store_true", help="keep the seeded database"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if OWNS_DB:
+        remove_db(BENCH_DB)
+
+    rng = random.Random(args.seed)
+    app = create_app()
+
+    started = time.perf_counter()
+    tokens, item_ids = seed(
+        app,
+        args.users,
+        args.days,
+        args.workouts_per_week,
+        args.exercises,
+        args.sets,
+        rng,
+    )
+    seed_seconds = time.perf_counter() - started
+    print(f"Seeded {args.users} users x {args.days} days in {seed_seconds:.1f}s")
+
+    scenarios = build_scenarios(args.exercises, args.sets)
+    results, wall_seconds = run_workload(
+        app, tokens, item_ids, scenarios, args.requests, args.workers, args.seed
+    )
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "database": app.config["SQLALCHEMY_DATABASE_URI"],
+        "params": {
+            k: v for k, v in vars(args).items() if k not in ("output", "compare")
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "summary": summarize(results, wall_seconds),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nWrote {args.output}")
+
+    if OWNS_DB and not args.keep_db:
+        remove_db(BENCH_DB)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
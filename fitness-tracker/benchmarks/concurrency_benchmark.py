@@ -0,0 +1,250 @@
+"""
+Reader/writer concurrency benchmark for the SQLite journal mode.
+
+Seeds a scratch SQLite database, then runs reader processes (list and
+dashboard GETs) against writer processes (batch nutrition POSTs, which hold
+the write lock for a whole transaction) for a fixed duration. The run is
+repeated for each journal mode and reader latency is compared.
+
+With the rollback journal (DELETE) a committing writer locks readers out,
+so reads queue behind the busy timeout; with WAL they keep reading the
+last committed snapshot.
+
+Usage (from fitness-tracker/):
+    python -m benchmarks.concurrency_benchmark
+    python -m benchmarks.concurrency_benchmark --readers 8 --writers 2 --seconds 20
+    python -m benchmarks.concurrency_benchmark --modes wal --output wal.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.api_benchmark import git_commit, percentile, remove_db, seed
+from app import create_app
+from config import DevelopmentConfig
+from models import db
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "fitness_concurrency.db")
+READ_PATHS = [
+    "/api/dashboard",
+    "/api/workouts?days=30",
+    "/api/nutrition?days=30",
+    "/api/weight?days=90",
+]
+
+
+def bench_config(journal_mode, synchronous):
+    """DevelopmentConfig on the scratch database with the given pragmas"""
+    return type(
+        "ConcurrencyBenchmarkConfig",
+        (DevelopmentConfig,),
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{BENCH_DB}",
+            "JWT_SECRET_KEY": "benchmark-secret-key-not-for-production",
+            "DEBUG": False,
+            "REQUEST_LOGGING_ENABLED": False,
+            "METRICS_ENABLED": False,
+            # Reads must reach the database to measure locking
+            "RESPONSE_CACHE_ENABLED": False,
+            "JOBS_ENABLED": False,
+            "SQLITE_JOURNAL_MODE": journal_mode,
+            "SQLITE_SYNCHRONOUS": synchronous,
+        },
+    )
+
+
+def nutrition_batch(rng, size):
+    return {
+        "items": [
+            {
+                "protein": rng.uniform(80, 220),
+                "carbs": rng.uniform(100, 350),
+                "fats": rng.uniform(40, 120),
+                "calories": rng.uniform(1600, 3200),
+            }
+            for _ in range(size)
+        ]
+    }
+
+
+def client_worker(role, n, journal_mode, args, tokens, start, queue):
+    """
+    Fire reads or writes until args.seconds after start, in its own process
+
+    Separate processes keep the GIL out of the measurement, so only
+    database locking shows up in latency.
+    """
+    app = create_app(bench_config(journal_mode, args.synchronous))
+    client = app.test_client()
+    rng = random.Random(args.seed + (1000 if role == "write" else 0) + n)
+    user_ids = list(tokens)
+    latencies, errors = [], 0
+
+    queue.put(("ready", role, None, None))
+    start.wait()
+    deadline = time.perf_counter() + args.seconds
+
+    while time.perf_counter() < deadline:
+        headers = {"Authorization": f"Bearer {tokens[rng.choice(user_ids)]}"}
+        started = time.perf_counter()
+        if role == "read":
+            response = client.get(rng.choice(READ_PATHS), headers=headers)
+        else:
+            response = client.post(
+                "/api/nutrition/batch",
+                json=nutrition_batch(rng, args.batch_size),
+                headers=headers,
+            )
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+
+    queue.put(("done", role, latencies, errors))
+
+
+def run_mode(journal_mode, args):
+    """Seed a fresh database and run the mixed workload in one journal mode"""
+    remove_db(BENCH_DB)
+    app = create_app(bench_config(journal_mode, args.synchronous))
+
+    rng = random.Random(args.seed)
+    tokens, _ = seed(app, args.users, args.days, 4, 5, 4, rng)
+    with app.app_context():
+        actual_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        db.engine.dispose()
+
+    ctx = multiprocessing.get_context("spawn")
+    queue, start = ctx.Queue(), ctx.Event()
+    roles = [("read", n) for n in range(args.readers)] + [
+        ("write", n) for n in range(args.writers)
+    ]
+    processes = [
+        ctx.Process(
+            target=client_worker,
+            args=(role, n, journal_mode, args, tokens, start, queue),
+        )
+        for role, n in roles
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        queue.get()  # ready
+    start.set()
+
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    for _ in processes:
+        _, role, values, failed = queue.get()
+        latencies[role].extend(values)
+        errors[role] += failed
+    for process in processes:
+        process.join()
+
+    remove_db(BENCH_DB)
+    return {
+        "journal_mode": actual_mode,
+        "reads": latency_stats(latencies["read"], errors["read"], args.seconds),
+        "writes": latency_stats(latencies["write"], errors["write"], args.seconds),
+    }
+
+
+def latency_stats(latencies, errors, seconds):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "per_second": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+    }
+
+
+def print_report(report):
+    print(
+        f"\n{'mode':<10}{'kind':<8}{'n':>7}{'err':>6}{'per s':>9}"
+        f"{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    )
+    for run in report["runs"]:
+        for kind in ("reads", "writes"):
+            stats = run[kind]
+            if not stats["requests"]:
+                continue
+            print(
+                f"{run['journal_mode']:<10}{kind:<8}{stats['requests']:>7}"
+                f"{stats['errors']:>6}{stats['per_second']:>9.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+            )
+
+    runs = {run["journal_mode"]: run for run in report["runs"]}
+    if "delete" in runs and "wal" in runs:
+        before, after = runs["delete"]["reads"], runs["wal"]["reads"]
+        if before["requests"] and after["requests"]:
+            print(
+                f"\nReader p99 under writes: {before['p99_ms']:.2f}ms (delete) -> "
+                f"{after['p99_ms']:.2f}ms (wal)"
+            )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=180, help="history per user")
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument(
+        "--batch-size", type=int, default=200, help="nutrition logs per write"
+    )
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--modes",
+        default="delete,wal",
+        help="comma-separated journal modes to compare",
+    )
+    parser.add_argument("--synchronous", default="NORMAL")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    runs = []
+    for mode in args.modes.split(","):
+        print(f"Running {mode} for {args.seconds:g}s ...")
+        runs.append(run_mode(mode.strip(), args))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "runs": runs,
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nWrote {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
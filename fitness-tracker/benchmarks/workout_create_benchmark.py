@@ -0,0 +1,128 @@
+"""
+Latency and SQL statements of logging a workout (POST /api/workouts).
+
+Registers one user in a throwaway file-backed SQLite database, then logs
+--requests workouts of --exercises x --sets through the Flask test client
+and reports p50/p95 latency and SQL statements per request (an executemany
+counts as one statement). It only uses the app factory and the public API,
+so the same file runs against older commits; this is how the before/after
+numbers of batching exercise and set inserts are reproduced:
+
+    git worktree add /tmp/before <commit>^
+    mkdir -p /tmp/before/fitness-tracker/benchmarks
+    cp benchmarks/workout_create_benchmark.py /tmp/before/fitness-tracker/benchmarks/
+    (cd /tmp/before/fitness-tracker && python -m benchmarks.workout_create_benchmark)
+    python -m benchmarks.workout_create_benchmark
+
+Usage (from fitness-tracker/):
+    python -m benchmarks.workout_create_benchmark --exercises 10 --sets 5 --requests 200
+
+The workouts.create scenario of api_benchmark.py measures the same endpoint
+under mixed concurrent traffic.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# The app reads its settings from the environment at import/creation time
+BENCH_DB = os.path.join(tempfile.gettempdir(), "fitness_workout_benchmark.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+os.environ.setdefault("REQUEST_LOGGING_ENABLED", "false")
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+
+statements = 0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+def remove_db():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(BENCH_DB + suffix):
+            os.remove(BENCH_DB + suffix)
+
+
+def workout_payload(exercises, sets):
+    return {
+        "exercises": [
+            {
+                "name": f"Exercise {e}",
+                "sets": [
+                    {"set_number": s, "reps": 8, "weight": 135.0}
+                    for s in range(1, sets + 1)
+                ],
+            }
+            for e in range(exercises)
+        ]
+    }
+
+
+def percentile(sorted_values, pct):
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--exercises", type=int, default=10, help="per workout")
+    parser.add_argument("--sets", type=int, default=5, help="per exercise")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global statements
+    args = parse_args(argv)
+    remove_db()
+
+    app = create_app()
+    client = app.test_client()
+    response = client.post(
+        "/api/auth/register",
+        json={"username": "bench", "email": "bench@example.com", "password": "pw"},
+    )
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    payload = workout_payload(args.exercises, args.sets)
+
+    latencies, counts = [], []
+    for n in range(args.warmup + args.requests):
+        statements = 0
+        started = time.perf_counter()
+        response = client.post("/api/workouts", headers=headers, json=payload)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 201:
+            print(f"Request failed: {response.status_code} {response.get_data()}")
+            return 1
+        if n >= args.warmup:
+            latencies.append(elapsed)
+            counts.append(statements)
+
+    latencies.sort()
+    print(
+        f"{args.requests} workouts of {args.exercises} exercises x {args.sets} sets: "
+        f"p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 95) * 1000:.1f} ms, "
+        f"{statistics.mean(counts):.0f} SQL statements per request"
+    )
+
+    remove_db()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
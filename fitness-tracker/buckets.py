@@ -0,0 +1,65 @@
+"""
+Calendar buckets for GROUP BY queries.
+
+date_bucket(unit, column) is the first day of the day / week / month that a
+DateTime column falls in, compiled per dialect so the same query runs on
+SQLite (date() modifiers) and PostgreSQL (date_trunc). Weeks start on Monday
+on both.
+
+SQLite returns buckets as "YYYY-MM-DD" strings and PostgreSQL as dates;
+as_date() normalizes either.
+"""
+
+from datetime import date
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+BUCKETS = ("day", "week", "month")
+
+# date() modifiers taking a day to the start of its bucket
+_SQLITE_MODIFIERS = {
+    "day": (),
+    # 'weekday 0' moves forward to Sunday (or stays on it)
+    "week": ("weekday 0", "-6 days"),
+    "month": ("start of month",),
+}
+
+
+class date_bucket(FunctionElement):
+    """First day of the unit ("day", "week" or "month") containing column"""
+
+    type = Date()
+    name = "date_bucket"
+    inherit_cache = True
+    # The unit is part of the SQL, so it must be part of the cache key
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("unit", InternalTraversal.dp_string)
+    ]
+
+    def __init__(self, unit, column):
+        if unit not in BUCKETS:
+            raise ValueError(f"Unknown bucket {unit!r}")
+        self.unit = unit
+        super().__init__(column)
+
+
+@compiles(date_bucket)
+def _compile_date_trunc(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return f"CAST(date_trunc('{element.unit}', {column}) AS DATE)"
+
+
+@compiles(date_bucket, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    modifiers = "".join(f", '{m}'" for m in _SQLITE_MODIFIERS[element.unit])
+    return f"date({column}{modifiers})"
+
+
+def as_date(value):
+    """Bucket value from a result row as a date"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
@@ -0,0 +1,151 @@
+"""
+Per-user response cache for read endpoints.
+
+GET handlers decorated with @cached_response store their JSON body under a
+key made of the user, the URL path and the ETag that @conditional computed
+for the request. The ETag already hashes the endpoint, query string and the
+database version of every resource the response is built from, so the body
+and the ETag always come from one version: any write, from any worker
+process or CLI command, moves later reads to a new key, and stale entries
+are never read again and age out of the LRU.
+
+A hit costs only @conditional's version query, served by the (user_id,
+updated_at) indexes, and skips the view's own queries and serialization.
+Skipping the database entirely would need every writer to announce its
+changes to every process, which CLI commands and other workers cannot.
+
+Derived data not covered by a resource version (daily rollups rebuilt by
+rebuild-rollups) is picked up when entries expire (RESPONSE_CACHE_TTL).
+
+The storage is pluggable. Any object implementing CacheBackend can be passed
+to init_cache(); the default LRUCacheBackend is in-process, bounded by entry
+count and total bytes, with a TTL.
+
+Config (app.config):
+    RESPONSE_CACHE_ENABLED          default True
+    RESPONSE_CACHE_MAX_ENTRIES      default 2048
+    RESPONSE_CACHE_MAX_BYTES        default 64 MB
+    RESPONSE_CACHE_TTL              seconds, default 300
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, g, request
+from flask_jwt_extended import get_jwt_identity
+
+
+class CacheBackend:
+    """Interface for response cache storage"""
+
+    def get(self, key):
+        """Return the stored value or None"""
+        raise NotImplementedError
+
+    def set(self, key, value, size):
+        """Store value; size is its approximate byte size"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU with TTL, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class ResponseCache:
+    """Version-keyed response cache bound to a backend"""
+
+    def __init__(self, backend=None, enabled=True):
+        self.backend = backend or LRUCacheBackend()
+        self.enabled = enabled
+
+    def key_for(self, user_id, etag):
+        """Key of the current request at the version etag was made from"""
+        return f"r:{user_id}:{request.path}:{etag}"
+
+
+response_cache = ResponseCache()
+
+
+def init_cache(app, backend=None):
+    """Configure the shared response cache from app.config"""
+    response_cache.enabled = app.config.get("RESPONSE_CACHE_ENABLED", True)
+    response_cache.backend = backend or LRUCacheBackend(
+        max_entries=app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 2048),
+        max_bytes=app.config.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        ttl=app.config.get("RESPONSE_CACHE_TTL", 300),
+    )
+
+
+def cached_response(view):
+    """
+    Cache a GET view's 200 responses per user under the request's ETag.
+
+    Must be applied under @conditional, which sets g.etag. Requests it lets
+    through without an ETag (a missing item's 404) are not cached.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = g.get("etag")
+        if not response_cache.enabled or etag is None:
+            return view(*args, **kwargs)
+
+        key = response_cache.key_for(get_jwt_identity(), etag)
+        hit = response_cache.backend.get(key)
+        if hit is not None:
+            body, mimetype = hit
+            return Response(body, status=200, mimetype=mimetype)
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            body = response.get_data()
+            response_cache.backend.set(key, (body, response.mimetype), len(body))
+        return response
+
+    return wrapper
@@ -0,0 +1,171 @@
+"""
+Flask CLI commands for database maintenance.
+
+Usage:
+    flask --app app upgrade-db
+    flask --app app rebuild-rollups [--user-id N]
+    flask --app app check-goals [--user-id N] [--fix]
+    flask --app app prune-tombstones [--days N]
+    flask --app app import-history FILE --user-id N [--format csv|jsonl]
+        [--resume IMPORT_ID] [--chunk-size N]
+    flask --app app copy-to-replica
+    flask --app app move-user USER_ID --to SHARD
+    flask --app app rebalance-shards [--dry-run]
+"""
+
+import click
+from migrations import upgrade_schema
+from rollups import rebuild_rollups
+from goal_progress import check_goals
+from tombstones import prune_tombstones
+from replicas import copy_to_replica
+from shard_directory import (
+    MoveConflict,
+    for_each_shard,
+    move_user,
+    plan_rebalance,
+    user_shard,
+)
+from models import db, User, ImportRun
+from importer import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    detect_format,
+    run_import,
+    start_import,
+)
+
+
+def register_commands(app):
+    """Attach maintenance commands to the app's CLI"""
+
+    @app.cli.command("upgrade-db")
+    def upgrade_db():
+        """Create missing tables, columns and indexes and run backfills"""
+        changes = upgrade_schema()
+        for change in changes:
+            click.echo(change)
+        click.echo(f"Schema up to date ({len(changes)} change(s) applied)")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild this user")
+    def rebuild_rollups_command(user_id):
+        """Recompute daily_user_stats from raw nutrition and workout rows"""
+        if user_id is not None:
+            with user_shard(user_id):
+                users = rebuild_rollups(user_id)
+        else:
+            # One user at a time, each on its own shard
+            user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+            for uid in user_ids:
+                with user_shard(uid):
+                    rebuild_rollups(uid)
+            users = len(user_ids)
+        click.echo(f"Rebuilt daily rollups for {users} user(s)")
+
+    @app.cli.command("check-goals")
+    @click.option("--user-id", type=int, default=None, help="Only check this user")
+    @click.option("--fix", is_flag=True, help="Overwrite drifted progress")
+    def check_goals_command(user_id, fix):
+        """Verify incremental goal progress against a full recomputation"""
+        if user_id is not None:
+            with user_shard(user_id):
+                mismatches = check_goals(user_id, fix=fix)
+        else:
+            mismatches = [m for _ in for_each_shard() for m in check_goals(fix=fix)]
+        for goal_id, stored, expected in mismatches:
+            click.echo(f"goal {goal_id}: stored={stored} expected={expected}")
+        click.echo(
+            f"{len(mismatches)} goal(s) out of date" + (" (fixed)" if fix else "")
+        )
+
+    @app.cli.command("prune-tombstones")
+    @click.option(
+        "--days",
+        type=int,
+        default=None,
+        help="Retention in days (default SYNC_TOMBSTONE_RETENTION_DAYS)",
+    )
+    def prune_tombstones_command(days):
+        """Delete sync tombstones older than the retention window"""
+        if days is None:
+            days = app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 90)
+        deleted = sum(prune_tombstones(days) for _ in for_each_shard())
+        click.echo(f"Pruned {deleted} tombstone(s) older than {days} day(s)")
+
+    @app.cli.command("import-history")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--user-id", type=int, required=True, help="Owner of the data")
+    @click.option("--format", "fmt", type=click.Choice(FORMATS), default=None)
+    @click.option("--resume", type=int, default=None, help="Failed import to resume")
+    @click.option("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    def import_history_command(path, user_id, fmt, resume, chunk_size):
+        """Stream a CSV / JSON Lines history file into a user's account"""
+        if db.session.get(User, user_id) is None:
+            raise click.ClickException(f"User {user_id} not found")
+
+        with user_shard(user_id):
+            if resume is not None:
+                run = ImportRun.query.filter_by(id=resume, user_id=user_id).first()
+                if run is None:
+                    raise click.ClickException(f"Import {resume} not found")
+                if run.status == "completed":
+                    raise click.ClickException(f"Import {resume} already completed")
+                if fmt:
+                    run.format = fmt
+            else:
+                fmt = fmt or detect_format(path)
+                if fmt is None:
+                    raise click.ClickException("Cannot tell the format; pass --format")
+                run = start_import(user_id, fmt, path)
+
+            with open(path, encoding="utf-8-sig", newline="") as stream:
+                run_import(run, stream, chunk_size=chunk_size)
+
+            click.echo(f"Import {run.id}: {run.status}, {run.records_done} record(s)")
+            if run.status == "failed":
+                raise click.ClickException(
+                    f"{run.error} (fix the file and rerun with --resume {run.id})"
+                )
+
+    @app.cli.command("copy-to-replica")
+    def copy_to_replica_command():
+        """Copy a SQLite primary over its SQLite replica (local testing)"""
+        try:
+            copy_to_replica(db)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo("Replica refreshed from primary")
+
+    @app.cli.command("move-user")
+    @click.argument("user_id", type=int)
+    @click.option("--to", "target", type=int, required=True, help="Target shard")
+    def move_user_command(user_id, target):
+        """Move a user's data to another shard"""
+        try:
+            copied = move_user(user_id, target)
+        except (ValueError, MoveConflict) as e:
+            raise click.ClickException(str(e))
+        click.echo(f"User {user_id}: {copied} row(s) moved to shard {target}")
+
+    @app.cli.command("rebalance-shards")
+    @click.option("--dry-run", is_flag=True, help="Only print the planned moves")
+    def rebalance_shards_command(dry_run):
+        """Move users until every shard holds about the same number"""
+        moves = plan_rebalance()
+        if dry_run:
+            for user_id, source, target in moves:
+                click.echo(f"user {user_id}: shard {source} -> {target}")
+            click.echo(f"{len(moves)} user(s) to move")
+            return
+
+        moved = 0
+        for user_id, source, target in moves:
+            click.echo(f"user {user_id}: shard {source} -> {target}")
+            try:
+                move_user(user_id, target)
+                moved += 1
+            except MoveConflict as e:
+                # Rerunning the command plans the skipped users again
+                click.echo(f"  skipped: {e}")
+        click.echo(f"{moved} user(s) moved")
@@ -12,6 +12,71 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=30)
 
+    # Connection pool for server databases (see database.py)
+    DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+    DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+    DATABASE_POOL_PRE_PING = (
+        os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+    )
+
+    # Read replica for GET requests (see replicas.py)
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+    # Extra databases holding users' data, shards 1..N (see shards.py)
+    DATABASE_SHARD_URLS = os.getenv("DATABASE_SHARD_URLS")
+    # How long a move waits for the user's in-flight requests (see shard_directory.py)
+    SHARD_MOVE_DRAIN_SECONDS = float(os.getenv("SHARD_MOVE_DRAIN_SECONDS", "10"))
+
+    # SQLite pragmas set on every connection (see database.py)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+    # Request logging (see request_logging.py)
+    REQUEST_LOGGING_ENABLED = (
+        os.getenv("REQUEST_LOGGING_ENABLED", "true").lower() == "true"
+    )
+    REQUEST_LOG_LEVEL = os.getenv("REQUEST_LOG_LEVEL", "INFO")
+    REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0"))
+
+    # Per-route metrics served at /metrics (see metrics.py)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Per-user GET response cache (see cache.py)
+    RESPONSE_CACHE_ENABLED = (
+        os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    )
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+    RESPONSE_CACHE_MAX_BYTES = int(
+        os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+    # In-memory exercise name suggestion indexes (see suggest.py)
+    SUGGEST_INDEX_MAX_USERS = int(os.getenv("SUGGEST_INDEX_MAX_USERS", "10000"))
+    SUGGEST_INDEX_TTL = int(os.getenv("SUGGEST_INDEX_TTL", "3600"))
+
+    # Largest accepted body for the /batch endpoints (see batch.py)
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+    # Background jobs (see jobs.py)
+    JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_FILES_DIR = os.getenv("JOB_FILES_DIR")
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+    JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "30"))
+    JOB_FILES_RETENTION_HOURS = int(os.getenv("JOB_FILES_RETENTION_HOURS", "24"))
+
+    # Deletion tombstones for GET /api/sync (see tombstones.py)
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(
+        os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90")
+    )
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -35,6 +100,13 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     TESTING = True
     JWT_SECRET_KEY = "test-secret-key"
+    REQUEST_LOGGING_ENABLED = False
+    RESPONSE_CACHE_ENABLED = False
+    DATABASE_REPLICA_URL = None
+    DATABASE_SHARD_URLS = None
+    SHARD_MOVE_DRAIN_SECONDS = 0
+    # Job threads cannot share the in-memory database
+    JOBS_ENABLED = False
 
 
 # Get config based on FLASK_ENV
@@ -0,0 +1,118 @@
+"""
+Engine tuning for the configured database.
+
+Server databases (PostgreSQL, MySQL) get connection pool settings. SQLite
+files are switched to WAL journaling on every new connection, so readers
+keep reading the last committed snapshot while a writer commits instead of
+waiting for its lock. The other pragmas trade a little durability on power
+loss (synchronous=NORMAL, safe in WAL mode) for fewer fsyncs, make writers
+wait for each other rather than fail with "database is locked", and let
+reads use a memory map.
+
+Config (app.config):
+    DATABASE_POOL_SIZE          persistent connections per process (default 5)
+    DATABASE_MAX_OVERFLOW       extra connections under load (default 10)
+    DATABASE_POOL_RECYCLE       seconds before a connection is replaced (1800)
+    DATABASE_POOL_TIMEOUT       seconds to wait for a free connection (30)
+    DATABASE_POOL_PRE_PING      test connections before use (default True)
+    SQLITE_JOURNAL_MODE         default "WAL"
+    SQLITE_SYNCHRONOUS          default "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS      default 5000
+    SQLITE_MMAP_SIZE            bytes, default 256 MB (0 disables)
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from replicas import REPLICA_BIND
+from shards import shard_bind_key, shard_urls
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the database at uri"""
+    if is_sqlite(uri):
+        # Pooling is left to Flask-SQLAlchemy's SQLite defaults
+        return {}
+
+    return {
+        "pool_size": config.get("DATABASE_POOL_SIZE", 5),
+        "max_overflow": config.get("DATABASE_MAX_OVERFLOW", 10),
+        "pool_recycle": config.get("DATABASE_POOL_RECYCLE", 1800),
+        "pool_timeout": config.get("DATABASE_POOL_TIMEOUT", 30),
+        "pool_pre_ping": config.get("DATABASE_POOL_PRE_PING", True),
+    }
+
+
+def sqlite_pragmas(config, uri):
+    """PRAGMA statements to run on each new connection to a SQLite database"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}"
+    ]
+    if is_memory_sqlite(uri):
+        # Journaling and mmap don't apply to in-memory databases
+        return pragmas
+
+    pragmas += [
+        f"PRAGMA journal_mode = {config.get('SQLITE_JOURNAL_MODE', 'WAL')}",
+        f"PRAGMA synchronous = {config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA mmap_size = {int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    ]
+    return pragmas
+
+
+def configure_engine(engine, config):
+    """Install the SQLite connect hook on engine (no-op for other databases)"""
+    uri = engine.url.render_as_string(hide_password=False)
+    if not is_sqlite(uri):
+        return
+
+    pragmas = sqlite_pragmas(config, uri)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def init_database(app, db):
+    """
+    Apply engine options, add the replica and shard binds if configured
+    (see replicas.py, shards.py) and bind db to the app
+
+    Call instead of db.init_app(app).
+    """
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    options = engine_options(app.config, uri)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    replica_url = app.config.get("DATABASE_REPLICA_URL")
+    if replica_url:
+        binds.setdefault(
+            REPLICA_BIND,
+            {"url": replica_url, **engine_options(app.config, replica_url)},
+        )
+    for shard, url in enumerate(shard_urls(app.config), 1):
+        binds.setdefault(
+            shard_bind_key(shard), {"url": url, **engine_options(app.config, url)}
+        )
+    app.config["SQLALCHEMY_BINDS"] = binds
+
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config)
@@ -0,0 +1,25 @@
+"""
+Timestamps in request bodies.
+
+The database stores naive UTC datetimes (datetime.utcnow() defaults), and
+goal periods, rollup days and sync positions are compared against them.
+Client timestamps may carry an offset ("2026-10-16T10:00:00Z",
+"...+02:00"); they are converted to UTC and stored naive like the rest.
+"""
+
+from datetime import datetime, timezone
+
+
+def parse_datetime(value):
+    """
+    ISO 8601 string as a naive UTC datetime
+
+    Naive input is taken to be UTC already.
+
+    Raises:
+        ValueError, TypeError: if value is not an ISO 8601 string
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,109 @@
+"""
+ETags and conditional GET for the read endpoints.
+
+Every GET handler in routes/ is decorated with @conditional(...). Before the
+view runs, the decorator derives a strong ETag from a cheap per-user version
+of the resources the response is built from:
+
+- collections: (row count, max id, max updated_at) per resource, read for all
+  listed resources in one statement served by the (user_id, updated_at)
+  indexes. Inserts raise max id, edits raise max updated_at, deletes lower
+  the count.
+- items: (id, updated_at) of the single row.
+
+The endpoint, query string and, for collections, the current UTC day are
+folded in too, so different pages/filters get different tags and "last N
+days" windows roll over daily. If the request's If-None-Match matches, a 304
+is returned without loading or serializing any rows.
+"""
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func, literal, select, union_all
+from models import db, Workout, NutritionLog, WeightLog, Goal, WorkoutTemplate
+
+RESOURCE_MODELS = {
+    "workouts": Workout,
+    "nutrition": NutritionLog,
+    "weight": WeightLog,
+    "goals": Goal,
+    "templates": WorkoutTemplate,
+}
+
+
+def collection_version(user_id, resources):
+    """(resource, count, max id, max updated_at) rows for the user, one query"""
+    selects = [
+        select(
+            literal(name),
+            func.count(model.id),
+            func.max(model.id),
+            func.max(model.updated_at),
+        ).where(model.user_id == user_id)
+        for name, model in ((r, RESOURCE_MODELS[r]) for r in resources)
+    ]
+    statement = selects[0] if len(selects) == 1 else union_all(*selects)
+    return [tuple(row) for row in db.session.execute(statement)]
+
+
+def item_version(resource, item_id, user_id):
+    """(id, updated_at) of the user's row, or None if it doesn't exist"""
+    model = RESOURCE_MODELS[resource]
+    row = db.session.execute(
+        select(model.id, model.updated_at).where(
+            model.id == item_id, model.user_id == user_id
+        )
+    ).first()
+    return tuple(row) if row else None
+
+
+def make_etag(*parts):
+    """Hash the version parts with the endpoint and query string"""
+    args = sorted(request.args.items(multi=True))
+    raw = repr((request.endpoint, args) + parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional(*resources, item_arg=None):
+    """
+    Add an ETag to a GET view's 200 responses and answer 304 when it matches.
+
+    For item views pass the URL argument holding the id as item_arg; the
+    first resource names the row's table. Must be applied under
+    @jwt_required() and outside @cached_response.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = int(get_jwt_identity())
+
+            if item_arg:
+                version = item_version(resources[0], kwargs[item_arg], user_id)
+                if version is None:
+                    # Let the view produce its usual 404
+                    return view(*args, **kwargs)
+                etag = make_etag(version)
+            else:
+                today = datetime.utcnow().date()
+                etag = make_etag(today, *collection_version(user_id, resources))
+
+            # @cached_response keys the body on this same tag
+            g.etag = etag
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,154 @@
+"""
+Per-user exercise catalog.
+
+Every logged (WorkoutExercise) and planned (TemplateExercise) exercise points
+at a row of the user's `exercises` table, so "Bench Press", "bench press" and
+"Bench  Press " are one exercise with one history. Names are canonicalized on
+write: whitespace is collapsed and the case-folded name is the catalog key.
+The first spelling written becomes the display name, and later rows are
+stored under it.
+
+The catalog is user-owned data and lives on the user's shard.
+"""
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import IntegrityError
+from models import (
+    db,
+    Exercise,
+    TemplateExercise,
+    Workout,
+    WorkoutExercise,
+    WorkoutTemplate,
+)
+
+
+def canonical_name(name):
+    """Name with surrounding whitespace stripped and inner runs collapsed"""
+    return " ".join(str(name).split())
+
+
+def exercise_key(name):
+    """Catalog key: the canonical name, case-folded"""
+    return canonical_name(name).casefold()
+
+
+def find_exercise(user_id, name):
+    """The user's catalog entry for name, or None"""
+    return db.session.scalar(
+        select(Exercise).where(
+            Exercise.user_id == user_id, Exercise.key == exercise_key(name)
+        )
+    )
+
+
+def resolve_exercises(user_id, names):
+    """
+    Catalog entries for names, creating the missing ones
+
+    Two statements when every name is known, four otherwise. Runs in the
+    caller's transaction.
+
+    Returns:
+        {key: (exercise id, display name)} for every name
+    """
+    wanted = {}
+    for name in names:
+        wanted.setdefault(exercise_key(name), canonical_name(name))
+    if not wanted:
+        return {}
+
+    def load():
+        rows = db.session.execute(
+            select(Exercise.key, Exercise.id, Exercise.name).where(
+                Exercise.user_id == user_id, Exercise.key.in_(wanted)
+            )
+        )
+        return {key: (exercise_id, name) for key, exercise_id, name in rows}
+
+    catalog = load()
+    missing = [
+        {"user_id": user_id, "key": key, "name": name}
+        for key, name in wanted.items()
+        if key not in catalog
+    ]
+    if not missing:
+        return catalog
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(Exercise.__table__.insert(), missing)
+    except IntegrityError:
+        # Another request added some of them first; add the rest one by one
+        for row in missing:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(Exercise.__table__.insert(), [row])
+            except IntegrityError:
+                pass
+    return load()
+
+
+# ===== BACKFILL =====
+
+
+def backfill_exercise_catalog():
+    """
+    Link exercises written before the catalog existed
+
+    Copies user_id and date from the workout onto workout_exercises, then
+    points every unlinked logged or template exercise at its catalog entry
+    (created as needed) and stores it under the display name.
+
+    Returns:
+        number of exercise rows linked
+    """
+    workout = select(Workout).where(Workout.id == WorkoutExercise.workout_id)
+    db.session.execute(
+        update(WorkoutExercise)
+        .where(WorkoutExercise.user_id.is_(None))
+        .values(
+            user_id=workout.with_only_columns(Workout.user_id).scalar_subquery(),
+            date=workout.with_only_columns(Workout.date).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    sources = [
+        select(WorkoutExercise.id, WorkoutExercise.user_id, WorkoutExercise.name),
+        select(
+            TemplateExercise.id, WorkoutTemplate.user_id, TemplateExercise.name
+        ).join(WorkoutTemplate, WorkoutTemplate.id == TemplateExercise.template_id),
+    ]
+    linked = 0
+    for query in sources:
+        table = query.selected_columns[0].table
+        rows = db.session.execute(query.where(table.c.exercise_id.is_(None))).all()
+
+        names_by_user = {}
+        for _, user_id, name in rows:
+            names_by_user.setdefault(user_id, set()).add(name)
+        catalogs = {
+            user_id: resolve_exercises(user_id, names)
+            for user_id, names in names_by_user.items()
+        }
+
+        updates = []
+        for row_id, user_id, name in rows:
+            exercise_id, display_name = catalogs[user_id][exercise_key(name)]
+            updates.append(
+                {"b_id": row_id, "b_exercise_id": exercise_id, "b_name": display_name}
+            )
+        if updates:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == bindparam("b_id"))
+                .values(
+                    exercise_id=bindparam("b_exercise_id"), name=bindparam("b_name")
+                ),
+                updates,
+            )
+        linked += len(updates)
+
+    db.session.commit()
+    return linked
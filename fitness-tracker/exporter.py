@@ -0,0 +1,125 @@
+"""
+Streaming export of a user's full history.
+
+export_records() walks workouts (with exercises and sets), nutrition logs,
+weight logs, goals and templates with yield_per, so rows are fetched from
+the database in batches of EXPORT_BATCH_SIZE and each is serialized and
+written before the next batch is loaded. Memory per export stays constant
+however much history the user has.
+
+The output uses the import layout (see importer.py), so an export can be
+imported into another account. Goal and template records are extra types
+that the importer skips.
+
+- jsonl: one record per line. Workouts are single "workout" records with
+  nested exercises, in the POST /api/workouts format.
+- csv: workouts are flattened to one "set" row per set, keyed by workout
+  id. Templates are one "template_exercise" row per exercise.
+"""
+
+import csv
+import io
+import json
+from sqlalchemy.orm import selectinload
+from models import Workout, NutritionLog, WeightLog, Goal, WorkoutTemplate
+from importer import CSV_COLUMNS
+from routes.workouts import workout_query, serialize_workout
+from routes.nutrition import serialize_nutrition_log
+from routes.weight import serialize_weight_log
+from routes.goals import serialize_goal
+from routes.templates import serialize_template
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = ("jsonl", "csv")
+FLUSH_BYTES = 64 * 1024
+EXPORT_CSV_COLUMNS = CSV_COLUMNS + [
+    "id",
+    "goal_type",
+    "target_value",
+    "current_value",
+    "period",
+    "completed",
+    "template",
+    "sets",
+    "alternatives",
+]
+
+
+def export_records(user_id):
+    """Yield every record of the user as a JSON-serializable dict"""
+    workouts = workout_query().filter_by(user_id=user_id)
+    for workout in workouts.order_by(Workout.date, Workout.id).yield_per(
+        EXPORT_BATCH_SIZE
+    ):
+        yield {"type": "workout", **serialize_workout(workout)}
+
+    for model, kind, serialize in (
+        (NutritionLog, "nutrition", serialize_nutrition_log),
+        (WeightLog, "weight", serialize_weight_log),
+    ):
+        query = model.query.filter_by(user_id=user_id)
+        for row in query.order_by(model.date, model.id).yield_per(EXPORT_BATCH_SIZE):
+            yield {"type": kind, **serialize(row)}
+
+    goals = Goal.query.filter_by(user_id=user_id)
+    for goal in goals.order_by(Goal.id).yield_per(EXPORT_BATCH_SIZE):
+        yield {"type": "goal", **serialize_goal(goal)}
+
+    templates = WorkoutTemplate.query.filter_by(user_id=user_id).options(
+        selectinload(WorkoutTemplate.exercises)
+    )
+    for template in templates.order_by(WorkoutTemplate.id).yield_per(EXPORT_BATCH_SIZE):
+        yield {"type": "template", **serialize_template(template)}
+
+
+def csv_rows(record):
+    """Flatten one export record into CSV row dicts"""
+    kind = record["type"]
+
+    if kind == "workout":
+        for exercise in record["exercises"]:
+            for s in exercise["sets"]:
+                yield {
+                    "type": "set",
+                    "date": record["date"],
+                    "workout": record["id"],
+                    "exercise": exercise["name"],
+                    "set_number": s["set_number"],
+                    "reps": s["reps"],
+                    "weight": s["weight"],
+                }
+    elif kind == "template":
+        for exercise in record["exercises"]:
+            yield {
+                "type": "template_exercise",
+                "id": record["id"],
+                "template": record["name"],
+                "exercise": exercise["name"],
+                "sets": exercise["sets"],
+                "reps": exercise["reps"],
+                "alternatives": exercise["alternatives"],
+            }
+    else:
+        yield {key: record[key] for key in EXPORT_CSV_COLUMNS if key in record}
+
+
+def export_lines(user_id, fmt):
+    """Yield the export as text chunks of about FLUSH_BYTES in the given format"""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_COLUMNS)
+        writer.writeheader()
+
+    for record in export_records(user_id):
+        if writer is None:
+            buffer.write(json.dumps(record) + "\n")
+        else:
+            writer.writerows(csv_rows(record))
+
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
@@ -0,0 +1,258 @@
+"""
+Server-maintained goal progress.
+
+Goal.current_value is kept up to date as weight, nutrition and workout rows
+are written, instead of clients pulling full histories to compute it:
+
+- calories: total calories logged inside the goal's period
+- workout_count: number of workouts logged inside the goal's period
+- weight: most recent weight logged before the period ends
+
+Sum goals are adjusted by the written row's delta with a single UPDATE, so a
+write costs the same however much history exists. Weight goals re-read the
+latest weight with one indexed LIMIT 1 lookup. recompute_goal() derives the
+value from scratch and check_goals() compares the two for verification.
+
+`completed` follows progress in both directions, except that a goal the
+user marked complete (marked_complete) stays completed.
+"""
+
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, or_
+from models import db, Goal, NutritionLog, Workout, WeightLog
+
+PERIOD_DAYS = {"month": 30, "year": 365}
+
+
+def set_goal_period(goal):
+    """Fill period_start/period_end from created_at (day-aligned)"""
+    created_at = goal.created_at or datetime.utcnow()
+    goal.period_start = datetime.combine(created_at.date(), time.min)
+    goal.period_end = goal.period_start + timedelta(days=PERIOD_DAYS[goal.period])
+
+
+def is_reached(goal, current):
+    """True when the progress value current has reached target_value"""
+    if current is None:
+        return False
+
+    if goal.goal_type == "weight":
+        # Direction depends on where the user started (losing or gaining)
+        if goal.start_value is None:
+            return False
+        if goal.start_value >= goal.target_value:
+            return current <= goal.target_value
+        return current >= goal.target_value
+
+    return current >= goal.target_value
+
+
+def is_complete(goal, current):
+    """Whether the goal counts as completed with progress value current"""
+    return bool(goal.marked_complete) or is_reached(goal, current)
+
+
+def progress_percent(goal):
+    """
+    How far the goal is from its start to its target, 0-100
+
+    Weight goals are measured from start_value towards the target in either
+    direction; the other goals count up from zero.
+    """
+    if goal.current_value is None:
+        return 0.0
+
+    if goal.goal_type == "weight":
+        if goal.start_value is None:
+            return 0.0
+        distance = goal.start_value - goal.target_value
+        if distance == 0:
+            return 100.0 if goal.current_value == goal.target_value else 0.0
+        progress = (goal.start_value - goal.current_value) / distance
+    elif goal.target_value:
+        progress = goal.current_value / goal.target_value
+    else:
+        return 100.0
+
+    return min(max(progress * 100, 0.0), 100.0)
+
+
+def _goals_covering(user_id, goal_type, when):
+    """Query for the user's goals of goal_type whose period contains when"""
+    return Goal.query.filter(
+        Goal.user_id == user_id,
+        Goal.goal_type == goal_type,
+        Goal.period_start <= when,
+        Goal.period_end > when,
+    )
+
+
+def _increment(query, delta):
+    """Add delta to the goals matched by query and re-evaluate completion"""
+    current = func.coalesce(Goal.current_value, 0) + delta
+    # Both SET expressions see the old row, so completed follows the new value
+    # in either direction (a deleted log can un-complete a goal)
+    query.update(
+        {
+            Goal.current_value: current,
+            Goal.completed: or_(
+                Goal.marked_complete.is_(True), current >= Goal.target_value
+            ),
+        },
+        synchronize_session=False,
+    )
+
+
+def add_progress(user_id, goal_type, when, delta):
+    """Add delta to every matching sum goal and re-evaluate completion"""
+    if not delta:
+        return
+
+    _increment(_goals_covering(user_id, goal_type, when), delta)
+
+
+def on_nutrition(log, sign=1):
+    """Count (sign=1) or uncount (sign=-1) a NutritionLog toward calorie goals"""
+    add_progress(log.user_id, "calories", log.date, sign * log.calories)
+
+
+def add_progress_batch(user_id, goal_type, deltas):
+    """
+    add_progress() for many (when, delta) pairs, one update per affected goal
+    """
+    goals = Goal.query.filter(
+        Goal.user_id == user_id,
+        Goal.goal_type == goal_type,
+        Goal.period_start.isnot(None),
+    ).all()
+
+    for goal in goals:
+        total = sum(
+            delta
+            for when, delta in deltas
+            if goal.period_start <= when < goal.period_end
+        )
+        if total:
+            _increment(Goal.query.filter(Goal.id == goal.id), total)
+
+
+def on_nutrition_batch(user_id, logs):
+    """Count many nutrition log dicts toward calorie goals"""
+    add_progress_batch(
+        user_id, "calories", [(log["date"], log["calories"]) for log in logs]
+    )
+
+
+def on_workout(user_id, workout_date, sign=1):
+    """Count (sign=1) or uncount (sign=-1) a workout toward workout_count goals"""
+    add_progress(user_id, "workout_count", workout_date, sign)
+
+
+def on_workout_batch(user_id, workout_dates):
+    """Count many new workouts toward workout_count goals"""
+    add_progress_batch(user_id, "workout_count", [(d, 1) for d in workout_dates])
+
+
+def on_weight(user_id, when):
+    """Refresh weight goals affected by a weight log written/deleted at when"""
+    goals = Goal.query.filter(
+        Goal.user_id == user_id,
+        Goal.goal_type == "weight",
+        Goal.period_end > when,
+    ).all()
+
+    for goal in goals:
+        refresh_weight_goal(goal)
+
+
+def latest_weight(user_id, before):
+    """Most recent logged weight strictly before the given datetime"""
+    return (
+        db.session.query(WeightLog.weight)
+        .filter(WeightLog.user_id == user_id, WeightLog.date < before)
+        .order_by(WeightLog.date.desc(), WeightLog.id.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def refresh_weight_goal(goal):
+    """Set a weight goal's current_value to the latest weight in its period"""
+    goal.current_value = latest_weight(goal.user_id, goal.period_end) or 0
+    if goal.start_value is None and goal.current_value:
+        goal.start_value = goal.current_value
+    goal.completed = is_complete(goal, goal.current_value)
+
+
+def compute_progress(goal):
+    """Derive a goal's current_value from raw rows (no incremental state)"""
+    if goal.goal_type == "weight":
+        return latest_weight(goal.user_id, goal.period_end) or 0
+
+    if goal.goal_type == "calories":
+        column, model = func.sum(NutritionLog.calories), NutritionLog
+    else:
+        column, model = func.count(Workout.id), Workout
+
+    total = (
+        db.session.query(column)
+        .filter(
+            model.user_id == goal.user_id,
+            model.date >= goal.period_start,
+            model.date < goal.period_end,
+        )
+        .scalar()
+    )
+    return float(total or 0)
+
+
+def recompute_goal(goal):
+    """Reset a goal's progress from scratch (used on create and by check_goals)"""
+    if goal.period_start is None:
+        set_goal_period(goal)
+
+    if goal.goal_type == "weight" and goal.start_value is None:
+        goal.start_value = latest_weight(
+            goal.user_id, goal.created_at or datetime.utcnow()
+        )
+
+    goal.current_value = compute_progress(goal)
+    if goal.goal_type == "weight" and goal.start_value is None and goal.current_value:
+        goal.start_value = goal.current_value
+    goal.completed = is_complete(goal, goal.current_value)
+
+
+def check_goals(user_id=None, fix=False, tolerance=1e-6):
+    """
+    Compare stored progress and completion with a from-scratch recomputation.
+
+    Args:
+        user_id: only check this user's goals
+        fix: overwrite drifted values and commit
+
+    Returns:
+        list of (goal_id, stored current_value, recomputed current_value)
+    """
+    query = Goal.query.order_by(Goal.id)
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+
+    mismatches = []
+    for goal in query.all():
+        if goal.period_start is None:
+            mismatches.append((goal.id, goal.current_value, None))
+            if fix:
+                recompute_goal(goal)
+            continue
+
+        expected = compute_progress(goal)
+        drifted = abs((goal.current_value or 0) - expected) > tolerance
+        if drifted or bool(goal.completed) != is_complete(goal, expected):
+            mismatches.append((goal.id, goal.current_value, expected))
+            if fix:
+                recompute_goal(goal)
+
+    if fix:
+        db.session.commit()
+
+    return mismatches
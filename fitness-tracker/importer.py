@@ -0,0 +1,280 @@
+"""
+Streaming import of history files exported from other trackers.
+
+Files are CSV (with a header row) or JSON Lines. Every record has a `type`:
+
+- nutrition: protein, carbs, fats, calories, date
+- weight: weight, date
+- set: one set of a workout, with date, exercise, set_number, reps, weight
+  and optionally `workout` (any id from the source app). Consecutive set
+  rows with the same `workout` (or, without it, the same date) make up one
+  workout; consecutive rows with the same exercise make up one exercise.
+- workout (JSON Lines only): a whole workout in the POST /api/workouts
+  format, {"type": "workout", "date": ..., "exercises": [...]}
+
+CSV columns: type,date,workout,exercise,set_number,reps,weight,protein,
+carbs,fats,calories (unused columns may be empty or omitted). Goal and
+template records written by exporter.py are accepted and skipped.
+
+The file is read through generators and written in transactions of
+chunk_size records, so memory does not grow with file size. Each record is
+validated with the same parser as the matching POST endpoint. The first
+invalid record fails the import with its line number; chunks before it stay
+committed. ImportRun.records_done is updated in the same transaction as each
+chunk, so resuming an import skips exactly the records already written.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from sqlalchemy import insert
+from models import db, ImportRun, NutritionLog, WeightLog, Workout
+from suggest import forget_suggestions
+from rollups import apply_nutrition_batch, apply_workout_batch
+from goal_progress import on_nutrition_batch, on_workout_batch, on_weight
+from routes.workouts import parse_workout, insert_exercises, parsed_sets
+from routes.nutrition import parse_nutrition
+from routes.weight import parse_weight
+
+FORMATS = ("csv", "jsonl")
+CSV_COLUMNS = [
+    "type",
+    "date",
+    "workout",
+    "exercise",
+    "set_number",
+    "reps",
+    "weight",
+    "protein",
+    "carbs",
+    "fats",
+    "calories",
+]
+DEFAULT_CHUNK_SIZE = 500
+
+PARSERS = {
+    "workout": parse_workout,
+    "nutrition": parse_nutrition,
+    "weight": parse_weight,
+}
+# Written by exporter.py but not imported
+SKIPPED_TYPES = {"goal", "template", "template_exercise"}
+
+
+# ===== READING =====
+
+
+def detect_format(filename):
+    """Import format from a file name's extension, or None"""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return None
+
+
+def text_stream(binary_stream):
+    """Decode an uploaded byte stream as UTF-8 text (BOM tolerated)"""
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line number, dict) for every row of a text stream
+
+    Raises:
+        ValueError: on a row that cannot be decoded
+    """
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                raise ValueError(f"line {line_no}: Invalid JSON")
+            if not isinstance(row, dict):
+                raise ValueError(f"line {line_no}: Each line must be a JSON object")
+            yield line_no, row
+        return
+
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or "type" not in reader.fieldnames:
+        raise ValueError("line 1: CSV header must include a type column")
+    for row in reader:
+        # Empty cells mean "not given", like a missing JSON key
+        yield reader.line_num, {
+            k: v for k, v in row.items() if k is not None and v not in (None, "")
+        }
+
+
+def read_records(rows):
+    """
+    Merge consecutive set rows into workout records
+
+    Yields (line number, record); a merged workout reports the line of its
+    first set.
+    """
+    workout = None  # (line_no, key, record) being assembled
+
+    for line_no, row in rows:
+        if row.get("type") != "set":
+            if workout:
+                yield workout[0], workout[2]
+                workout = None
+            yield line_no, row
+            continue
+
+        key = row.get("workout") or row.get("date")
+        if workout is None or workout[1] != key:
+            if workout:
+                yield workout[0], workout[2]
+            record = {"type": "workout", "date": row.get("date"), "exercises": []}
+            workout = (line_no, key, record)
+
+        exercises = workout[2]["exercises"]
+        if not exercises or exercises[-1]["name"] != row.get("exercise"):
+            exercises.append({"name": row.get("exercise"), "sets": []})
+        exercises[-1]["sets"].append(
+            {k: row[k] for k in ("set_number", "reps", "weight") if k in row}
+        )
+
+    if workout:
+        yield workout[0], workout[2]
+
+
+def parse_record(record):
+    """
+    Validate one record with its endpoint's parser
+
+    Returns:
+        (type, fields, error)
+    """
+    kind = record.get("type")
+    if kind in SKIPPED_TYPES:
+        return kind, None, None
+
+    parse = PARSERS.get(kind)
+    if parse is None:
+        return kind, None, f"Unknown record type: {kind}"
+
+    fields, error = parse(record)
+    return kind, fields, error
+
+
+# ===== WRITING =====
+
+
+def write_chunk(user_id, parsed):
+    """Insert one chunk of validated (type, fields) records; caller commits"""
+    nutrition = [dict(f, user_id=user_id) for k, f in parsed if k == "nutrition"]
+    weights = [dict(f, user_id=user_id) for k, f in parsed if k == "weight"]
+    workouts = [f for k, f in parsed if k == "workout"]
+
+    if nutrition:
+        db.session.execute(insert(NutritionLog), nutrition)
+        apply_nutrition_batch(user_id, nutrition)
+        on_nutrition_batch(user_id, nutrition)
+
+    if weights:
+        db.session.execute(insert(WeightLog), weights)
+        on_weight(user_id, min(row["date"] for row in weights))
+
+    if workouts:
+        for fields in workouts:
+            workout = Workout(user_id=user_id, date=fields["date"])
+            db.session.add(workout)
+            db.session.flush()
+            insert_exercises(workout, fields["exercises"])
+
+        apply_workout_batch(
+            user_id, [(f["date"], parsed_sets(f["exercises"])) for f in workouts]
+        )
+        on_workout_batch(user_id, [f["date"] for f in workouts])
+
+
+def start_import(user_id, fmt, source=None):
+    """Create and commit the ImportRun that tracks a new import"""
+    run = ImportRun(user_id=user_id, format=fmt, source=source)
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+
+def run_import(run, stream, chunk_size=DEFAULT_CHUNK_SIZE, check_cancelled=None):
+    """
+    Import a text stream into run.user_id's history
+
+    For a resumed run, pass the same file again: the first run.records_done
+    records are skipped. Sets run.status to "completed" or "failed" (with
+    run.error) and returns the run. Unexpected (non-validation) errors are
+    re-raised after the run is marked failed.
+
+    check_cancelled, if given, is called before each chunk and may raise to
+    stop the import (see jobs.JobContext). The run is then left "cancelled",
+    resumable like a failed one, and the exception propagates.
+    """
+    run.status = "running"
+    run.error = None
+    db.session.commit()
+
+    records = read_records(read_rows(stream, run.format))
+    records = islice(records, run.records_done, None)
+
+    while True:
+        if check_cancelled:
+            try:
+                check_cancelled()
+            except Exception:
+                # Not a failure of the file: leave the run resumable and let
+                # the caller (jobs.py) record the cancellation
+                run.status = "cancelled"
+                db.session.commit()
+                raise
+
+        try:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            parsed = []
+            for line_no, record in chunk:
+                kind, fields, error = parse_record(record)
+                if error:
+                    raise ValueError(f"line {line_no}: {error}")
+                parsed.append((kind, fields))
+
+            write_chunk(run.user_id, parsed)
+            run.records_done += len(parsed)
+            db.session.commit()
+            forget_suggestions(run.user_id)
+
+        except Exception as e:
+            # Keep the committed chunks; records_done is reloaded from the database
+            db.session.rollback()
+            run.status = "failed"
+            run.error = str(e)[:500]
+            db.session.commit()
+            if not isinstance(e, (ValueError, csv.Error)):
+                raise
+            return run
+
+    run.status = "completed"
+    db.session.commit()
+    return run
+
+
+def serialize_import_run(run):
+    """Convert ImportRun object to JSON-serializable dict"""
+    return {
+        "id": run.id,
+        "format": run.format,
+        "source": run.source,
+        "status": run.status,
+        "records_done": run.records_done,
+        "error": run.error,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "updated_at": run.updated_at.isoformat() if run.updated_at else None,
+    }
@@ -0,0 +1,477 @@
+"""
+In-process background jobs.
+
+Heavy per-user work (exports, imports, rollup rebuilds, goal recomputation)
+is recorded as a row in the jobs table and run on a ThreadPoolExecutor, so
+request workers only insert the row and return 202. Clients poll
+GET /api/jobs/<id>.
+
+- Claiming is an atomic UPDATE ... WHERE status = 'queued', so a job never
+  runs twice even if it is submitted twice, or by several processes.
+- A claimed job holds a lease (JOB_LEASE_SECONDS) that its process renews
+  while the job runs. A running job whose lease has lapsed lost its process
+  and is queued again, or failed once it is out of attempts.
+- A job that raises is retried until max_attempts, then marked failed.
+  Retries wait JOB_RETRY_BACKOFF seconds, doubling per attempt. Failed or
+  cancelled jobs can be retried by hand (retry_job).
+- Cancelling a queued job takes effect immediately. A running job is
+  flagged and stops at its next JobContext.check_cancelled() call.
+- Every JOB_POLL_INTERVAL seconds each runner renews its leases, requeues
+  lapsed ones and submits the queued jobs that are due, so jobs enqueued by
+  processes that don't run jobs (and retries) are picked up. Once an hour it
+  deletes job files older than JOB_FILES_RETENTION_HOURS that no queued or
+  running job still needs (finished exports, leftover uploads).
+
+Handlers are registered with @job_handler(kind) and called as
+handler(ctx, params) inside an app context; they return a JSON-serializable
+result.
+
+Config (app.config):
+    JOBS_ENABLED                run jobs in this process (default True)
+    JOB_WORKERS                 executor threads (default 2)
+    JOB_FILES_DIR               where export files and pending uploads are
+                                kept (default <instance path>/job_files)
+    JOB_LEASE_SECONDS           lease of a running job (default 60)
+    JOB_POLL_INTERVAL           seconds between runner passes (default 5)
+    JOB_RETRY_BACKOFF           seconds before the first retry (default 30)
+    JOB_FILES_RETENTION_HOURS   age at which job files are deleted (default 24)
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+from models import db, Job, ImportRun
+from rollups import rebuild_rollups
+from goal_progress import check_goals
+from importer import run_import
+from exporter import EXPORT_FORMATS, export_lines
+from shard_directory import user_shard
+
+STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED = ("succeeded", "failed", "cancelled")
+CANCEL_CHECK_INTERVAL = 1.0  # seconds between cancellation lookups
+FILE_CLEANUP_INTERVAL = 3600.0  # seconds between job file cleanups
+
+HANDLERS = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class JobFailed(Exception):
+    """Raised by a handler for a failure that retrying cannot fix"""
+
+
+def job_handler(kind):
+    """Register a function as the handler for a job kind"""
+
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+class JobContext:
+    """What a running handler knows about its job"""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.user_id = job.user_id
+        self._last_check = 0.0
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested (rate-limited)"""
+        now = time.monotonic()
+        if now - self._last_check < CANCEL_CHECK_INTERVAL:
+            return
+        self._last_check = now
+
+        requested = db.session.scalar(
+            db.select(Job.cancel_requested).where(Job.id == self.job_id)
+        )
+        if requested:
+            raise JobCancelled()
+
+    def files_dir(self):
+        """Directory for files this job reads or writes"""
+        return job_files_dir(current_app)
+
+
+def job_files_dir(app):
+    """JOB_FILES_DIR, created on first use"""
+    path = app.config.get("JOB_FILES_DIR") or os.path.join(
+        app.instance_path, "job_files"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class JobRunner:
+    """Executes queued jobs for one app on a thread pool"""
+
+    def __init__(
+        self,
+        app,
+        workers=2,
+        lease=60,
+        poll_interval=5.0,
+        retry_backoff=30.0,
+        files_retention_hours=24,
+    ):
+        self.app = app
+        self.lease = timedelta(seconds=lease)
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.files_retention = timedelta(hours=files_retention_hours)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="job"
+        )
+        self._lock = threading.Lock()
+        self._submitted = set()  # ids handed to the executor, not yet done
+        self._running = set()  # ids claimed by this process
+        self._next_cleanup = 0.0
+        self._stop = threading.Event()
+        self._poller = threading.Thread(
+            target=self._poll_loop, name="job-poller", daemon=True
+        )
+
+    def start(self):
+        self._poller.start()
+
+    def submit(self, job_id):
+        with self._lock:
+            if job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def poll(self):
+        """
+        Renew this process's leases, requeue lapsed ones, submit due jobs and
+        delete expired job files when it is time to
+        """
+        now = datetime.utcnow()
+        with self.app.app_context():
+            with self._lock:
+                running = list(self._running)
+            if running:
+                Job.query.filter(Job.id.in_(running), Job.status == "running").update(
+                    {Job.lease_expires_at: now + self.lease},
+                    synchronize_session=False,
+                )
+
+            lapsed = Job.query.filter(
+                Job.status == "running",
+                Job.id.notin_(running),
+                or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+            )
+            lapsed.filter(Job.attempts >= Job.max_attempts).update(
+                {
+                    Job.status: "failed",
+                    Job.error: "Job was interrupted",
+                    Job.lease_expires_at: None,
+                    Job.finished_at: now,
+                },
+                synchronize_session=False,
+            )
+            lapsed.update(
+                {Job.status: "queued", Job.lease_expires_at: None},
+                synchronize_session=False,
+            )
+            db.session.commit()
+
+            due = db.session.scalars(
+                db.select(Job.id)
+                .where(
+                    Job.status == "queued",
+                    or_(Job.run_after.is_(None), Job.run_after <= now),
+                )
+                .order_by(Job.id)
+            ).all()
+
+            if time.monotonic() >= self._next_cleanup:
+                self._next_cleanup = time.monotonic() + FILE_CLEANUP_INTERVAL
+                self.remove_expired_files()
+
+        for job_id in due:
+            self.submit(job_id)
+
+    def remove_expired_files(self):
+        """
+        Delete job files past retention that no queued or running job needs
+
+        Returns:
+            names of the deleted files
+        """
+        directory = job_files_dir(self.app)
+        cutoff = time.time() - self.files_retention.total_seconds()
+        needed = {
+            json.loads(params or "{}").get("file")
+            for params in db.session.scalars(
+                db.select(Job.params).where(Job.status.in_(("queued", "running")))
+            )
+        }
+
+        removed = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if name not in needed and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed.append(name)
+            except FileNotFoundError:
+                # Removed by another process's cleanup
+                pass
+        return removed
+
+    def shutdown(self):
+        self._stop.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                self.app.logger.exception("Job runner poll failed")
+            self._stop.wait(self.poll_interval)
+
+    def _run(self, job_id):
+        try:
+            self._claim_and_run(job_id)
+        finally:
+            with self._lock:
+                self._submitted.discard(job_id)
+                self._running.discard(job_id)
+
+    def _claim_and_run(self, job_id):
+        with self.app.app_context():
+            now = datetime.utcnow()
+            claimed = (
+                Job.query.filter(
+                    Job.id == job_id,
+                    Job.status == "queued",
+                    or_(Job.run_after.is_(None), Job.run_after <= now),
+                ).update(
+                    {
+                        Job.status: "running",
+                        Job.started_at: now,
+                        Job.attempts: Job.attempts + 1,
+                        Job.lease_expires_at: now + self.lease,
+                        Job.run_after: None,
+                    },
+                    synchronize_session=False,
+                )
+                == 1
+            )
+            db.session.commit()
+            if not claimed:
+                # Cancelled, not due yet, or already picked up elsewhere
+                return
+
+            with self._lock:
+                self._running.add(job_id)
+            job = db.session.get(Job, job_id)
+            handler = HANDLERS.get(job.kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"Unknown job kind: {job.kind}")
+                with user_shard(job.user_id):
+                    result = handler(JobContext(job), json.loads(job.params or "{}"))
+            except JobCancelled:
+                db.session.rollback()
+                self._finish(job, "cancelled")
+            except JobFailed as e:
+                db.session.rollback()
+                self._finish(job, "failed", error=str(e)[:500])
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.exception("Job %s (%s) failed", job.id, job.kind)
+                if job.attempts < job.max_attempts and not job.cancel_requested:
+                    # Picked up by a later poll once the backoff has passed
+                    delay = self.retry_backoff * 2 ** (job.attempts - 1)
+                    job.status = "queued"
+                    job.error = str(e)[:500]
+                    job.lease_expires_at = None
+                    job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+                    db.session.commit()
+                else:
+                    self._finish(job, "failed", error=str(e)[:500])
+            else:
+                self._finish(job, "succeeded", result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = json.dumps(result) if result is not None else None
+        job.error = error
+        job.lease_expires_at = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def init_jobs(app):
+    """Start the job runner for the app if JOBS_ENABLED"""
+    if not app.config.get("JOBS_ENABLED", True):
+        return
+
+    runner = JobRunner(
+        app,
+        workers=app.config.get("JOB_WORKERS", 2),
+        lease=app.config.get("JOB_LEASE_SECONDS", 60),
+        poll_interval=app.config.get("JOB_POLL_INTERVAL", 5.0),
+        retry_backoff=app.config.get("JOB_RETRY_BACKOFF", 30.0),
+        files_retention_hours=app.config.get("JOB_FILES_RETENTION_HOURS", 24),
+    )
+    app.extensions["jobs"] = runner
+    runner.start()
+
+
+def enqueue(user_id, kind, params=None, max_attempts=3):
+    """
+    Create a queued job and hand it to this process's runner, if any
+
+    Returns:
+        the committed Job
+    """
+    job = Job(
+        user_id=user_id,
+        kind=kind,
+        params=json.dumps(params or {}),
+        max_attempts=max_attempts,
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    runner = current_app.extensions.get("jobs")
+    if runner is not None:
+        runner.submit(job.id)
+    return job
+
+
+def cancel_job(job):
+    """Cancel a queued job now, or flag a running one to stop"""
+    if job.status in FINISHED:
+        return job
+
+    cancelled = Job.query.filter_by(id=job.id, status="queued").update(
+        {
+            Job.status: "cancelled",
+            Job.cancel_requested: True,
+            Job.finished_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    if not cancelled:
+        job.cancel_requested = True
+    db.session.commit()
+    db.session.refresh(job)
+    return job
+
+
+def retry_job(job):
+    """
+    Queue a failed or cancelled job again with a fresh attempt budget
+
+    Raises:
+        ValueError: if the job is not failed or cancelled
+    """
+    if job.status not in ("failed", "cancelled"):
+        raise ValueError("Only failed or cancelled jobs can be retried")
+
+    job.status = "queued"
+    job.attempts = 0
+    job.cancel_requested = False
+    job.error = None
+    job.result = None
+    job.started_at = None
+    job.finished_at = None
+    job.run_after = None
+    db.session.commit()
+
+    runner = current_app.extensions.get("jobs")
+    if runner is not None:
+        runner.submit(job.id)
+    return job
+
+
+def serialize_job(job):
+    """Convert Job object to JSON-serializable dict"""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": json.loads(job.params or "{}"),
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+# ===== HANDLERS =====
+
+
+@job_handler("rebuild_rollups")
+def rebuild_rollups_job(ctx, params):
+    """Recompute the user's daily_user_stats from raw rows"""
+    rebuild_rollups(ctx.user_id)
+    return {"rebuilt": True}
+
+
+@job_handler("recompute_goals")
+def recompute_goals_job(ctx, params):
+    """Recompute the user's goal progress and fix any drift"""
+    mismatches = check_goals(ctx.user_id, fix=True)
+    return {"fixed": len(mismatches)}
+
+
+@job_handler("export")
+def export_job(ctx, params):
+    """Write the user's export to a file served by GET /api/jobs/<id>/download"""
+    fmt = params.get("format", "jsonl")
+    if fmt not in EXPORT_FORMATS:
+        raise JobFailed(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    filename = f"export-{ctx.job_id}.{fmt}"
+    path = os.path.join(ctx.files_dir(), filename)
+    size = 0
+    try:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in export_lines(ctx.user_id, fmt):
+                ctx.check_cancelled()
+                f.write(chunk)
+                size += len(chunk)
+    except JobCancelled:
+        os.remove(path)
+        raise
+
+    return {"file": filename, "format": fmt, "bytes": size}
+
+
+@job_handler("import")
+def import_job(ctx, params):
+    """Run an upload saved by POST /api/import?background=1"""
+    run = ImportRun.query.filter_by(id=params["import_id"], user_id=ctx.user_id).first()
+    if run is None:
+        raise JobFailed("Import not found")
+
+    path = os.path.join(ctx.files_dir(), params["file"])
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        run_import(run, stream, check_cancelled=ctx.check_cancelled)
+
+    if run.status == "failed":
+        raise JobFailed(run.error)
+
+    os.remove(path)
+    return {"import_id": run.id, "records_done": run.records_done}
@@ -0,0 +1,19 @@
+"""
+The authenticated user in request hooks.
+
+Hooks that run around every request (request logging, replica routing) need
+the user id without decoding the token again. After a @jwt_required view
+has run, flask_jwt_extended keeps the verified JWT on the request; before
+that, or for public routes, there is none.
+"""
+
+from flask_jwt_extended import get_jwt
+
+
+def current_user_id():
+    """Identity (a string) from the JWT verified by @jwt_required, if any"""
+    try:
+        return get_jwt().get("sub")
+    except RuntimeError:
+        # No protected view ran (public route or rejected before verification)
+        return None
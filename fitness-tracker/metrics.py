@@ -0,0 +1,192 @@
+"""
+Per-route request metrics in Prometheus text format.
+
+For every request the middleware records, keyed by endpoint and method:
+- a latency histogram
+- the number of SQL statements and total DB time, counted with SQLAlchemy
+  cursor events
+- response size and status code counts
+
+render_metrics() serializes everything for the /metrics route. Counters live
+in this process; with several workers each one reports its own.
+
+Config (app.config):
+    METRICS_ENABLED     collect metrics and serve /metrics (default True)
+"""
+
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SKIPPED_ENDPOINTS = {"metrics", "static"}
+
+
+class RouteStats:
+    """Accumulated counters for one (endpoint, method) pair"""
+
+    def __init__(self):
+        self.requests = 0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = defaultdict(int)
+
+
+class MetricsRegistry:
+    """Thread-safe store of RouteStats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteStats)
+
+    def observe(
+        self, endpoint, method, status, seconds, sql_statements, db_seconds, size
+    ):
+        with self._lock:
+            stats = self._routes[(endpoint, method)]
+            stats.requests += 1
+            stats.latency_sum += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.latency_buckets[i] += 1
+            stats.sql_statements += sql_statements
+            stats.db_seconds += db_seconds
+            stats.response_bytes += size
+            stats.statuses[status] += 1
+
+    def snapshot(self):
+        """Copy of the current stats, safe to iterate without the lock"""
+        with self._lock:
+            copied = {}
+            for key, stats in self._routes.items():
+                clone = RouteStats()
+                clone.__dict__.update(stats.__dict__)
+                clone.latency_buckets = list(stats.latency_buckets)
+                clone.statuses = dict(stats.statuses)
+                copied[key] = clone
+            return copied
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+# ===== SQL INSTRUMENTATION =====
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("query_started")
+    if not stack:
+        return
+    started = stack.pop()
+    if has_request_context() and "metrics_sql_statements" in g:
+        g.metrics_sql_statements += 1
+        g.metrics_db_seconds += time.perf_counter() - started
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = (
+        context.connection.info.get("query_started") if context.connection else None
+    )
+    if started:
+        started.pop()
+
+
+# ===== MIDDLEWARE =====
+
+
+def init_metrics(app):
+    """Register timing hooks; the caller exposes render_metrics() at /metrics"""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    @app.before_request
+    def start_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_statements = 0
+        g.metrics_db_seconds = 0.0
+
+    @app.after_request
+    def record_metrics(response):
+        if request.endpoint in SKIPPED_ENDPOINTS or "metrics_started" not in g:
+            return response
+
+        registry.observe(
+            endpoint=request.endpoint or "unmatched",
+            method=request.method,
+            status=response.status_code,
+            seconds=time.perf_counter() - g.metrics_started,
+            sql_statements=g.metrics_sql_statements,
+            db_seconds=g.metrics_db_seconds,
+            # Streamed responses have no known length; count them as 0
+            size=response.content_length or 0,
+        )
+        return response
+
+
+# ===== EXPOSITION =====
+
+
+def _labels(endpoint, method, **extra):
+    pairs = {"endpoint": endpoint, "method": method, **extra}
+    return ",".join(f'{k}="{v}"' for k, v in pairs.items())
+
+
+def render_metrics():
+    """Serialize the registry in the Prometheus text exposition format"""
+    routes = registry.snapshot()
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by endpoint.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (endpoint, method), stats in sorted(routes.items()):
+        for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+            labels = _labels(endpoint, method, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{{{labels}}} {count}")
+        labels = _labels(endpoint, method, le="+Inf")
+        lines.append(
+            f"http_request_duration_seconds_bucket{{{labels}}} {stats.requests}"
+        )
+        labels = _labels(endpoint, method)
+        lines.append(
+            f"http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum}"
+        )
+        lines.append(
+            f"http_request_duration_seconds_count{{{labels}}} {stats.requests}"
+        )
+
+    counters = [
+        ("http_requests_total", "Requests by endpoint and status.", None),
+        ("http_sql_statements_total", "SQL statements executed.", "sql_statements"),
+        ("http_db_seconds_total", "Time spent executing SQL.", "db_seconds"),
+        ("http_response_bytes_total", "Response body bytes sent.", "response_bytes"),
+    ]
+    for name, help_text, attr in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (endpoint, method), stats in sorted(routes.items()):
+            if attr is None:
+                for status, count in sorted(stats.statuses.items()):
+                    labels = _labels(endpoint, method, status=status)
+                    lines.append(f"{name}{{{labels}}} {count}")
+            else:
+                labels = _labels(endpoint, method)
+                lines.append(f"{name}{{{labels}}} {getattr(stats, attr)}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,261 @@
+"""
+Schema upgrades for existing databases.
+
+db.create_all() creates missing tables but never touches tables that already
+exist, so columns and indexes added to models.py after a database was first
+created would never appear. upgrade_schema() brings an existing database up to
+the models: it creates missing tables, adds missing (nullable) columns, creates
+missing indexes, then runs data backfills for the new columns. Every step is
+idempotent.
+
+Upgrades are run by `flask --app app upgrade-db`, never by the app itself:
+the backfills are full-table UPDATEs and several workers starting together
+would race on the DDL. Each database records the SCHEMA_VERSION it was
+upgraded to in the schema_version table; upgrade-db skips databases that are
+current, and app startup only checks the version (one SELECT per database).
+A database with no tables at all is created at startup, as before.
+"""
+
+from datetime import datetime
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateColumn
+from models import (
+    db,
+    Goal,
+    Workout,
+    NutritionLog,
+    WeightLog,
+    WorkoutTemplate,
+    DailyUserStats,
+    SchemaVersion,
+)
+from goal_progress import recompute_goal
+from rollups import rebuild_rollups, users_with_activity
+from exercises import backfill_exercise_catalog
+from shard_directory import for_each_shard, shard_engine_for
+
+# Bump whenever models.py gains a table, column or index, or a backfill is added
+SCHEMA_VERSION = 3
+
+
+def add_missing_columns(engine):
+    """
+    ALTER TABLE ... ADD COLUMN for model columns missing from the database
+
+    Only nullable columns can be added this way;
+    anything else needs a hand-written migration.
+
+    Returns:
+        list of added "table.column" names
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} automatically"
+                )
+
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}")
+                )
+            added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def backfill_rollups():
+    """Recompute daily_user_stats for every user with data in this database"""
+    user_ids = users_with_activity()
+    for user_id in user_ids:
+        rebuild_rollups(user_id)
+    return len(user_ids)
+
+
+def backfill_goal_periods():
+    """Give goals created before server-side progress a period and progress"""
+    goals = Goal.query.filter(Goal.period_start.is_(None)).all()
+    for goal in goals:
+        recompute_goal(goal)
+    db.session.commit()
+    return len(goals)
+
+
+def backfill_updated_at():
+    """Stamp rows written before updated_at existed with their own timestamp"""
+    sources = [
+        (Workout, Workout.date),
+        (NutritionLog, NutritionLog.date),
+        (WeightLog, WeightLog.date),
+        (Goal, Goal.created_at),
+        (WorkoutTemplate, WorkoutTemplate.created_at),
+    ]
+    now = datetime.utcnow()
+    updated = 0
+    for model, source in sources:
+        updated += model.query.filter(model.updated_at.is_(None)).update(
+            {model.updated_at: func.coalesce(source, now)}, synchronize_session=False
+        )
+    db.session.commit()
+    return updated
+
+
+def backfill_created_at():
+    """Give log rows written before created_at existed their updated_at or date"""
+    created = 0
+    for model in (Workout, NutritionLog, WeightLog):
+        created += model.query.filter(model.created_at.is_(None)).update(
+            {
+                model.created_at: func.coalesce(model.updated_at, model.date),
+                # Keep updated_at as is instead of letting onupdate stamp it
+                model.updated_at: model.updated_at,
+            },
+            synchronize_session=False,
+        )
+    db.session.commit()
+    return created
+
+
+def create_missing_indexes(engine):
+    """
+    Create indexes declared in models.py that are missing from the database
+
+    Returns:
+        list of created index names
+    """
+    inspector = inspect(engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+
+    return created
+
+
+def stored_version(engine):
+    """SCHEMA_VERSION the database was last upgraded to (None if never)"""
+    if not inspect(engine).has_table(SchemaVersion.__tablename__):
+        return None
+    with engine.connect() as conn:
+        return conn.scalar(select(SchemaVersion.version))
+
+
+def stamp_version(engine):
+    table = SchemaVersion.__table__
+    with engine.begin() as conn:
+        conn.execute(table.delete())
+        conn.execute(table.insert().values(id=1, version=SCHEMA_VERSION))
+
+
+def upgrade_schema():
+    """
+    Bring the current app's database(s) up to date with models.py
+
+    Runs on every shard (see shards.py); all tables are created everywhere.
+    Shards already at SCHEMA_VERSION are skipped. Must be called inside an
+    application context.
+
+    Returns:
+        list of human-readable descriptions of the changes made
+    """
+    changes = []
+    for shard in for_each_shard():
+        prefix = f"shard {shard}: " if shard else ""
+        engine = shard_engine_for(shard)
+        version = stored_version(engine)
+        if version == SCHEMA_VERSION:
+            continue
+        had_rollups = inspect(engine).has_table(DailyUserStats.__tablename__)
+        db.metadata.create_all(bind=engine)
+
+        shard_changes = []
+        shard_changes += [
+            f"added column {name}" for name in add_missing_columns(engine)
+        ]
+        shard_changes += [
+            f"created index {name}" for name in create_missing_indexes(engine)
+        ]
+
+        # The dashboard reads totals only from the rollups. Compute them when
+        # the table is new, and once for databases upgraded before schema
+        # versions existed, whose rollup table may have been created empty
+        if not had_rollups or version is None:
+            rebuilt = backfill_rollups()
+            if rebuilt:
+                shard_changes.append(f"rebuilt daily rollups for {rebuilt} user(s)")
+
+        goals = backfill_goal_periods()
+        if goals:
+            shard_changes.append(f"backfilled progress for {goals} goal(s)")
+
+        stamped = backfill_updated_at()
+        if stamped:
+            shard_changes.append(f"backfilled updated_at for {stamped} row(s)")
+
+        created = backfill_created_at()
+        if created:
+            shard_changes.append(f"backfilled created_at for {created} row(s)")
+
+        linked = backfill_exercise_catalog()
+        if linked:
+            shard_changes.append(f"linked {linked} exercise(s) to the catalog")
+
+        stamp_version(engine)
+        shard_changes.append(f"schema version {SCHEMA_VERSION}")
+        changes += [prefix + change for change in shard_changes]
+
+    return changes
+
+
+def outdated_shards():
+    """Shard numbers whose database is not at SCHEMA_VERSION"""
+    return [
+        shard
+        for shard in for_each_shard()
+        if stored_version(shard_engine_for(shard)) != SCHEMA_VERSION
+    ]
+
+
+def init_schema(app):
+    """
+    Create the schema of a brand new database; check it on any other
+
+    Returns:
+        True if every database is at SCHEMA_VERSION
+    """
+    with app.app_context():
+        if not inspect(shard_engine_for(0)).get_table_names():
+            try:
+                for change in upgrade_schema():
+                    app.logger.info("Schema created: %s", change)
+            except (OperationalError, ProgrammingError):
+                # Another worker is creating it at the same time
+                db.session.rollback()
+
+        outdated = outdated_shards()
+        if outdated:
+            app.logger.warning(
+                "Database schema is out of date on shard(s) %s; "
+                "run `flask --app app upgrade-db`",
+                ", ".join(map(str, outdated)),
+            )
+        return not outdated
@@ -5,8 +5,10 @@ All SQLAlchemy ORM models defined here.
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+# Reads of GET requests may go to a replica (see replicas.py)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
@@ -45,11 +47,18 @@ class WorkoutTemplate(db.Model):
     """Reusable workout template (e.g., Leg Day, Back Day)"""
 
     __tablename__ = "workout_templates"
+    __table_args__ = (
+        db.Index("ix_workout_templates_user_id_created_at", "user_id", "created_at"),
+        db.Index("ix_workout_templates_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     name = db.Column(db.String(120), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     exercises = db.relationship(
         "TemplateExercise", backref="template", lazy=True, cascade="all, delete-orphan"
@@ -59,6 +68,26 @@ class WorkoutTemplate(db.Model):
         return f"<WorkoutTemplate {self.name}>"
 
 
+class Exercise(db.Model):
+    """One entry of a user's exercise catalog (see exercises.py)"""
+
+    __tablename__ = "exercises"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_exercises_user_id_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Display name, as first written (whitespace collapsed)
+    name = db.Column(db.String(120), nullable=False)
+    # Case-folded name; what "the same exercise" means
+    key = db.Column(db.String(120), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Exercise {self.name}>"
+
+
 class TemplateExercise(db.Model):
     """Exercise within a workout template"""
 
@@ -66,8 +95,9 @@ class TemplateExercise(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     template_id = db.Column(
-        db.Integer, db.ForeignKey("workout_templates.id"), nullable=False
+        db.Integer, db.ForeignKey("workout_templates.id"), nullable=False, index=True
     )
+    exercise_id = db.Column(db.Integer, db.ForeignKey("exercises.id"), index=True)
     name = db.Column(db.String(120), nullable=False)
     sets = db.Column(db.Integer, nullable=True)
     reps = db.Column(db.String(50), nullable=True)
@@ -81,11 +111,19 @@ class Workout(db.Model):
     """Logged workout session"""
 
     __tablename__ = "workouts"
+    __table_args__ = (
+        db.Index("ix_workouts_user_id_date", "user_id", "date"),
+        db.Index("ix_workouts_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     template_id = db.Column(db.Integer, db.ForeignKey("workout_templates.id"))
     date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     exercises = db.relationship(
         "WorkoutExercise", backref="workout", lazy=True, cascade="all, delete-orphan"
@@ -99,10 +137,24 @@ class WorkoutExercise(db.Model):
     """Exercise within a logged workout"""
 
     __tablename__ = "workout_exercises"
+    __table_args__ = (
+        db.Index(
+            "ix_workout_exercises_user_id_exercise_id_date",
+            "user_id",
+            "exercise_id",
+            "date",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    workout_id = db.Column(db.Integer, db.ForeignKey("workouts.id"), nullable=False)
+    workout_id = db.Column(
+        db.Integer, db.ForeignKey("workouts.id"), nullable=False, index=True
+    )
+    exercise_id = db.Column(db.Integer, db.ForeignKey("exercises.id"))
     name = db.Column(db.String(120), nullable=False)
+    # Copied from the workout so per-exercise history is one index range
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    date = db.Column(db.DateTime)
 
     sets = db.relationship(
         "WorkoutSet", backref="exercise", lazy=True, cascade="all, delete-orphan"
@@ -119,7 +171,7 @@ class WorkoutSet(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     exercise_id = db.Column(
-        db.Integer, db.ForeignKey("workout_exercises.id"), nullable=False
+        db.Integer, db.ForeignKey("workout_exercises.id"), nullable=False, index=True
     )
     reps = db.Column(db.Integer, nullable=False)
     weight = db.Column(db.Float, nullable=False)
@@ -133,6 +185,10 @@ class NutritionLog(db.Model):
     """Daily nutrition tracking"""
 
     __tablename__ = "nutrition_logs"
+    __table_args__ = (
+        db.Index("ix_nutrition_logs_user_id_date", "user_id", "date"),
+        db.Index("ix_nutrition_logs_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -141,6 +197,10 @@ class NutritionLog(db.Model):
     carbs = db.Column(db.Float, nullable=False)
     fats = db.Column(db.Float, nullable=False)
     calories = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     def __repr__(self):
         return f"<NutritionLog {self.date}>"
@@ -150,11 +210,19 @@ class WeightLog(db.Model):
     """Weight tracking"""
 
     __tablename__ = "weight_logs"
+    __table_args__ = (
+        db.Index("ix_weight_logs_user_id_date", "user_id", "date"),
+        db.Index("ix_weight_logs_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     weight = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     def __repr__(self):
         return f"<WeightLog {self.weight}lbs>"
@@ -164,6 +232,10 @@ class Goal(db.Model):
     """User fitness goals"""
 
     __tablename__ = "goals"
+    __table_args__ = (
+        db.Index("ix_goals_user_id_created_at", "user_id", "created_at"),
+        db.Index("ix_goals_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -175,6 +247,150 @@ class Goal(db.Model):
     period = db.Column(db.String(20), nullable=False)  # 'month', 'year'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # Progress window and baseline, maintained by goal_progress.py
+    period_start = db.Column(db.DateTime)
+    period_end = db.Column(db.DateTime)
+    start_value = db.Column(db.Float)  # weight goals: weight when the goal was set
+    # Set by the user (PUT /api/goals/<id>); keeps the goal completed
+    # whatever its progress does
+    marked_complete = db.Column(db.Boolean)
 
     def __repr__(self):
         return f"<Goal {self.goal_type}>"
+
+
+class DailyUserStats(db.Model):
+    """Per-user, per-day rollup of nutrition and training volume"""
+
+    __tablename__ = "daily_user_stats"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "date", name="uq_daily_user_stats_user_id_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+
+    nutrition_logs = db.Column(db.Integer, nullable=False, default=0)
+    protein = db.Column(db.Float, nullable=False, default=0)
+    carbs = db.Column(db.Float, nullable=False, default=0)
+    fats = db.Column(db.Float, nullable=False, default=0)
+    calories = db.Column(db.Float, nullable=False, default=0)
+
+    workouts = db.Column(db.Integer, nullable=False, default=0)
+    total_sets = db.Column(db.Integer, nullable=False, default=0)
+    total_reps = db.Column(db.Integer, nullable=False, default=0)
+    total_volume = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyUserStats {self.user_id} {self.date}>"
+
+
+class DeletedRecord(db.Model):
+    """Tombstone for a deleted row, so sync clients learn about deletions"""
+
+    __tablename__ = "deleted_records"
+    __table_args__ = (
+        db.Index("ix_deleted_records_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    resource = db.Column(db.String(20), nullable=False)  # 'workouts', 'goals', ...
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<DeletedRecord {self.resource} {self.record_id}>"
+
+
+class ImportRun(db.Model):
+    """Progress of a history import, so a failed import can be resumed"""
+
+    __tablename__ = "import_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
+    )
+    format = db.Column(db.String(10), nullable=False)  # 'csv', 'jsonl'
+    source = db.Column(db.String(255))  # file name, for display only
+    status = db.Column(
+        db.String(20), nullable=False, default="running"
+    )  # 'running', 'completed', 'failed', 'cancelled'
+    records_done = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<ImportRun {self.id} {self.status}>"
+
+
+class Job(db.Model):
+    """Background job run by jobs.py, persisted so it survives restarts"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (db.Index("ix_jobs_user_id_created_at", "user_id", "created_at"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # 'export', 'rebuild_rollups', ...
+    params = db.Column(db.Text)  # JSON
+    status = db.Column(
+        db.String(20), nullable=False, default="queued", index=True
+    )  # 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # A running job whose lease has lapsed lost its process and is requeued
+    lease_expires_at = db.Column(db.DateTime)
+    # Earliest time a queued job may start (retry backoff)
+    run_after = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
+
+
+class UserShard(db.Model):
+    """Shard holding a user's data (see shards.py); no row means shard 0"""
+
+    __tablename__ = "user_shards"
+    __table_args__ = (db.Index("ix_user_shards_shard", "shard"),)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    shard = db.Column(db.Integer, nullable=False, default=0)
+    # Set while shard_directory.move_user copies the user's rows
+    moving = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<UserShard {self.user_id} {self.shard}>"
+
+
+class SchemaVersion(db.Model):
+    """Schema version of one database, stamped by migrations.upgrade_schema"""
+
+    __tablename__ = "schema_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    upgraded_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<SchemaVersion {self.version}>"
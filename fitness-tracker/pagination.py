@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Rows are ordered newest first on (date, id). A cursor encodes the
+(date, id) of the last row on a page, and the next page continues strictly
+after it, so every page is a single bounded index range scan no matter how
+far back the client has scrolled (unlike OFFSET, which rescans skipped rows).
+"""
+
+import base64
+from datetime import datetime
+from flask import request, jsonify
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(date, row_id):
+    """Encode a (date, id) position as an opaque URL-safe token"""
+    raw = f"{date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a token produced by encode_cursor
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(date_str), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def is_paginated_request():
+    """
+    True when the client asked for a page (limit and/or cursor given).
+
+    Requests without either keep the original plain-list response so
+    existing clients are unaffected.
+    """
+    return "limit" in request.args or "cursor" in request.args
+
+
+def paginate(query, date_column, id_column):
+    """
+    Fetch one page of query ordered by (date_column, id_column) descending.
+
+    Reads `limit` (default DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE) and
+    `cursor` from the query string.
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        ValueError: on a malformed cursor
+    """
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return fetch_page(query, date_column, id_column, limit, request.args.get("cursor"))
+
+
+def fetch_page(query, date_column, id_column, limit, cursor=None):
+    """
+    paginate() with an explicit limit and cursor instead of request arguments
+
+    Raises:
+        ValueError: on a malformed cursor
+    """
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                date_column < cursor_date,
+                and_(date_column == cursor_date, id_column < cursor_id),
+            )
+        )
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, date_column.key), getattr(last, id_column.key)
+        )
+
+    return rows, next_cursor
+
+
+def paginated_response(query, date_column, id_column, serialize):
+    """
+    Build the JSON response for a paginated list request.
+
+    Returns:
+        {"items": [...], "next_cursor": "..." | null}, or a 400 on a bad cursor
+    """
+    try:
+        rows, next_cursor = paginate(query, date_column, id_column)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return (
+        jsonify({"items": [serialize(r) for r in rows], "next_cursor": next_cursor}),
+        200,
+    )
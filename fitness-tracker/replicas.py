@@ -0,0 +1,149 @@
+"""
+Read-replica routing for db.session.
+
+When DATABASE_REPLICA_URL is set, the replica is added as the "replica" bind
+and RoutingSession sends the queries of GET/HEAD requests to it. Everything
+else stays on the primary:
+
+- requests with any other method, and work outside a request (CLI
+  commands, background jobs);
+- flushes and Core INSERT/UPDATE/DELETE statements, even inside a GET;
+- reads by a user who wrote within the last REPLICA_STICKY_SECONDS, so a
+  client always sees its own writes even if the replica lags behind.
+
+Writes are recorded in after_request for successful non-GET requests by an
+authenticated user. The record is kept in this process only; with several
+app processes behind a load balancer, set REPLICA_STICKY_SECONDS to cover
+the replica's usual lag.
+
+For local testing with two SQLite files, point DATABASE_REPLICA_URL at a
+second file and refresh it with `flask --app app copy-to-replica`.
+
+Config (app.config):
+    DATABASE_REPLICA_URL     replica database URL (default: routing off)
+    REPLICA_STICKY_SECONDS   read-your-writes window after a write (default 5)
+"""
+
+import sqlite3
+import threading
+import time
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+from shards import shard_engine
+from jwt_identity import current_user_id
+
+REPLICA_BIND = "replica"
+READ_METHODS = ("GET", "HEAD")
+
+
+class StickyWrites:
+    """User ids that wrote recently, with the time their window ends"""
+
+    def __init__(self):
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + seconds
+            if len(self._until) > 10000:
+                # Drop expired windows so the map does not grow unbounded
+                self._until = {u: t for u, t in self._until.items() if t > now}
+
+    def is_sticky(self, user_id):
+        with self._lock:
+            until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._until.clear()
+
+
+sticky_writes = StickyWrites()
+
+
+def use_replica():
+    """
+    True if reads in the current request may go to the replica
+
+    Decided on the first query of the request and kept for the rest of it, so
+    one response never mixes primary and replica reads.
+    """
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+
+    if "use_replica" not in g:
+        user_id = current_user_id()
+        g.use_replica = user_id is None or not sticky_writes.is_sticky(user_id)
+    return g.use_replica
+
+
+class RoutingSession(Session):
+    """
+    Session that sends user data to its shard (see shards.py) and read-only
+    queries of GET requests to the replica
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engines = self._db.engines
+        if bind is None:
+            # User data on another shard never has a replica
+            engine = shard_engine(engines, mapper, clause)
+            if engine is not None:
+                return engine
+
+        if bind is None and not self._flushing:
+            if (
+                REPLICA_BIND in engines
+                and not isinstance(clause, UpdateBase)
+                and use_replica()
+            ):
+                return engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_replicas(app):
+    """Record writes for read-your-writes stickiness if a replica is configured"""
+    if not app.config.get("DATABASE_REPLICA_URL"):
+        return
+
+    sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", 5)
+
+    @app.after_request
+    def record_write(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            user_id = current_user_id()
+            if user_id is not None:
+                sticky_writes.record(user_id, sticky_seconds)
+        return response
+
+
+def copy_to_replica(db):
+    """
+    Overwrite a SQLite replica with a consistent copy of the SQLite primary
+
+    Stands in for replication when testing locally.
+
+    Raises:
+        ValueError: if no replica is configured or either side is not SQLite
+    """
+    engines = db.engines
+    if REPLICA_BIND not in engines:
+        raise ValueError("DATABASE_REPLICA_URL is not set")
+
+    primary, replica = engines[None], engines[REPLICA_BIND]
+    if primary.dialect.name != "sqlite" or replica.dialect.name != "sqlite":
+        raise ValueError("copy-to-replica only supports SQLite databases")
+
+    # Connections to the old file would keep reading it
+    replica.dispose()
+    source = sqlite3.connect(primary.url.database)
+    target = sqlite3.connect(replica.url.database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
@@ -0,0 +1,109 @@
+"""
+Structured request logging.
+
+One log record per request is written from after_request with method, path,
+endpoint, status, duration and user id. Records go through a QueueHandler so
+the request thread only enqueues; a QueueListener thread does the actual I/O.
+The user id is read from the JWT that flask_jwt_extended already verified for
+the view, so the token is never decoded a second time.
+
+Config (app.config):
+    REQUEST_LOGGING_ENABLED     turn request logging on/off (default True)
+    REQUEST_LOG_LEVEL           level name for the logger (default "INFO")
+    REQUEST_LOG_SAMPLE_RATE     fraction of successful requests logged (0.0-1.0);
+                                errors (status >= 400) are always logged
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request
+from jwt_identity import current_user_id
+
+logger = logging.getLogger("fitness_tracker.requests")
+
+SKIPPED_ENDPOINTS = {"health", "static"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render the record's `fields` dict as one JSON object per line"""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload)
+
+
+def _start_listener():
+    """Attach a QueueHandler to the logger and start the background writer"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def init_request_logging(app):
+    """Register request logging hooks on the app if enabled"""
+    if not app.config.get("REQUEST_LOGGING_ENABLED", True):
+        return
+
+    logger.setLevel(app.config.get("REQUEST_LOG_LEVEL", "INFO"))
+    sample_rate = float(app.config.get("REQUEST_LOG_SAMPLE_RATE", 1.0))
+    _start_listener()
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        if request.endpoint in SKIPPED_ENDPOINTS or request.method == "OPTIONS":
+            return response
+
+        is_error = response.status_code >= 400
+        if not is_error and random.random() >= sample_rate:
+            return response
+
+        started = g.get("request_started")
+        duration_ms = (time.perf_counter() - started) * 1000 if started else None
+
+        logger.log(
+            logging.WARNING if response.status_code >= 500 else logging.INFO,
+            "%s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            extra={
+                "fields": {
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "duration_ms": (
+                        round(duration_ms, 2) if duration_ms is not None else None
+                    ),
+                    "user_id": current_user_id(),
+                }
+            },
+        )
+        return response
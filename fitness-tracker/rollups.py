@@ -0,0 +1,278 @@
+"""
+Per-user daily rollups (daily_user_stats).
+
+Write handlers call the apply_* helpers inside their own transaction so each
+day's row always matches the raw NutritionLog / Workout rows for that day.
+Analytic reads then scan at most one row per day instead of every log and
+set. rebuild_rollups() recomputes the table from the raw rows, for backfills
+and for repairing drift.
+"""
+
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.exc import IntegrityError
+from models import (
+    db,
+    User,
+    DailyUserStats,
+    NutritionLog,
+    Workout,
+    WorkoutExercise,
+    WorkoutSet,
+)
+from buckets import as_date
+
+STAT_COLUMNS = [
+    "nutrition_logs",
+    "protein",
+    "carbs",
+    "fats",
+    "calories",
+    "workouts",
+    "total_sets",
+    "total_reps",
+    "total_volume",
+]
+
+
+def adjust_day(user_id, day, **deltas):
+    """
+    Add deltas to the user's row for day, creating the row if needed.
+
+    The update is done in SQL (col = col + delta) so concurrent writers
+    to the same day cannot lose each other's changes.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    values = {
+        getattr(DailyUserStats, name): getattr(DailyUserStats, name) + delta
+        for name, delta in deltas.items()
+    }
+    query = DailyUserStats.query.filter_by(user_id=user_id, date=day)
+
+    if query.update(values, synchronize_session=False):
+        return
+
+    row = dict.fromkeys(STAT_COLUMNS, 0)
+    row.update(deltas, user_id=user_id, date=day)
+    try:
+        with db.session.begin_nested():
+            db.session.execute(DailyUserStats.__table__.insert(), [row])
+    except IntegrityError:
+        # Another request created the row first
+        query.update(values, synchronize_session=False)
+
+
+def apply_nutrition(log, sign=1):
+    """Add (sign=1) or remove (sign=-1) a NutritionLog from its day"""
+    adjust_day(
+        log.user_id,
+        log.date.date(),
+        nutrition_logs=sign,
+        protein=sign * log.protein,
+        carbs=sign * log.carbs,
+        fats=sign * log.fats,
+        calories=sign * log.calories,
+    )
+
+
+def adjust_days(user_id, deltas_by_day):
+    """
+    adjust_day() for many days at once: {day: {column: delta}}.
+
+    Uses one SELECT for the days that already have a row, one executemany
+    UPDATE for those and one executemany INSERT for the rest. If another
+    request creates one of the new rows first, falls back to adjust_day().
+    """
+    if not deltas_by_day:
+        return
+
+    table = DailyUserStats.__table__
+    existing = set(
+        db.session.execute(
+            select(table.c.date).where(
+                table.c.user_id == user_id, table.c.date.in_(list(deltas_by_day))
+            )
+        ).scalars()
+    )
+
+    # Every row gets every column, so a single statement fits all days
+    update = (
+        table.update()
+        .where(table.c.user_id == bindparam("b_user_id"))
+        .where(table.c.date == bindparam("b_date"))
+        .values({name: table.c[name] + bindparam(f"d_{name}") for name in STAT_COLUMNS})
+    )
+    updates = [
+        {
+            "b_user_id": user_id,
+            "b_date": day,
+            **{f"d_{name}": deltas.get(name, 0) for name in STAT_COLUMNS},
+        }
+        for day, deltas in deltas_by_day.items()
+        if day in existing
+    ]
+    if updates:
+        db.session.execute(update, updates)
+
+    inserts = [
+        {**dict.fromkeys(STAT_COLUMNS, 0), **deltas, "user_id": user_id, "date": day}
+        for day, deltas in deltas_by_day.items()
+        if day not in existing
+    ]
+    if not inserts:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert(), inserts)
+    except IntegrityError:
+        for row in inserts:
+            adjust_day(user_id, row["date"], **{c: row[c] for c in STAT_COLUMNS})
+
+
+def apply_nutrition_batch(user_id, logs):
+    """Add many nutrition log dicts to their days in a constant number of statements"""
+    macros = ["protein", "carbs", "fats", "calories"]
+    days = {}
+    for log in logs:
+        totals = days.setdefault(
+            log["date"].date(), dict.fromkeys(["nutrition_logs"] + macros, 0)
+        )
+        totals["nutrition_logs"] += 1
+        for name in macros:
+            totals[name] += log[name]
+
+    adjust_days(user_id, days)
+
+
+def apply_workout(user_id, workout_date, sets, sign=1, count_workout=True):
+    """
+    Add (sign=1) or remove (sign=-1) a workout's sets from its day
+
+    Args:
+        sets: iterable of (reps, weight) pairs
+        count_workout: False when only the sets of an existing workout change
+    """
+    sets = list(sets)
+    adjust_day(
+        user_id,
+        workout_date.date(),
+        workouts=sign if count_workout else 0,
+        total_sets=sign * len(sets),
+        total_reps=sign * sum(reps for reps, _ in sets),
+        total_volume=sign * sum(reps * weight for reps, weight in sets),
+    )
+
+
+def apply_workout_batch(user_id, workouts):
+    """Add many (workout_date, sets) pairs to their days, like apply_nutrition_batch"""
+    days = {}
+    for workout_date, sets in workouts:
+        totals = days.setdefault(
+            workout_date.date(),
+            dict.fromkeys(["workouts", "total_sets", "total_reps", "total_volume"], 0),
+        )
+        totals["workouts"] += 1
+        for reps, weight in sets:
+            totals["total_sets"] += 1
+            totals["total_reps"] += reps
+            totals["total_volume"] += reps * weight
+
+    adjust_days(user_id, days)
+
+
+def workout_sets(workout):
+    """(reps, weight) pairs for every set of a loaded Workout"""
+    return [(s.reps, s.weight) for e in workout.exercises for s in e.sets]
+
+
+def rebuild_rollups(user_id=None):
+    """
+    Recompute daily_user_stats from raw rows for one user, or every user.
+
+    Runs one user at a time, so memory is bounded by a single user's
+    number of active days. Commits after each user.
+
+    Returns:
+        number of users rebuilt
+    """
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+
+    for uid in user_ids:
+        _rebuild_user(uid)
+        db.session.commit()
+
+    return len(user_ids)
+
+
+def users_with_activity():
+    """Ids of users with nutrition logs or workouts in the current database"""
+    ids = set(db.session.scalars(select(NutritionLog.user_id).distinct()))
+    ids.update(db.session.scalars(select(Workout.user_id).distinct()))
+    return sorted(ids)
+
+
+def _rebuild_user(user_id):
+    """Replace one user's rollup rows with freshly aggregated ones"""
+    days = {}
+
+    nutrition_day = func.date(NutritionLog.date)
+    nutrition = (
+        db.session.query(
+            nutrition_day,
+            func.count(NutritionLog.id),
+            func.sum(NutritionLog.protein),
+            func.sum(NutritionLog.carbs),
+            func.sum(NutritionLog.fats),
+            func.sum(NutritionLog.calories),
+        )
+        .filter(NutritionLog.user_id == user_id)
+        .group_by(nutrition_day)
+        .all()
+    )
+    for day, count, protein, carbs, fats, calories in nutrition:
+        stats = days.setdefault(as_date(day), dict.fromkeys(STAT_COLUMNS, 0))
+        stats.update(
+            nutrition_logs=count,
+            protein=protein,
+            carbs=carbs,
+            fats=fats,
+            calories=calories,
+        )
+
+    workout_day = func.date(Workout.date)
+    training = (
+        db.session.query(
+            workout_day,
+            func.count(func.distinct(Workout.id)),
+            func.count(WorkoutSet.id),
+            func.coalesce(func.sum(WorkoutSet.reps), 0),
+            func.coalesce(func.sum(WorkoutSet.reps * WorkoutSet.weight), 0),
+        )
+        .select_from(Workout)
+        .outerjoin(WorkoutExercise, WorkoutExercise.workout_id == Workout.id)
+        .outerjoin(WorkoutSet, WorkoutSet.exercise_id == WorkoutExercise.id)
+        .filter(Workout.user_id == user_id)
+        .group_by(workout_day)
+        .all()
+    )
+    for day, workouts, total_sets, total_reps, total_volume in training:
+        stats = days.setdefault(as_date(day), dict.fromkeys(STAT_COLUMNS, 0))
+        stats.update(
+            workouts=workouts,
+            total_sets=total_sets,
+            total_reps=total_reps,
+            total_volume=total_volume,
+        )
+
+    DailyUserStats.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    if days:
+        db.session.execute(
+            DailyUserStats.__table__.insert(),
+            [dict(stats, user_id=user_id, date=day) for day, stats in days.items()],
+        )
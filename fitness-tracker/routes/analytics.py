@@ -0,0 +1,82 @@
+"""
+Analytics routes: strength progression per exercise
+"""
+
+import numpy as np
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+from analytics import DEFAULT_ROLLING_DAYS, exercise_report, load_exercise_sets
+from etags import conditional
+from cache import cached_response
+
+# Create blueprint
+analytics_bp = Blueprint("analytics", __name__)
+
+MAX_ROLLING_DAYS = 365
+
+
+# ===== ROUTES =====
+
+
+@analytics_bp.route("/exercises/<path:name>", methods=["GET"])
+@jwt_required()
+@conditional("workouts")
+@cached_response
+def get_exercise_analytics(name):
+    """
+    Estimated 1RM, volume and personal records for one exercise
+
+    GET /api/analytics/exercises/Bench%20Press?days=365&window=28
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - days: only list sessions from the last N days (default: all);
+      records and totals always cover all history
+    - window: rolling volume window in days (default: 28)
+
+    Returns:
+    {
+        "summary": {"sessions": 40, "total_sets": 160, "total_reps": 1200,
+                    "total_volume": 162000.0, "first_date": ..., "last_date": ...},
+        "personal_records": {
+            "e1rm": {"value": 233.3, "reps": 5, "weight": 200.0,
+                     "date": "2024-01-15T10:30:00", "workout_id": 12},
+            "heaviest": {...},
+            "rep_maxes": [{"reps": 1, "weight": 225.0, "date": ..., "workout_id": 9}, ...]
+        },
+        "rolling_days": 28,
+        "sessions": {
+            "workout_id": [3, 7, 12],
+            "date": ["2024-01-01T10:30:00", "2024-01-08T10:30:00", ...],
+            "sets": [4, 4, 5],
+            "reps": [20, 20, 18],
+            "top_weight": [185.0, 195.0, 200.0],
+            "volume": [3600.0, 3800.0, 4000.0],
+            "best_e1rm": [215.8, 227.5, 233.3],
+            "rolling_volume": [3600.0, 7400.0, 11400.0],
+            "pr": [true, true, true]
+        }
+    }
+    """
+    user_id = int(get_jwt_identity())
+
+    window = request.args.get("window", DEFAULT_ROLLING_DAYS, type=int)
+    if not 1 <= window <= MAX_ROLLING_DAYS:
+        return (
+            jsonify({"error": f"window must be between 1 and {MAX_ROLLING_DAYS}"}),
+            400,
+        )
+
+    since = None
+    days = request.args.get("days", type=int)
+    if days is not None:
+        if days <= 0:
+            return jsonify({"error": "days must be positive"}), 400
+        since = np.datetime64(datetime.utcnow() - timedelta(days=days), "s")
+
+    sets = load_exercise_sets(user_id, name)
+    if sets is None:
+        return jsonify({"error": "No sets logged for this exercise"}), 404
+
+    return jsonify(exercise_report(sets, rolling_days=window, since=since)), 200
@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 from models import db, User
+from shard_directory import assign_shard
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -49,6 +50,7 @@ def register():
     )
     db.session.add(user)
     db.session.commit()
+    assign_shard(user)
 
     # MAKE STRING
     access_token = create_access_token(identity=str(user.id))
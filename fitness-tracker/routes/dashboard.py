@@ -0,0 +1,198 @@
+"""
+Dashboard routes: one compact summary of workouts, nutrition, weight and goals
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, Workout, WorkoutExercise, WeightLog, Goal, DailyUserStats
+from etags import conditional
+from cache import cached_response
+from goal_progress import progress_percent
+
+# Create blueprint
+dashboard_bp = Blueprint("dashboard", __name__)
+
+RECENT_WORKOUTS = 5
+
+
+# ===== HELPER FUNCTIONS =====
+
+
+def _round(value, digits=1):
+    """Round an aggregate that may be NULL (no rows)"""
+    return round(value, digits) if value is not None else None
+
+
+def summarize_workouts(user_id, cutoff_date):
+    """
+    Workout count, set count and volume (reps x weight) plus recent sessions
+
+    Totals come from the daily_user_stats rollup (one row per day) rather
+    than from every set in the window.
+    """
+    count, total_sets, total_volume = (
+        db.session.query(
+            func.sum(DailyUserStats.workouts),
+            func.sum(DailyUserStats.total_sets),
+            func.sum(DailyUserStats.total_volume),
+        )
+        .filter(
+            DailyUserStats.user_id == user_id,
+            DailyUserStats.date >= cutoff_date.date(),
+        )
+        .one()
+    )
+
+    recent = (
+        db.session.query(Workout.id, Workout.date, func.count(WorkoutExercise.id))
+        .outerjoin(WorkoutExercise, WorkoutExercise.workout_id == Workout.id)
+        .filter(Workout.user_id == user_id, Workout.date >= cutoff_date)
+        .group_by(Workout.id, Workout.date)
+        .order_by(Workout.date.desc(), Workout.id.desc())
+        .limit(RECENT_WORKOUTS)
+        .all()
+    )
+
+    return {
+        "count": count or 0,
+        "total_sets": total_sets or 0,
+        "total_volume": _round(total_volume or 0),
+        "recent": [
+            {"id": w_id, "date": date.isoformat(), "exercise_count": exercise_count}
+            for w_id, date, exercise_count in recent
+        ],
+    }
+
+
+def summarize_nutrition(user_id, cutoff_date):
+    """Log count and average macros per log, from the daily rollup"""
+    count, protein, carbs, fats, calories = (
+        db.session.query(
+            func.sum(DailyUserStats.nutrition_logs),
+            func.sum(DailyUserStats.protein),
+            func.sum(DailyUserStats.carbs),
+            func.sum(DailyUserStats.fats),
+            func.sum(DailyUserStats.calories),
+        )
+        .filter(
+            DailyUserStats.user_id == user_id,
+            DailyUserStats.date >= cutoff_date.date(),
+        )
+        .one()
+    )
+
+    def average(total):
+        return _round(total / count) if count else None
+
+    return {
+        "count": count or 0,
+        "avg_protein": average(protein),
+        "avg_carbs": average(carbs),
+        "avg_fats": average(fats),
+        "avg_calories": average(calories),
+    }
+
+
+def summarize_weight(user_id, cutoff_date):
+    """Oldest-first (date, weight) series for charting"""
+    rows = (
+        db.session.query(WeightLog.date, WeightLog.weight)
+        .filter(WeightLog.user_id == user_id, WeightLog.date >= cutoff_date)
+        .order_by(WeightLog.date, WeightLog.id)
+        .all()
+    )
+
+    return {
+        "count": len(rows),
+        "latest": rows[-1].weight if rows else None,
+        "series": [
+            {"date": date.isoformat(), "weight": weight} for date, weight in rows
+        ],
+    }
+
+
+def summarize_goals(user_id):
+    """Active/completed counts and per-goal progress"""
+    goals = (
+        db.session.query(
+            Goal.id,
+            Goal.goal_type,
+            Goal.target_value,
+            Goal.current_value,
+            Goal.start_value,
+            Goal.period,
+            Goal.completed,
+        )
+        .filter(Goal.user_id == user_id)
+        .order_by(Goal.id)
+        .all()
+    )
+
+    return {
+        "active": sum(1 for g in goals if not g.completed),
+        "completed": sum(1 for g in goals if g.completed),
+        "items": [
+            {
+                "id": g.id,
+                "goal_type": g.goal_type,
+                "target_value": g.target_value,
+                "current_value": g.current_value,
+                "period": g.period,
+                "completed": g.completed,
+                "progress": _round(progress_percent(g)),
+            }
+            for g in goals
+        ],
+    }
+
+
+# ===== ROUTES =====
+
+
+@dashboard_bp.route("", methods=["GET"])
+@jwt_required()
+@conditional("workouts", "nutrition", "weight", "goals")
+@cached_response
+def get_dashboard():
+    """
+    Get a dashboard summary computed with SQL aggregates
+
+    GET /api/dashboard?workout_days=30&nutrition_days=30&weight_days=90
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - workout_days: workout window in days (default: 30)
+    - nutrition_days: nutrition window in days (default: 30)
+    - weight_days: weight chart window in days (default: 90)
+
+    Returns:
+    {
+        "workouts": {"count":, "total_sets":, "total_volume":, "recent": [...]},
+        "nutrition": {"count":, "avg_protein":, "avg_carbs":, "avg_fats":, "avg_calories":},
+        "weight": {"count":, "latest":, "series": [{"date":, "weight":}, ...]},
+        "goals": {"active":, "completed":, "items": [...]}
+    }
+    """
+    user_id = int(get_jwt_identity())
+    now = datetime.utcnow()
+    workout_days = request.args.get("workout_days", 30, type=int)
+    nutrition_days = request.args.get("nutrition_days", 30, type=int)
+    weight_days = request.args.get("weight_days", 90, type=int)
+
+    return (
+        jsonify(
+            {
+                "workouts": summarize_workouts(
+                    user_id, now - timedelta(days=workout_days)
+                ),
+                "nutrition": summarize_nutrition(
+                    user_id, now - timedelta(days=nutrition_days)
+                ),
+                "weight": summarize_weight(user_id, now - timedelta(days=weight_days)),
+                "goals": summarize_goals(user_id),
+            }
+        ),
+        200,
+    )
@@ -0,0 +1,55 @@
+"""
+Exercise routes: name suggestions while typing
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from suggest import DEFAULT_LIMIT, MAX_LIMIT, suggest
+
+# Create blueprint
+exercises_bp = Blueprint("exercises", __name__)
+
+
+# ===== ROUTES =====
+
+
+# Not @conditional / @cached_response: their version lookups would cost a
+# query, and the in-memory index already answers faster than either
+@exercises_bp.route("/suggest", methods=["GET"])
+@jwt_required()
+def suggest_exercises():
+    """
+    Exercise names starting with the typed text, most used first
+
+    GET /api/exercises/suggest?q=ben&limit=10
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - q: typed text; matches the start of any word of a name, ignoring case
+      (default: empty, i.e. the most used names)
+    - limit: number of suggestions (default: 10, max: 50)
+
+    Names the user has logged or planned come first ("history"), then names
+    from the common exercise list they have not used yet ("catalog").
+
+    Returns:
+    {
+        "query": "ben",
+        "suggestions": [
+            {"name": "Bench Press", "uses": 42, "source": "history"},
+            {"name": "Incline Bench Press", "uses": 0, "source": "catalog"},
+            ...
+        ]
+    }
+    """
+    user_id = int(get_jwt_identity())
+    query = request.args.get("q", "")
+
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    if not 1 <= limit <= MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {MAX_LIMIT}"}), 400
+
+    return (
+        jsonify({"query": query, "suggestions": suggest(user_id, query, limit)}),
+        200,
+    )
@@ -0,0 +1,45 @@
+"""
+Export routes: download a user's full history as JSON Lines or CSV
+"""
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from exporter import EXPORT_FORMATS, export_lines
+
+# Create blueprint
+exports_bp = Blueprint("exports", __name__)
+
+MIMETYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+# ===== ROUTES =====
+
+
+@exports_bp.route("", methods=["GET"])
+@jwt_required()
+def export_history():
+    """
+    Stream every workout, nutrition log, weight log, goal and template
+
+    GET /api/export?format=jsonl
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - format: jsonl (default) or csv
+
+    The file uses the import layout (see importer.py) and can be uploaded to
+    POST /api/import.
+    """
+    user_id = int(get_jwt_identity())
+    fmt = request.args.get("format", "jsonl")
+    if fmt not in EXPORT_FORMATS:
+        return (
+            jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}),
+            400,
+        )
+
+    return Response(
+        stream_with_context(export_lines(user_id, fmt)),
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename=fitness-export.{fmt}"},
+    )
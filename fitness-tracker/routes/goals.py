@@ -4,7 +4,18 @@ Goals routes: create, read, update, delete fitness goals
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
 from models import db, Goal
+from etags import conditional
+from cache import cached_response
+from tombstones import record_deletion
+from pagination import is_paginated_request, paginated_response
+from goal_progress import (
+    is_complete,
+    progress_percent,
+    set_goal_period,
+    recompute_goal,
+)
 
 # Create blueprint
 goals_bp = Blueprint("goals", __name__)
@@ -20,9 +31,13 @@ def serialize_goal(goal):
         "goal_type": goal.goal_type,
         "target_value": goal.target_value,
         "current_value": goal.current_value,
+        "progress_percent": round(progress_percent(goal), 1),
         "period": goal.period,
         "completed": goal.completed,
+        "marked_complete": bool(goal.marked_complete),
         "created_at": goal.created_at.isoformat(),
+        "period_start": goal.period_start.isoformat() if goal.period_start else None,
+        "period_end": goal.period_end.isoformat() if goal.period_end else None,
     }
 
 
@@ -49,6 +64,7 @@ def create_goal():
         "goal_type":
         "target_value":
         "current_value":
+        "progress_percent":
         "period":
         "completed":
         "created_at":
@@ -91,7 +107,11 @@ def create_goal():
         goal_type=data["goal_type"],
         target_value=target_value,
         period=data["period"],
+        created_at=datetime.utcnow(),
     )
+    set_goal_period(goal)
+    # Progress is server-maintained from here on; seed it from existing logs
+    recompute_goal(goal)
     db.session.add(goal)
     db.session.commit()
 
@@ -100,6 +120,8 @@ def create_goal():
 
 @goals_bp.route("", methods=["GET"])
 @jwt_required()
+@conditional("goals")
+@cached_response
 def get_goals():
     """
     Get all fitness goals for current user
@@ -109,6 +131,9 @@ def get_goals():
 
     Query Parameters:
     - completed: filter by completion status (true/false)
+    - limit: page size; when limit or cursor is given the response is
+      {"items": [...], "next_cursor": ...} instead of a plain list
+    - cursor: next_cursor from the previous page
 
     Returns:
     [
@@ -117,6 +142,7 @@ def get_goals():
             "goal_type":
             "target_value":
             "current_value":
+            "progress_percent":
             "period":
             "completed":
             "created_at":
@@ -132,12 +158,17 @@ def get_goals():
         completed = completed.lower() == "true"
         query = query.filter_by(completed=completed)
 
+    if is_paginated_request():
+        return paginated_response(query, Goal.created_at, Goal.id, serialize_goal)
+
     goals = query.all()
     return jsonify([serialize_goal(g) for g in goals]), 200
 
 
 @goals_bp.route("/<int:goal_id>", methods=["GET"])
 @jwt_required()
+@conditional("goals", item_arg="goal_id")
+@cached_response
 def get_goal(goal_id):
     """
     Get specific goal by ID
@@ -151,6 +182,7 @@ def get_goal(goal_id):
         "goal_type":
         "target_value":
         "current_value":
+        "progress_percent":
         "period":
         "completed":
         "created_at":
@@ -169,12 +201,17 @@ def get_goal(goal_id):
 @jwt_required()
 def update_goal(goal_id):
     """
-    Update a goal (update progress or mark as complete)
+    Update a goal (mark as complete or reopen)
+
+    current_value is maintained by the server as weight, nutrition and
+    workout logs are written, so it is not accepted here. A goal marked
+    complete stays completed whatever later logs do to its progress;
+    "completed": false removes the mark, and the goal is then completed
+    only if its progress has reached the target.
 
     PUT /api/goals/1
     Headers: Authorization: Bearer <token>
     {
-        "current_value":
         "completed":
     }
 
@@ -184,6 +221,7 @@ def update_goal(goal_id):
         "goal_type":
         "target_value":
         "current_value":
+        "progress_percent":
         "period":
         "completed":
         "created_at":
@@ -195,15 +233,12 @@ def update_goal(goal_id):
     if not goal:
         return jsonify({"error": "Goal not found"}), 404
 
-    data = request.get_json()
+    data = request.get_json() or {}
 
     try:
-
-        if "current_value" in data:
-            goal.current_value = float(data["current_value"])
-
         if "completed" in data:
-            goal.completed = bool(data["completed"])
+            goal.marked_complete = bool(data["completed"])
+            goal.completed = is_complete(goal, goal.current_value)
 
         db.session.commit()
         return jsonify(serialize_goal(goal)), 200
@@ -233,6 +268,7 @@ def delete_goal(goal_id):
     if not goal:
         return jsonify({"error": "Goal not found"}), 404
 
+    record_deletion(user_id, "goals", goal.id)
     db.session.delete(goal)
     db.session.commit()
     return jsonify({"message": "Goal deleted successfully"}), 204
@@ -0,0 +1,114 @@
+"""
+Import routes: upload a CSV / JSON Lines history file from another tracker
+"""
+
+import os
+import shutil
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, ImportRun
+from jobs import enqueue, job_files_dir, serialize_job
+from importer import (
+    FORMATS,
+    detect_format,
+    run_import,
+    serialize_import_run,
+    start_import,
+    text_stream,
+)
+
+# Create blueprint
+imports_bp = Blueprint("imports", __name__)
+
+
+# ===== ROUTES =====
+
+
+@imports_bp.route("", methods=["POST"])
+@jwt_required()
+def import_history():
+    """
+    Import a history file, streamed in chunked transactions
+
+    POST /api/import?format=csv
+    Headers: Authorization: Bearer <token>
+    Body: multipart/form-data with a "file" field, or the raw file
+
+    Query Parameters:
+    - format: csv or jsonl (default: from the uploaded file name)
+    - resume: id of a failed or cancelled import to continue; upload the same
+      file again
+    - background: 1 to save the upload and import it in a background job;
+      returns 202 with {"import": ..., "job": ...}
+
+    See importer.py for the record layout.
+
+    Returns (201 when completed, 400 when a record is invalid):
+    {
+        "id": 1,
+        "format": "csv",
+        "status": "completed",
+        "records_done": 1200,
+        "error": null,
+        ...
+    }
+    """
+    user_id = int(get_jwt_identity())
+
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    source = upload.filename if upload else None
+
+    run = None
+    resume_id = request.args.get("resume", type=int)
+    if resume_id is not None:
+        run = ImportRun.query.filter_by(id=resume_id, user_id=user_id).first()
+        if not run:
+            return jsonify({"error": "Import not found"}), 404
+        if run.status == "completed":
+            return jsonify({"error": "Import already completed"}), 400
+
+    fmt = request.args.get("format") or (run.format if run else detect_format(source))
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(FORMATS)}"}), 400
+
+    if run is None:
+        run = start_import(user_id, fmt, source)
+    else:
+        run.format = fmt
+
+    db.session.commit()
+
+    if request.args.get("background") == "1":
+        # Keep the upload on disk so the job (and any retry) can read it
+        filename = f"import-{run.id}.{fmt}"
+        with open(os.path.join(job_files_dir(current_app), filename), "wb") as f:
+            shutil.copyfileobj(stream, f)
+        job = enqueue(user_id, "import", {"import_id": run.id, "file": filename})
+        return (
+            jsonify({"import": serialize_import_run(run), "job": serialize_job(job)}),
+            202,
+        )
+
+    run_import(run, text_stream(stream))
+
+    status = 201 if run.status == "completed" else 400
+    return jsonify(serialize_import_run(run)), status
+
+
+@imports_bp.route("/<int:import_id>", methods=["GET"])
+@jwt_required()
+def get_import(import_id):
+    """
+    Get the progress of an import
+
+    GET /api/import/1
+    Headers: Authorization: Bearer <token>
+    """
+    user_id = int(get_jwt_identity())
+    run = ImportRun.query.filter_by(id=import_id, user_id=user_id).first()
+
+    if not run:
+        return jsonify({"error": "Import not found"}), 404
+
+    return jsonify(serialize_import_run(run)), 200
@@ -0,0 +1,168 @@
+"""
+Job routes: start, poll, cancel and retry background jobs
+"""
+
+import os
+from flask import Blueprint, request, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Job
+from jobs import (
+    STATUSES,
+    cancel_job,
+    enqueue,
+    job_files_dir,
+    retry_job,
+    serialize_job,
+)
+
+# Create blueprint
+jobs_bp = Blueprint("jobs", __name__)
+
+# Kinds clients may start directly; imports start from POST /api/import
+CLIENT_JOB_KINDS = ("export", "rebuild_rollups", "recompute_goals")
+RECENT_JOBS = 50
+
+
+# ===== HELPER FUNCTIONS =====
+
+
+def get_user_job(job_id, user_id):
+    """Load one of the user's jobs, or None"""
+    return Job.query.filter_by(id=job_id, user_id=user_id).first()
+
+
+# ===== ROUTES =====
+
+
+@jobs_bp.route("", methods=["POST"])
+@jwt_required()
+def create_job():
+    """
+    Start a background job
+
+    POST /api/jobs
+    Headers: Authorization: Bearer <token>
+    {
+        "kind": "export",  # or rebuild_rollups, recompute_goals
+        "params": {"format": "csv"}  # optional
+    }
+
+    Returns 202 with the job; poll GET /api/jobs/<id> for its status.
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+
+    kind = data.get("kind")
+    if kind not in CLIENT_JOB_KINDS:
+        return (
+            jsonify({"error": f"kind must be one of: {', '.join(CLIENT_JOB_KINDS)}"}),
+            400,
+        )
+
+    params = data.get("params") or {}
+    if not isinstance(params, dict):
+        return jsonify({"error": "params must be an object"}), 400
+
+    job = enqueue(user_id, kind, params)
+    return jsonify(serialize_job(job)), 202
+
+
+@jobs_bp.route("", methods=["GET"])
+@jwt_required()
+def get_jobs():
+    """
+    Get the user's most recent jobs, newest first
+
+    GET /api/jobs?status=running
+    Headers: Authorization: Bearer <token>
+    """
+    user_id = int(get_jwt_identity())
+    query = Job.query.filter_by(user_id=user_id)
+
+    status = request.args.get("status")
+    if status:
+        if status not in STATUSES:
+            return (
+                jsonify({"error": f"status must be one of: {', '.join(STATUSES)}"}),
+                400,
+            )
+        query = query.filter_by(status=status)
+
+    jobs = query.order_by(Job.created_at.desc(), Job.id.desc()).limit(RECENT_JOBS)
+    return jsonify([serialize_job(j) for j in jobs]), 200
+
+
+@jobs_bp.route("/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    """
+    Get a job's status, result and error
+
+    GET /api/jobs/1
+    Headers: Authorization: Bearer <token>
+    """
+    job = get_user_job(job_id, int(get_jwt_identity()))
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(serialize_job(job)), 200
+
+
+@jobs_bp.route("/<int:job_id>/cancel", methods=["POST"])
+@jwt_required()
+def cancel_user_job(job_id):
+    """
+    Cancel a queued job, or ask a running one to stop
+
+    POST /api/jobs/1/cancel
+    Headers: Authorization: Bearer <token>
+    """
+    job = get_user_job(job_id, int(get_jwt_identity()))
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(serialize_job(cancel_job(job))), 200
+
+
+@jobs_bp.route("/<int:job_id>/retry", methods=["POST"])
+@jwt_required()
+def retry_user_job(job_id):
+    """
+    Queue a failed or cancelled job again
+
+    POST /api/jobs/1/retry
+    Headers: Authorization: Bearer <token>
+    """
+    job = get_user_job(job_id, int(get_jwt_identity()))
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    try:
+        job = retry_job(job)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+
+    return jsonify(serialize_job(job)), 202
+
+
+@jobs_bp.route("/<int:job_id>/download", methods=["GET"])
+@jwt_required()
+def download_job_file(job_id):
+    """
+    Download the file written by a finished export job
+
+    GET /api/jobs/1/download
+    Headers: Authorization: Bearer <token>
+    """
+    job = get_user_job(job_id, int(get_jwt_identity()))
+    if not job or job.kind != "export":
+        return jsonify({"error": "Job not found"}), 404
+    if job.status != "succeeded":
+        return jsonify({"error": "Export is not finished"}), 409
+
+    result = serialize_job(job)["result"]
+    path = os.path.join(job_files_dir(current_app), result["file"])
+    if not os.path.exists(path):
+        return jsonify({"error": "Export file no longer available"}), 410
+
+    return send_file(path, as_attachment=True, download_name=result["file"])
@@ -5,11 +5,24 @@ Nutrition routes: log and track macros (protein, carbs, fats, calories)
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
 from models import db, NutritionLog
+from dates import parse_datetime
+from batch import validate_batch
+from etags import conditional
+from cache import cached_response
+from tombstones import record_deletion
+from pagination import is_paginated_request, paginated_response
+from rollups import apply_nutrition, apply_nutrition_batch
+from goal_progress import on_nutrition, on_nutrition_batch
+from buckets import BUCKETS, as_date, date_bucket
 
 # Create blueprint
 nutrition_bp = Blueprint("nutrition", __name__)
 
+MACROS = ["protein", "carbs", "fats", "calories"]
+DEFAULT_AGGREGATE_DAYS = 365
+
 
 # ===== HELPER FUNCTIONS =====
 
@@ -26,6 +39,84 @@ def serialize_nutrition_log(log):
     }
 
 
+def parse_nutrition(data):
+    """
+    Validate one nutrition log payload
+
+    Returns:
+        (fields, error): NutritionLog column values, or an error message
+    """
+    required_fields = ["protein", "carbs", "fats", "calories"]
+    if not all(field in data for field in required_fields):
+        return None, f"Missing required fields: {', '.join(required_fields)}"
+
+    try:
+        fields = {field: float(data[field]) for field in required_fields}
+    except (ValueError, TypeError):
+        return None, "All fields must be numeric"
+
+    if any(v < 0 for v in fields.values()):
+        return None, "Values must be non-negative"
+
+    try:
+        fields["date"] = (
+            parse_datetime(data["date"]) if data.get("date") else datetime.utcnow()
+        )
+    except (ValueError, TypeError):
+        return None, "Invalid date format"
+
+    return fields, None
+
+
+def parse_day(value, default):
+    """ISO date (or datetime) query parameter as a date; ValueError if invalid"""
+    if not value:
+        return default
+    return datetime.fromisoformat(value).date()
+
+
+def aggregate_nutrition(user_id, bucket, start, end):
+    """
+    Macro totals and per-day averages per bucket, grouped in SQL
+
+    Only days with at least one log count towards the averages. The range
+    filter is on the raw date column so the (user_id, date) index is used.
+
+    Returns:
+        list of dicts, oldest bucket first
+    """
+    period = date_bucket(bucket, NutritionLog.date)
+    days = func.count(func.distinct(func.date(NutritionLog.date)))
+    sums = [func.sum(getattr(NutritionLog, m)) for m in MACROS]
+
+    rows = db.session.execute(
+        select(
+            period, func.count(NutritionLog.id), days, *sums, *(s / days for s in sums)
+        )
+        .where(
+            NutritionLog.user_id == user_id,
+            NutritionLog.date >= datetime.combine(start, datetime.min.time()),
+            NutritionLog.date
+            < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        )
+        .group_by(period)
+        .order_by(period)
+    )
+
+    result = []
+    for start_day, logs, logged_days, *values in rows:
+        result.append(
+            {
+                "start": as_date(start_day).isoformat(),
+                "logs": logs,
+                "days": logged_days,
+                "totals": dict(zip(MACROS, values[: len(MACROS)])),
+                "daily_average": dict(zip(MACROS, values[len(MACROS) :])),
+            }
+        )
+    return result
+
+
 # ===== ROUTES =====
 
 
@@ -57,50 +148,68 @@ def log_nutrition():
     user_id = int(get_jwt_identity())
     data = request.get_json()
 
-    # Validation
-    required_fields = ["protein", "carbs", "fats", "calories"]
-    if not all(field in data for field in required_fields):
-        return (
-            jsonify(
-                {"error": f"Missing required fields: {', '.join(required_fields)}"}
-            ),
-            400,
-        )
-
-    # Validate numeric values
-    try:
-        protein = float(data["protein"])
-        carbs = float(data["carbs"])
-        fats = float(data["fats"])
-        calories = float(data["calories"])
-
-        if any(v < 0 for v in [protein, carbs, fats, calories]):
-            return jsonify({"error": "Values must be non-negative"}), 400
+    fields, error = parse_nutrition(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    except (ValueError, TypeError):
-        return jsonify({"error": "All fields must be numeric"}), 400
-
-    # Create nutrition log
-    nutrition_log = NutritionLog(
-        user_id=user_id,
-        protein=protein,
-        carbs=carbs,
-        fats=fats,
-        calories=calories,
-        date=(
-            datetime.fromisoformat(data["date"])
-            if data.get("date")
-            else datetime.utcnow()
-        ),
-    )
+    nutrition_log = NutritionLog(user_id=user_id, **fields)
     db.session.add(nutrition_log)
+    apply_nutrition(nutrition_log)
+    on_nutrition(nutrition_log)
     db.session.commit()
 
     return jsonify(serialize_nutrition_log(nutrition_log)), 201
 
 
+@nutrition_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def log_nutrition_batch():
+    """
+    Log many nutrition entries in one request (e.g. importing history)
+
+    POST /api/nutrition/batch
+    Headers: Authorization: Bearer <token>
+    {
+        "items": [
+            {"protein": 150, "carbs": 200, "fats": 70, "calories": 2100,
+             "date": "2024-01-15T10:30:00"},
+            ...
+        ]
+    }
+
+    Every item is validated before anything is written; if any is invalid
+    nothing is inserted and the response lists each failure:
+    {
+        "error": "Validation failed",
+        "errors": [{"index": 3, "error": "All fields must be numeric"}]
+    }
+
+    Returns:
+    {
+        "created": 2
+    }
+    """
+    user_id = int(get_jwt_identity())
+    rows, error_response = validate_batch(request.get_json(), parse_nutrition)
+    if error_response:
+        return error_response
+
+    for row in rows:
+        row["user_id"] = user_id
+
+    # One executemany for the rows, one rollup/goal update per distinct day
+    db.session.execute(insert(NutritionLog), rows)
+    apply_nutrition_batch(user_id, rows)
+    on_nutrition_batch(user_id, rows)
+    db.session.commit()
+
+    return jsonify({"created": len(rows)}), 201
+
+
 @nutrition_bp.route("", methods=["GET"])
 @jwt_required()
+@conditional("nutrition")
+@cached_response
 def get_nutrition():
     """
     Get nutrition logs for current user
@@ -110,6 +219,9 @@ def get_nutrition():
 
     Query Parameters:
     - days: number of days to look back (default: 30)
+    - limit: page size; when limit or cursor is given the response is
+      {"items": [...], "next_cursor": ...} instead of a plain list
+    - cursor: next_cursor from the previous page
 
     Returns:
     [
@@ -128,18 +240,86 @@ def get_nutrition():
     days = request.args.get("days", 30, type=int)
     cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-    logs = (
-        NutritionLog.query.filter_by(user_id=user_id)
-        .filter(NutritionLog.date >= cutoff_date)
-        .order_by(NutritionLog.date.desc())
-        .all()
+    query = NutritionLog.query.filter_by(user_id=user_id).filter(
+        NutritionLog.date >= cutoff_date
     )
 
+    if is_paginated_request():
+        return paginated_response(
+            query, NutritionLog.date, NutritionLog.id, serialize_nutrition_log
+        )
+
+    logs = query.order_by(NutritionLog.date.desc()).all()
+
     return jsonify([serialize_nutrition_log(l) for l in logs]), 200
 
 
+@nutrition_bp.route("/aggregate", methods=["GET"])
+@jwt_required()
+@conditional("nutrition")
+@cached_response
+def get_nutrition_aggregate():
+    """
+    Macro totals and daily averages per day, week or month
+
+    GET /api/nutrition/aggregate?bucket=week&from=2024-01-01&to=2024-12-31
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - bucket: day, week (starting Monday) or month (default: day)
+    - from: first day, inclusive (default: 365 days before `to`)
+    - to: last day, inclusive (default: today)
+
+    Returns:
+    {
+        "bucket": "week",
+        "from": "2024-01-01",
+        "to": "2024-12-31",
+        "buckets": [
+            {
+                "start": "2024-01-01",
+                "logs": 12,
+                "days": 6,
+                "totals": {"protein": 900, "carbs": 1200, "fats": 420, "calories": 12600},
+                "daily_average": {"protein": 150, "carbs": 200, "fats": 70, "calories": 2100}
+            },
+            ...
+        ]
+    }
+    """
+    user_id = int(get_jwt_identity())
+
+    bucket = request.args.get("bucket", "day")
+    if bucket not in BUCKETS:
+        return jsonify({"error": f"bucket must be one of: {', '.join(BUCKETS)}"}), 400
+
+    try:
+        end = parse_day(request.args.get("to"), datetime.utcnow().date())
+        start = parse_day(
+            request.args.get("from"), end - timedelta(days=DEFAULT_AGGREGATE_DAYS)
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+    if start > end:
+        return jsonify({"error": "from must not be after to"}), 400
+
+    return (
+        jsonify(
+            {
+                "bucket": bucket,
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "buckets": aggregate_nutrition(user_id, bucket, start, end),
+            }
+        ),
+        200,
+    )
+
+
 @nutrition_bp.route("/<int:log_id>", methods=["GET"])
 @jwt_required()
+@conditional("nutrition", item_arg="log_id")
+@cached_response
 def get_nutrition_log(log_id):
     """
     Get specific nutrition log by ID
@@ -200,6 +380,10 @@ def update_nutrition_log(log_id):
     data = request.get_json()
 
     try:
+        # Swap the old values out of the day's rollup for the new ones
+        apply_nutrition(log, sign=-1)
+        on_nutrition(log, sign=-1)
+
         # Update fields if provided
         if "protein" in data:
             log.protein = float(data["protein"])
@@ -210,6 +394,8 @@ def update_nutrition_log(log_id):
         if "calories" in data:
             log.calories = float(data["calories"])
 
+        apply_nutrition(log)
+        on_nutrition(log)
         db.session.commit()
         return jsonify(serialize_nutrition_log(log)), 200
 
@@ -238,6 +424,9 @@ def delete_nutrition_log(log_id):
     if not log:
         return jsonify({"error": "Nutrition log not found"}), 404
 
+    apply_nutrition(log, sign=-1)
+    on_nutrition(log, sign=-1)
+    record_deletion(user_id, "nutrition", log.id)
     db.session.delete(log)
     db.session.commit()
     return jsonify({"message": "Nutrition log deleted successfully"}), 204
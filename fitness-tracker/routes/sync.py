@@ -0,0 +1,273 @@
+"""
+Sync routes: incremental changes since a client-held token
+Clients keep the returned token and pass it back to receive only rows created,
+updated or deleted since their last sync, instead of re-fetching whole windows.
+
+A full sync (no token) is paged: each response carries at most `limit` rows
+and a `next_cursor` to continue from, and only the last page carries the
+`next_token` for later incremental syncs.
+"""
+
+import base64
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import (
+    DeletedRecord,
+    Workout,
+    NutritionLog,
+    WeightLog,
+    Goal,
+    WorkoutTemplate,
+)
+from routes.workouts import workout_query, serialize_workout
+from routes.nutrition import serialize_nutrition_log
+from routes.weight import serialize_weight_log
+from routes.goals import serialize_goal
+from routes.templates import serialize_template
+from pagination import MAX_PAGE_SIZE, fetch_page
+
+# Create blueprint
+sync_bp = Blueprint("sync", __name__)
+
+# A row's updated_at is stamped before its transaction commits, so a row can
+# become visible slightly after a sync that started later than its timestamp.
+# Tokens trail the sync start by this much; rows in the overlap are sent
+# again on the next sync and clients upsert them by id.
+TOKEN_LAG = timedelta(seconds=5)
+
+
+# ===== HELPER FUNCTIONS =====
+
+
+def resource_queries():
+    """resource name -> (base query, model, serializer)"""
+    return {
+        "workouts": (workout_query(), Workout, serialize_workout),
+        "nutrition": (NutritionLog.query, NutritionLog, serialize_nutrition_log),
+        "weight": (WeightLog.query, WeightLog, serialize_weight_log),
+        "goals": (Goal.query, Goal, serialize_goal),
+        "templates": (WorkoutTemplate.query, WorkoutTemplate, serialize_template),
+    }
+
+
+def encode_token(moment):
+    """Encode a sync position as an opaque URL-safe token"""
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """
+    Decode a token produced by encode_token
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return datetime.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, TypeError):
+        raise ValueError("Invalid sync token")
+
+
+def encode_sync_cursor(started, resource, cursor):
+    """
+    Encode a full sync's position as an opaque URL-safe token
+
+    started is when the full sync began (its next_token is derived from it),
+    resource and cursor where the next page starts.
+    """
+    raw = f"{started.isoformat()}|{resource}|{cursor or ''}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_cursor(token):
+    """
+    Decode a token produced by encode_sync_cursor
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        started, resource, cursor = base64.urlsafe_b64decode(padded).decode().split("|")
+        started = datetime.fromisoformat(started)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid sync cursor")
+    if resource not in resource_queries():
+        raise ValueError("Invalid sync cursor")
+    return started, resource, cursor or None
+
+
+def empty_changes():
+    return {
+        resource: {"created": [], "updated": [], "deleted": []}
+        for resource in resource_queries()
+    }
+
+
+def collect_full_page(user_id, resource, cursor, limit):
+    """
+    One page of a full sync: up to limit rows, all reported as created
+
+    Starts at resource/cursor and moves on through the following resources
+    until the page is full. Each resource is read newest first on
+    (updated_at, id); rows changed while the client is paging move ahead of
+    the cursor and are sent by the next incremental sync instead.
+
+    Returns:
+        (changes, next position) where the position is a (resource, cursor)
+        pair, or None after the last page
+
+    Raises:
+        ValueError: on a malformed cursor
+    """
+    queries = resource_queries()
+    names = list(queries)
+    changes = empty_changes()
+
+    for i in range(names.index(resource), len(names)):
+        query, model, serialize = queries[names[i]]
+        rows, next_cursor = fetch_page(
+            query.filter(model.user_id == user_id),
+            model.updated_at,
+            model.id,
+            limit,
+            cursor,
+        )
+        changes[names[i]]["created"] = [serialize(row) for row in rows]
+        if next_cursor:
+            return changes, (names[i], next_cursor)
+
+        limit -= len(rows)
+        cursor = None
+        if limit == 0:
+            if i + 1 < len(names):
+                return changes, (names[i + 1], None)
+            break
+
+    return changes, None
+
+
+def collect_changes(user_id, since):
+    """
+    Rows changed since `since`, grouped per resource
+
+    Returns:
+        {resource: {"created": [...], "updated": [...], "deleted": [ids]}}
+    """
+    changes = {}
+    for resource, (query, model, serialize) in resource_queries().items():
+        query = query.filter(model.user_id == user_id, model.updated_at > since)
+
+        created, updated = [], []
+        for row in query.order_by(model.updated_at, model.id):
+            is_new = row.created_at is None or row.created_at > since
+            (created if is_new else updated).append(serialize(row))
+
+        changes[resource] = {"created": created, "updated": updated, "deleted": []}
+
+    tombstones = DeletedRecord.query.filter(
+        DeletedRecord.user_id == user_id, DeletedRecord.deleted_at > since
+    ).order_by(DeletedRecord.deleted_at)
+    for tombstone in tombstones:
+        if tombstone.resource in changes:
+            changes[tombstone.resource]["deleted"].append(tombstone.record_id)
+
+    return changes
+
+
+# ===== ROUTES =====
+
+
+@sync_bp.route("", methods=["GET"])
+@jwt_required()
+def sync():
+    """
+    Get changes since a sync token
+
+    GET /api/sync?since=<token>
+    GET /api/sync?cursor=<next_cursor>&limit=500
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - since: next_token from the previous sync
+    - cursor: next_cursor from the previous page of a full sync
+    - limit: rows per page of a full sync (default and max: 500)
+
+    Without `since`, every row is returned as created (initial sync), one
+    page at a time: follow next_cursor until it is null. Only the last page
+    carries next_token, which covers everything changed since the first
+    page was read.
+
+    Returns:
+    {
+        "changes": {
+            "workouts": {"created": [...], "updated": [...], "deleted": [3]},
+            "nutrition": {...},
+            "weight": {...},
+            "goals": {...},
+            "templates": {...}
+        },
+        "next_token": "MjAyNi0xMC0xNlQxMjowMDowMA",
+        "next_cursor": null,
+        "full": false
+    }
+
+    Returns 410 when the token is older than the tombstone retention window;
+    the client should discard its data and sync without `since`.
+    """
+    user_id = int(get_jwt_identity())
+    started = datetime.utcnow()
+
+    token = request.args.get("since")
+    cursor = request.args.get("cursor")
+    if token and cursor:
+        return jsonify({"error": "Pass either since or cursor, not both"}), 400
+
+    if token:
+        try:
+            since = decode_token(token)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        retention = current_app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 90)
+        if since < started - timedelta(days=retention):
+            return jsonify({"error": "Sync token expired, full sync required"}), 410
+
+        return (
+            jsonify(
+                {
+                    "changes": collect_changes(user_id, since),
+                    "next_token": encode_token(started - TOKEN_LAG),
+                    "next_cursor": None,
+                    "full": False,
+                }
+            ),
+            200,
+        )
+
+    limit = request.args.get("limit", MAX_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        if cursor:
+            started, resource, row_cursor = decode_sync_cursor(cursor)
+        else:
+            resource, row_cursor = next(iter(resource_queries())), None
+        changes, position = collect_full_page(user_id, resource, row_cursor, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "changes": changes,
+                "next_token": None if position else encode_token(started - TOKEN_LAG),
+                "next_cursor": (
+                    encode_sync_cursor(started, *position) if position else None
+                ),
+                "full": True,
+            }
+        ),
+        200,
+    )
@@ -5,7 +5,14 @@ Templates allow users to save and reuse workout plans (e.g., Push Day, Pull Day,
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
 from models import db, WorkoutTemplate, TemplateExercise
+from etags import conditional
+from cache import cached_response
+from tombstones import record_deletion
+from pagination import is_paginated_request, paginated_response
+from exercises import canonical_name, exercise_key, resolve_exercises
+from suggest import record_usage
 
 # Create blueprint
 templates_bp = Blueprint("templates", __name__)
@@ -23,6 +30,7 @@ def serialize_template(template):
         "exercises": [
             {
                 "id": e.id,
+                "exercise_id": e.exercise_id,
                 "name": e.name,
                 "sets": e.sets,
                 "reps": e.reps,
@@ -33,6 +41,37 @@ def serialize_template(template):
     }
 
 
+def template_exercises_error(exercises):
+    """Error message for an invalid exercises list, or None"""
+    if not isinstance(exercises, list):
+        return "Exercises must be a list"
+    for ex in exercises:
+        if (
+            not isinstance(ex, dict)
+            or not canonical_name(ex.get("name") or "")
+            or ex.get("sets") is None
+        ):
+            return "Each exercise needs: name and sets"
+    return None
+
+
+def add_template_exercises(template, exercises):
+    """Add TemplateExercise rows, linked to the user's exercise catalog"""
+    catalog = resolve_exercises(template.user_id, [ex["name"] for ex in exercises])
+    for ex in exercises:
+        exercise_id, name = catalog[exercise_key(ex["name"])]
+        db.session.add(
+            TemplateExercise(
+                template_id=template.id,
+                exercise_id=exercise_id,
+                name=name,
+                sets=ex["sets"],
+                reps=ex.get("reps"),
+                alternatives=ex.get("alternatives", ""),
+            )
+        )
+
+
 # ===== ROUTES =====
 
 
@@ -46,27 +85,19 @@ def create_template():
     exercises = data.get("exercises") or []
     if not exercises:
         return jsonify({"error": "At least one exercise required"}), 400
+    error = template_exercises_error(exercises)
+    if error:
+        return jsonify({"error": error}), 400
 
     try:
         template = WorkoutTemplate(user_id=user_id, name=name)
         db.session.add(template)
         db.session.flush()
 
-        for ex in exercises:
-            if not ex.get("name") or ex.get("sets") is None:
-                db.session.rollback()
-                return jsonify({"error": "Each exercise needs: name and sets"}), 400
-
-            exercise = TemplateExercise(
-                template_id=template.id,
-                name=ex["name"],
-                sets=ex["sets"],
-                reps=ex.get("reps"),
-                alternatives=ex.get("alternatives", ""),
-            )
-            db.session.add(exercise)
+        add_template_exercises(template, exercises)
 
         db.session.commit()
+        record_usage(user_id, added=[e.name for e in template.exercises])
         # return the created template (serialize_template should include id)
         return jsonify(serialize_template(template)), 201
 
@@ -77,6 +108,8 @@ def create_template():
 
 @templates_bp.route("", methods=["GET"])
 @jwt_required()
+@conditional("templates")
+@cached_response
 def get_templates():
     """
     Get all workout templates for current user
@@ -84,6 +117,11 @@ def get_templates():
     GET /api/templates
     Headers: Authorization: Bearer <token>
 
+    Query Parameters:
+    - limit: page size; when limit or cursor is given the response is
+      {"items": [...], "next_cursor": ...} instead of a plain list
+    - cursor: next_cursor from the previous page
+
     Returns:
     [
         {
@@ -99,12 +137,21 @@ def get_templates():
     ]
     """
     user_id = int(get_jwt_identity())
-    templates = WorkoutTemplate.query.filter_by(user_id=user_id).all()
+    query = WorkoutTemplate.query.filter_by(user_id=user_id)
+
+    if is_paginated_request():
+        return paginated_response(
+            query, WorkoutTemplate.created_at, WorkoutTemplate.id, serialize_template
+        )
+
+    templates = query.all()
     return jsonify([serialize_template(t) for t in templates]), 200
 
 
 @templates_bp.route("/<int:template_id>", methods=["GET"])
 @jwt_required()
+@conditional("templates", item_arg="template_id")
+@cached_response
 def get_template(template_id):
     """
     Get specific workout template by ID
@@ -154,7 +201,12 @@ def update_template(template_id):
     if not template:
         return jsonify({"error": "Template not found"}), 404
 
-    data = request.get_json()
+    data = request.get_json() or {}
+    if "exercises" in data:
+        error = template_exercises_error(data["exercises"])
+        if error:
+            return jsonify({"error": error}), 400
+    old_names = [e.name for e in template.exercises]
 
     try:
         # Update name if provided
@@ -167,17 +219,18 @@ def update_template(template_id):
             TemplateExercise.query.filter_by(template_id=template_id).delete()
 
             # Add new exercises
-            for ex in data.get("exercises", []):
-                exercise = TemplateExercise(
-                    template_id=template.id,
-                    name=ex["name"],
-                    sets=ex["sets"],
-                    reps=ex["reps"],
-                    alternatives=ex.get("alternatives", ""),
-                )
-                db.session.add(exercise)
+            add_template_exercises(template, data["exercises"])
+
+            # Only child rows changed; bump the parent so its ETag changes
+            template.updated_at = datetime.utcnow()
 
         db.session.commit()
+        if "exercises" in data:
+            record_usage(
+                user_id,
+                added=[e.name for e in template.exercises],
+                removed=old_names,
+            )
         return jsonify(serialize_template(template)), 200
 
     except Exception as e:
@@ -205,6 +258,9 @@ def delete_template(template_id):
     if not template:
         return jsonify({"error": "Template not found"}), 404
 
+    names = [e.name for e in template.exercises]
+    record_deletion(user_id, "templates", template.id)
     db.session.delete(template)
     db.session.commit()
+    record_usage(user_id, removed=names)
     return jsonify({"message": "Template deleted successfully"}), 204
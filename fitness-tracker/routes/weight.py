@@ -2,10 +2,25 @@
 Weight tracking routes: log and track weight progress
 """
 
+import numpy as np
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from models import db, WeightLog
+from sqlalchemy import insert, or_
+from models import db, WeightLog, Goal
+from dates import parse_datetime
+from batch import validate_batch
+from etags import conditional
+from cache import cached_response
+from tombstones import record_deletion
+from pagination import is_paginated_request, paginated_response
+from goal_progress import on_weight
+from analytics import (
+    DEFAULT_HALF_LIFE_DAYS,
+    DEFAULT_RATE_DAYS,
+    load_daily_weights,
+    weight_trend_report,
+)
 
 # Create blueprint
 weight_bp = Blueprint("weight", __name__)
@@ -23,6 +38,32 @@ def serialize_weight_log(log):
     }
 
 
+def parse_weight(data):
+    """
+    Validate one weight log payload
+
+    Returns:
+        (fields, error): WeightLog column values, or an error message
+    """
+    if "weight" not in data:
+        return None, "Weight required"
+
+    try:
+        weight = float(data["weight"])
+    except (ValueError, TypeError):
+        return None, "Weight must be a number"
+
+    if weight <= 0:
+        return None, "Weight must be positive"
+
+    try:
+        date = parse_datetime(data["date"]) if data.get("date") else datetime.utcnow()
+    except (ValueError, TypeError):
+        return None, "Invalid date format"
+
+    return {"weight": weight, "date": date}, None
+
+
 # ===== ROUTES =====
 
 
@@ -48,36 +89,65 @@ def log_weight():
     user_id = int(get_jwt_identity())
     data = request.get_json()
 
-    # Validation
-    if "weight" not in data:
-        return jsonify({"error": "Weight required"}), 400
-
-    try:
-        weight = float(data["weight"])
-        if weight <= 0:
-            return jsonify({"error": "Weight must be positive"}), 400
+    fields, error = parse_weight(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    except (ValueError, TypeError):
-        return jsonify({"error": "Weight must be a number"}), 400
-
-    # Create weight log
-    weight_log = WeightLog(
-        user_id=user_id,
-        weight=weight,
-        date=(
-            datetime.fromisoformat(data["date"])
-            if data.get("date")
-            else datetime.utcnow()
-        ),
-    )
+    weight_log = WeightLog(user_id=user_id, **fields)
     db.session.add(weight_log)
+    on_weight(user_id, weight_log.date)
     db.session.commit()
 
     return jsonify(serialize_weight_log(weight_log)), 201
 
 
+@weight_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def log_weight_batch():
+    """
+    Log many weight entries in one request (e.g. importing history)
+
+    POST /api/weight/batch
+    Headers: Authorization: Bearer <token>
+    {
+        "items": [
+            {"weight": 185.5, "date": "2024-01-15T10:30:00"},
+            ...
+        ]
+    }
+
+    Every item is validated before anything is written; if any is invalid
+    nothing is inserted and the response lists each failure:
+    {
+        "error": "Validation failed",
+        "errors": [{"index": 3, "error": "Weight must be positive"}]
+    }
+
+    Returns:
+    {
+        "created": 2
+    }
+    """
+    user_id = int(get_jwt_identity())
+    rows, error_response = validate_batch(request.get_json(), parse_weight)
+    if error_response:
+        return error_response
+
+    for row in rows:
+        row["user_id"] = user_id
+
+    db.session.execute(insert(WeightLog), rows)
+    # Weight goals only depend on the latest weight; refresh them once
+    on_weight(user_id, min(row["date"] for row in rows))
+    db.session.commit()
+
+    return jsonify({"created": len(rows)}), 201
+
+
 @weight_bp.route("", methods=["GET"])
 @jwt_required()
+@conditional("weight")
+@cached_response
 def get_weight():
     """
     Get weight logs for current user
@@ -87,6 +157,9 @@ def get_weight():
 
     Query Parameters:
     - days: number of days to look back (default: 90)
+    - limit: page size; when limit or cursor is given the response is
+      {"items": [...], "next_cursor": ...} instead of a plain list
+    - cursor: next_cursor from the previous page
 
     Returns:
     [
@@ -102,18 +175,90 @@ def get_weight():
     days = request.args.get("days", 90, type=int)
     cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-    logs = (
-        WeightLog.query.filter_by(user_id=user_id)
-        .filter(WeightLog.date >= cutoff_date)
-        .order_by(WeightLog.date.desc())
-        .all()
+    query = WeightLog.query.filter_by(user_id=user_id).filter(
+        WeightLog.date >= cutoff_date
     )
 
+    if is_paginated_request():
+        return paginated_response(
+            query, WeightLog.date, WeightLog.id, serialize_weight_log
+        )
+
+    logs = query.order_by(WeightLog.date.desc()).all()
+
     return jsonify([serialize_weight_log(l) for l in logs]), 200
 
 
+@weight_bp.route("/trend", methods=["GET"])
+@jwt_required()
+@conditional("weight", "goals")
+@cached_response
+def get_weight_trend():
+    """
+    Smoothed weight trend, weekly rate of change and goal projections
+
+    GET /api/weight/trend?days=90&half_life=7
+    Headers: Authorization: Bearer <token>
+
+    Query Parameters:
+    - days: only list points from the last N days (default: 90); the trend
+      always uses all history
+    - half_life: smoothing half-life in days (default: 7)
+    - rate_days: days of trend the weekly rate is fitted over (default: 28)
+
+    Returns:
+    {
+        "half_life_days": 7,
+        "current": {"date": "2024-01-15", "weight": 185.5, "trend": 186.2},
+        "weekly_rate": -0.8,
+        "projections": [
+            {"goal_id": 3, "target": 180.0, "remaining": -6.2,
+             "period_end": "2024-02-01T00:00:00", "projected_date": "2024-03-10",
+             "days_to_goal": 55, "on_track": false}
+        ],
+        "points": {
+            "date": ["2024-01-13", "2024-01-14", "2024-01-15"],
+            "weight": [186.0, 187.1, 185.5],
+            "trend": [186.35, 186.45, 186.2]
+        }
+    }
+    """
+    user_id = int(get_jwt_identity())
+    days = request.args.get("days", 90, type=int)
+    half_life = request.args.get("half_life", DEFAULT_HALF_LIFE_DAYS, type=float)
+    rate_days = request.args.get("rate_days", DEFAULT_RATE_DAYS, type=int)
+    if days <= 0 or rate_days < 2:
+        return jsonify({"error": "days must be positive and rate_days at least 2"}), 400
+    if not 0 < half_life <= 365:
+        return jsonify({"error": "half_life must be between 0 and 365 days"}), 400
+
+    series = load_daily_weights(user_id)
+    if series is None:
+        return jsonify({"error": "No weight logged yet"}), 404
+
+    now = datetime.utcnow()
+    goals = (
+        Goal.query.filter_by(user_id=user_id, goal_type="weight", completed=False)
+        .filter(or_(Goal.period_end.is_(None), Goal.period_end >= now))
+        .order_by(Goal.id)
+        .all()
+    )
+    since = np.datetime64((now - timedelta(days=days)).date())
+
+    report = weight_trend_report(
+        *series,
+        goals=goals,
+        half_life_days=half_life,
+        rate_days=rate_days,
+        since=since,
+    )
+    return jsonify(report), 200
+
+
 @weight_bp.route("/<int:log_id>", methods=["GET"])
 @jwt_required()
+@conditional("weight", item_arg="log_id")
+@cached_response
 def get_weight_log(log_id):
     """
     Get specific weight log by ID
@@ -170,6 +315,7 @@ def update_weight_log(log_id):
             if weight <= 0:
                 return jsonify({"error": "Weight must be positive"}), 400
             log.weight = weight
+            on_weight(user_id, log.date)
 
         db.session.commit()
         return jsonify(serialize_weight_log(log)), 200
@@ -199,6 +345,8 @@ def delete_weight_log(log_id):
     if not log:
         return jsonify({"error": "Weight log not found"}), 404
 
+    record_deletion(user_id, "weight", log.id)
     db.session.delete(log)
+    on_weight(user_id, log.date)
     db.session.commit()
     return jsonify({"message": "Weight log deleted successfully"}), 204
@@ -5,11 +5,41 @@ Workout routes: create, read, update, delete workouts
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from models import db, Workout, WorkoutExercise, WorkoutSet
+from dates import parse_datetime
+from etags import conditional
+from cache import cached_response
+from tombstones import record_deletion
+from pagination import is_paginated_request, paginated_response
+from rollups import apply_workout, workout_sets
+from goal_progress import on_workout
+from exercises import canonical_name, exercise_key, resolve_exercises
+from suggest import record_usage
 
 workouts_bp = Blueprint("workouts", __name__)
 
 
+def workout_query():
+    """
+    Base Workout query with exercises and sets eager loaded.
+
+    serialize_workout touches workout.exercises and every exercise's sets, so
+    lazy loading costs one query per workout plus one per exercise. selectinload
+    fetches each level with a single IN query, keeping the statement count
+    constant no matter how many workouts are returned.
+    """
+    return Workout.query.options(
+        selectinload(Workout.exercises).selectinload(WorkoutExercise.sets)
+    )
+
+
+def get_user_workout(workout_id, user_id):
+    """Load a single workout (with exercises and sets) owned by user_id"""
+    return workout_query().filter_by(id=workout_id, user_id=user_id).first()
+
+
 def serialize_workout(workout):
     """Convert Workout object to JSON-serializable dict"""
     return {
@@ -19,6 +49,7 @@ def serialize_workout(workout):
         "exercises": [
             {
                 "id": e.id,
+                "exercise_id": e.exercise_id,
                 "name": e.name,
                 "sets": [
                     {
@@ -35,6 +66,130 @@ def serialize_workout(workout):
     }
 
 
+def parse_exercises(exercises_data):
+    """
+    Validate an exercises payload up front, before anything touches the session.
+
+    Returns:
+        (exercises, None) on success where exercises is a list of
+        {"name", "sets": [{"set_number", "reps", "weight"}]} dicts,
+        or (None, error message) on bad input
+    """
+    if not isinstance(exercises_data, list):
+        return None, "Exercises must be a list"
+
+    exercises = []
+    for ex in exercises_data:
+        if not isinstance(ex, dict) or not ex.get("name") or not ex.get("sets"):
+            return None, "Each exercise needs name and sets"
+        name = canonical_name(ex["name"])
+        if not name:
+            return None, "Each exercise needs name and sets"
+
+        sets = []
+        for set_data in ex["sets"]:
+            if not isinstance(set_data, dict) or not all(
+                k in set_data for k in ["set_number", "reps", "weight"]
+            ):
+                return None, "Each set needs set_number, reps, weight"
+
+            try:
+                sets.append(
+                    {
+                        "set_number": int(set_data["set_number"]),
+                        "reps": int(set_data["reps"]),
+                        "weight": float(set_data["weight"]),
+                    }
+                )
+            except (ValueError, TypeError):
+                return None, "Set reps, weight and set_number must be numeric"
+
+        exercises.append({"name": name, "sets": sets})
+
+    return exercises, None
+
+
+def parse_workout(data):
+    """
+    Validate a whole workout payload (as accepted by log_workout)
+
+    Returns:
+        ({"date", "exercises"}, None) on success, or (None, error message)
+    """
+    if not data.get("exercises"):
+        return None, "Exercises required"
+
+    exercises, error = parse_exercises(data["exercises"])
+    if error:
+        return None, error
+
+    try:
+        date = parse_datetime(data["date"]) if data.get("date") else datetime.utcnow()
+    except (ValueError, TypeError):
+        return None, "Invalid date format"
+
+    return {"date": date, "exercises": exercises}, None
+
+
+def insert_exercises(workout, exercises):
+    """
+    Write parsed exercises and their sets for a workout in batched statements.
+
+    Names are first resolved against the user's exercise catalog (see
+    exercises.py). Exercises go in with one executemany INSERT, their ids are
+    read back with a single SELECT (ids are assigned in insertion order), then
+    every set goes in with one more executemany. That is a fixed number of
+    round trips however large the workout is, instead of a flush per exercise
+    and an INSERT per set.
+    """
+    if not exercises:
+        return
+
+    catalog = resolve_exercises(workout.user_id, [ex["name"] for ex in exercises])
+    rows = []
+    for ex in exercises:
+        exercise_id, name = catalog[exercise_key(ex["name"])]
+        rows.append(
+            {
+                "workout_id": workout.id,
+                "exercise_id": exercise_id,
+                "name": name,
+                "user_id": workout.user_id,
+                "date": workout.date,
+            }
+        )
+    db.session.execute(WorkoutExercise.__table__.insert(), rows)
+    exercise_ids = db.session.scalars(
+        select(WorkoutExercise.id)
+        .filter_by(workout_id=workout.id)
+        .order_by(WorkoutExercise.id)
+    ).all()
+
+    set_rows = [
+        dict(set_data, exercise_id=exercise_id)
+        for exercise_id, ex in zip(exercise_ids, exercises)
+        for set_data in ex["sets"]
+    ]
+    if set_rows:
+        db.session.execute(WorkoutSet.__table__.insert(), set_rows)
+
+
+def parsed_sets(exercises):
+    """(reps, weight) pairs for every set of a parse_exercises() payload"""
+    return [(s["reps"], s["weight"]) for ex in exercises for s in ex["sets"]]
+
+
+def delete_exercises(workout_id):
+    """Bulk delete a workout's exercises and sets (two statements)"""
+    exercise_ids = select(WorkoutExercise.id).filter_by(workout_id=workout_id)
+    WorkoutSet.query.filter(WorkoutSet.exercise_id.in_(exercise_ids)).delete(
+        synchronize_session=False
+    )
+    WorkoutExercise.query.filter_by(workout_id=workout_id).delete(
+        synchronize_session=False
+    )
+
+
 @workouts_bp.route("", methods=["POST"])
 @jwt_required()
 def log_workout():
@@ -64,48 +219,23 @@ def log_workout():
     user_id = int(get_jwt_identity())
     data = request.get_json()
 
-    if not data.get("exercises"):
-        return jsonify({"error": "Exercises required"}), 400
+    fields, error = parse_workout(data)
+    if error:
+        return jsonify({"error": error}), 400
+    exercises = fields["exercises"]
 
     try:
         workout = Workout(
-            user_id=user_id,
-            template_id=data.get("template_id"),
-            date=(
-                datetime.fromisoformat(data["date"])
-                if data.get("date")
-                else datetime.utcnow()
-            ),
+            user_id=user_id, template_id=data.get("template_id"), date=fields["date"]
         )
         db.session.add(workout)
         db.session.flush()
 
-        for ex in data.get("exercises", []):
-            if not ex.get("name") or not ex.get("sets"):
-                db.session.rollback()
-                return jsonify({"error": "Each exercise needs name and sets"}), 400
-
-            exercise = WorkoutExercise(workout_id=workout.id, name=ex["name"])
-            db.session.add(exercise)
-            db.session.flush()
-
-            for set_data in ex.get("sets", []):
-                if not all(k in set_data for k in ["set_number", "reps", "weight"]):
-                    db.session.rollback()
-                    return (
-                        jsonify({"error": "Each set needs set_number, reps, weight"}),
-                        400,
-                    )
-
-                workout_set = WorkoutSet(
-                    exercise_id=exercise.id,
-                    reps=set_data["reps"],
-                    weight=set_data["weight"],
-                    set_number=set_data["set_number"],
-                )
-                db.session.add(workout_set)
-
+        insert_exercises(workout, exercises)
+        apply_workout(user_id, workout.date, parsed_sets(exercises))
+        on_workout(user_id, workout.date)
         db.session.commit()
+        record_usage(user_id, added=[ex["name"] for ex in exercises])
         return (
             jsonify({"id": workout.id, "message": "Workout logged successfully"}),
             201,
@@ -121,6 +251,8 @@ def log_workout():
 
 @workouts_bp.route("", methods=["GET"])
 @jwt_required()
+@conditional("workouts")
+@cached_response
 def get_workouts():
     """
     Get all workouts for current user
@@ -130,6 +262,9 @@ def get_workouts():
 
     Query Parameters:
     - days:
+    - limit: page size; when limit or cursor is given the response is
+      {"items": [...], "next_cursor": ...} instead of a plain list
+    - cursor: next_cursor from the previous page
 
     Returns:
     [
@@ -145,18 +280,22 @@ def get_workouts():
     days = request.args.get("days", 30, type=int)
     cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-    workouts = (
-        Workout.query.filter_by(user_id=user_id)
-        .filter(Workout.date >= cutoff_date)
-        .order_by(Workout.date.desc())
-        .all()
+    query = (
+        workout_query().filter_by(user_id=user_id).filter(Workout.date >= cutoff_date)
     )
 
+    if is_paginated_request():
+        return paginated_response(query, Workout.date, Workout.id, serialize_workout)
+
+    workouts = query.order_by(Workout.date.desc()).all()
+
     return jsonify([serialize_workout(w) for w in workouts]), 200
 
 
 @workouts_bp.route("/<int:workout_id>", methods=["GET"])
 @jwt_required()
+@conditional("workouts", item_arg="workout_id")
+@cached_response
 def get_workout(workout_id):
     """
     Get specific workout by ID
@@ -172,7 +311,7 @@ def get_workout(workout_id):
     }
     """
     user_id = int(get_jwt_identity())
-    workout = Workout.query.filter_by(id=workout_id, user_id=user_id).first()
+    workout = get_user_workout(workout_id, user_id)
 
     if not workout:
         return jsonify({"error": "Workout not found"}), 404
@@ -199,32 +338,40 @@ def update_workout(workout_id):
     }
     """
     user_id = int(get_jwt_identity())
-    workout = Workout.query.filter_by(id=workout_id, user_id=user_id).first()
+    workout = get_user_workout(workout_id, user_id)
 
     if not workout:
         return jsonify({"error": "Workout not found"}), 404
 
     data = request.get_json()
+    old_names = [e.name for e in workout.exercises]
+    new_names = None
 
     try:
         if "exercises" in data:
-            WorkoutExercise.query.filter_by(workout_id=workout_id).delete()
-
-            for ex in data.get("exercises", []):
-                exercise = WorkoutExercise(workout_id=workout.id, name=ex["name"])
-                db.session.add(exercise)
-                db.session.flush()
-
-                for set_data in ex.get("sets", []):
-                    workout_set = WorkoutSet(
-                        exercise_id=exercise.id,
-                        reps=set_data["reps"],
-                        weight=set_data["weight"],
-                        set_number=set_data["set_number"],
-                    )
-                    db.session.add(workout_set)
+            exercises, error = parse_exercises(data["exercises"])
+            if error:
+                return jsonify({"error": error}), 400
+            new_names = [ex["name"] for ex in exercises]
+
+            apply_workout(
+                user_id, workout.date, workout_sets(workout), -1, count_workout=False
+            )
+            apply_workout(
+                user_id, workout.date, parsed_sets(exercises), count_workout=False
+            )
+
+            delete_exercises(workout.id)
+            insert_exercises(workout, exercises)
+            # Only child rows changed; bump the parent so its ETag changes
+            workout.updated_at = datetime.utcnow()
 
         db.session.commit()
+        if new_names is not None:
+            record_usage(user_id, added=new_names, removed=old_names)
+
+        # Commit expires the workout; reload it eagerly instead of lazily
+        workout = get_user_workout(workout_id, user_id)
         return (
             jsonify(
                 {
@@ -255,11 +402,16 @@ def delete_workout(workout_id):
     }
     """
     user_id = int(get_jwt_identity())
-    workout = Workout.query.filter_by(id=workout_id, user_id=user_id).first()
+    workout = get_user_workout(workout_id, user_id)
 
     if not workout:
         return jsonify({"error": "Workout not found"}), 404
 
+    names = [e.name for e in workout.exercises]
+    apply_workout(user_id, workout.date, workout_sets(workout), -1)
+    on_workout(user_id, workout.date, sign=-1)
+    record_deletion(user_id, "workouts", workout.id)
     db.session.delete(workout)
     db.session.commit()
+    record_usage(user_id, removed=names)
     return jsonify({"message": "Workout deleted successfully"}), 204
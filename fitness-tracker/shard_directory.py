@@ -0,0 +1,380 @@
+"""
+The user -> shard directory, and moving users between shards.
+
+The user_shards table on the primary records each user's shard; users
+without a row (everyone registered before sharding was enabled) live on
+shard 0. New users are assigned to the shard with the fewest users.
+
+move_user() copies a user's rows to another shard and removes them from the
+old one:
+
+1. The directory entry is flagged `moving`; new requests for the user get
+   a 503 until the move finishes. Requests that already resolved the old
+   shard may still write there, so the move waits SHARD_MOVE_DRAIN_SECONDS
+   for them to finish.
+2. A digest of the user's rows on the old shard is taken, then every
+   user-owned table is copied in foreign key order inside one transaction
+   on the target. Ids are allocated by the target, so parent ids are
+   remapped in child rows. Copied rows get a fresh updated_at and the old
+   ids that were not reused get tombstones, so sync clients replace their
+   copies.
+3. In one transaction on the old shard the user's rows are locked and the
+   digest is taken again. If anything changed since the copy, the copy is
+   deleted from the target and MoveConflict is raised; the user stays on
+   the old shard and the move can be retried. Otherwise the rows are
+   deleted and the directory is switched before that transaction commits.
+
+Step 3 catches every write that commits before the old rows are deleted.
+A request that resolved the old shard before step 1 and only writes after
+step 3 (it outlived the drain wait and the copy) still writes to the old
+shard, where that write is not seen again.
+
+The fresh updated_at also changes the resources' ETag versions, which the
+response caches of every process key on, so no process serves the old ids
+after the move. Suggestion indexes hold names and counts, not ids, and
+stay valid.
+"""
+
+import hashlib
+import time
+from datetime import datetime
+from flask import current_app, g, jsonify
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import delete, func, insert, select
+from models import db, User, UserShard, DeletedRecord
+from etags import RESOURCE_MODELS
+from shards import (
+    GLOBAL_TABLES,
+    current_shard,
+    shard_bind_key,
+    shard_count,
+    using_shard,
+)
+
+MOVE_RETRY_AFTER = 30  # seconds
+
+
+class MoveConflict(Exception):
+    """The user's rows changed on the old shard while they were copied"""
+
+
+# ===== DIRECTORY =====
+
+
+def sharding_enabled():
+    return shard_count(db.engines) > 1
+
+
+def shard_engine_for(shard):
+    """Engine of a shard by number"""
+    return db.engines[shard_bind_key(shard)]
+
+
+def directory_entry(user_id):
+    """The user's UserShard row, always read from the primary (never a replica)"""
+    return db.session.scalar(
+        select(UserShard).where(UserShard.user_id == user_id),
+        bind_arguments={"bind": shard_engine_for(0)},
+    )
+
+
+def shard_for_user(user_id):
+    entry = directory_entry(user_id)
+    return entry.shard if entry else 0
+
+
+def user_shard(user_id):
+    """Context manager routing queries to user_id's shard"""
+    return using_shard(shard_for_user(user_id))
+
+
+def for_each_shard():
+    """Yield every shard number with that shard selected for the loop body"""
+    for shard in range(shard_count(db.engines)):
+        with using_shard(shard):
+            yield shard
+
+
+def shard_user_counts():
+    """{shard: number of users}, counting users without a row on shard 0"""
+    counts = dict.fromkeys(range(shard_count(db.engines)), 0)
+    rows = db.session.execute(
+        select(UserShard.shard, func.count()).group_by(UserShard.shard)
+    )
+    for shard, count in rows:
+        counts[shard] = count
+
+    assigned = sum(count for shard, count in counts.items() if shard != 0)
+    counts[0] = db.session.scalar(select(func.count(User.id))) - assigned
+    return counts
+
+
+def mirror_user(user, shard):
+    """
+    Copy the users row to a shard so its user_id foreign keys hold
+
+    The copy has no password; logins always read the primary.
+    """
+    if shard == 0:
+        return
+    with shard_engine_for(shard).begin() as conn:
+        exists = conn.scalar(select(User.id).where(User.id == user.id))
+        if not exists:
+            conn.execute(
+                insert(User.__table__).values(
+                    id=user.id, username=user.username, email=user.email, password=""
+                )
+            )
+
+
+def assign_shard(user):
+    """Place a newly registered user on the least-loaded shard"""
+    if not sharding_enabled():
+        return 0
+
+    counts = shard_user_counts()
+    # The new user is already counted on shard 0
+    counts[0] -= 1
+    shard = min(counts, key=lambda s: (counts[s], s))
+
+    mirror_user(user, shard)
+    db.session.add(UserShard(user_id=user.id, shard=shard))
+    db.session.commit()
+    return shard
+
+
+def init_sharding(app):
+    """Select the authenticated user's shard before each request if sharded"""
+    if not app.config.get("DATABASE_SHARD_URLS"):
+        return
+
+    @app.before_request
+    def select_user_shard():
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            # Bad tokens are rejected by @jwt_required in the view
+            return None
+        if user_id is None:
+            return None
+
+        entry = directory_entry(int(user_id))
+        if entry and entry.moving:
+            response = jsonify({"error": "Account data is being moved, retry shortly"})
+            response.headers["Retry-After"] = str(MOVE_RETRY_AFTER)
+            return response, 503
+
+        g.shard_token = current_shard.set(entry.shard if entry else 0)
+        return None
+
+    @app.teardown_request
+    def reset_user_shard(error):
+        token = g.pop("shard_token", None)
+        if token is not None:
+            current_shard.reset(token)
+
+
+# ===== MOVING USERS =====
+
+
+def sharded_tables():
+    """User-owned tables in foreign key order (parents first)"""
+    return [t for t in db.metadata.sorted_tables if t.name not in GLOBAL_TABLES]
+
+
+def owner_filter(table, user_id):
+    """WHERE clause selecting user_id's rows of table, via its parents if needed"""
+    if "user_id" in table.c:
+        return table.c.user_id == user_id
+
+    for fk in table.foreign_keys:
+        parent = fk.column.table
+        if parent.name not in GLOBAL_TABLES:
+            return fk.parent.in_(select(fk.column).where(owner_filter(parent, user_id)))
+    raise ValueError(f"Cannot tell which user owns rows of {table.name}")
+
+
+def copy_user_rows(source, target, user_id):
+    """
+    Insert user_id's rows read from source into target, remapping ids
+
+    Returns:
+        number of rows copied
+    """
+    now = datetime.utcnow()
+    resources = {model.__tablename__: name for name, model in RESOURCE_MODELS.items()}
+    id_maps = {}
+
+    for table in sharded_tables():
+        ids = id_maps[table.name] = {}
+        rows = source.execute(
+            select(table).where(owner_filter(table, user_id)).order_by(table.c.id)
+        ).mappings()
+        for row in rows:
+            values = dict(row)
+            old_id = values.pop("id")
+            for fk in table.foreign_keys:
+                parent_ids = id_maps.get(fk.column.table.name)
+                if parent_ids is not None and values[fk.parent.name] is not None:
+                    values[fk.parent.name] = parent_ids.get(values[fk.parent.name])
+            if table.name in resources:
+                values["updated_at"] = now
+            result = target.execute(insert(table).values(**values))
+            ids[old_id] = result.inserted_primary_key[0]
+
+    # Rows get new ids on the target, so clients are told to drop the old
+    # ones. An old id that is also a new id of the same resource is not
+    # tombstoned (a client would get it as both created and deleted); the
+    # row sent under it replaces the old one when the client upserts it.
+    # Copied tombstones for such ids are dropped for the same reason.
+    tombstones = []
+    for table_name, resource in resources.items():
+        new_ids = set(id_maps[table_name].values())
+        if new_ids:
+            target.execute(
+                delete(DeletedRecord.__table__).where(
+                    DeletedRecord.user_id == user_id,
+                    DeletedRecord.resource == resource,
+                    DeletedRecord.record_id.in_(new_ids),
+                )
+            )
+        tombstones += [
+            {
+                "user_id": user_id,
+                "resource": resource,
+                "record_id": old_id,
+                "deleted_at": now,
+            }
+            for old_id in id_maps[table_name]
+            if old_id not in new_ids
+        ]
+    if tombstones:
+        target.execute(insert(DeletedRecord.__table__), tombstones)
+
+    return sum(len(ids) for ids in id_maps.values())
+
+
+def user_rows_digest(conn, user_id, lock=False):
+    """
+    Hash of every row user_id owns on a shard
+
+    With lock, the rows and the users row are locked FOR UPDATE (where the
+    database supports it) until the transaction ends, which also holds back
+    inserts referencing them.
+    """
+    query = select(User.id).where(User.id == user_id)
+    if lock:
+        conn.execute(query.with_for_update())
+
+    digest = hashlib.sha256()
+    for table in sharded_tables():
+        query = select(table).where(owner_filter(table, user_id))
+        if lock:
+            query = query.with_for_update()
+        for row in conn.execute(query.order_by(table.c.id)):
+            digest.update(repr((table.name, tuple(row))).encode())
+    return digest.hexdigest()
+
+
+def delete_user_rows(conn, user_id):
+    """Delete user_id's rows from every user-owned table (children first)"""
+    for table in reversed(sharded_tables()):
+        conn.execute(delete(table).where(owner_filter(table, user_id)))
+
+
+def move_user(user_id, target):
+    """
+    Move a user's data to the target shard
+
+    Returns:
+        number of rows copied (0 if the user is already there)
+
+    Raises:
+        ValueError: for an unknown user or shard
+        MoveConflict: the user's rows changed while they were copied
+    """
+    if not 0 <= target < shard_count(db.engines):
+        raise ValueError(f"No shard {target}")
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise ValueError(f"User {user_id} not found")
+
+    entry = directory_entry(user_id)
+    if entry is None:
+        entry = UserShard(user_id=user_id, shard=0)
+        db.session.add(entry)
+    source = entry.shard
+    if source == target:
+        db.session.rollback()
+        return 0
+
+    entry.moving = True
+    db.session.commit()
+
+    try:
+        time.sleep(current_app.config.get("SHARD_MOVE_DRAIN_SECONDS", 0))
+        mirror_user(user, target)
+        with shard_engine_for(source).connect() as src, shard_engine_for(
+            target
+        ).begin() as dst:
+            snapshot = user_rows_digest(src, user_id)
+            copied = copy_user_rows(src, dst, user_id)
+    except Exception:
+        entry.moving = False
+        db.session.commit()
+        raise
+
+    switched = False
+    try:
+        with shard_engine_for(source).begin() as src:
+            if user_rows_digest(src, user_id, lock=True) != snapshot:
+                raise MoveConflict(f"User {user_id} changed during the move, retry")
+            delete_user_rows(src, user_id)
+            entry.shard = target
+            entry.moving = False
+            db.session.commit()
+            switched = True
+    except Exception:
+        if switched:
+            # The user now lives on the target; only the old rows remain
+            raise
+        db.session.rollback()
+        with shard_engine_for(target).begin() as dst:
+            delete_user_rows(dst, user_id)
+        entry.moving = False
+        db.session.commit()
+        raise
+    return copied
+
+
+def plan_rebalance():
+    """
+    Moves that even out users per shard (to within one)
+
+    Takes the newest users of the fullest shard first.
+
+    Returns:
+        list of (user_id, source shard, target shard)
+    """
+    counts = shard_user_counts()
+    moves = []
+    while True:
+        fullest = max(counts, key=lambda s: (counts[s], -s))
+        emptiest = min(counts, key=lambda s: (counts[s], s))
+        if counts[fullest] - counts[emptiest] <= 1:
+            return moves
+
+        planned = {user_id for user_id, _, _ in moves}
+        query = select(User.id).outerjoin(UserShard, UserShard.user_id == User.id)
+        if fullest == 0:
+            query = query.where(func.coalesce(UserShard.shard, 0) == 0)
+        else:
+            query = query.where(UserShard.shard == fullest)
+        if planned:
+            query = query.where(User.id.not_in(planned))
+        user_id = db.session.scalar(query.order_by(User.id.desc()).limit(1))
+
+        moves.append((user_id, fullest, emptiest))
+        counts[fullest] -= 1
+        counts[emptiest] += 1
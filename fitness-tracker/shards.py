@@ -0,0 +1,86 @@
+"""
+Routing of user data to database shards.
+
+Every user-owned table is keyed by user_id and no query crosses users, so a
+user's rows can live in any one of several databases. Shard 0 is the
+primary database (SQLALCHEMY_DATABASE_URI); DATABASE_SHARD_URLS adds shards
+1..N as the binds "shard1".."shardN". Which shard holds a user is recorded
+in the user_shards directory (see shard_directory.py).
+
+The shard for the current unit of work is held in the current_shard
+context variable. RoutingSession (replicas.py) sends every query on a
+user-owned table to that shard's engine; GLOBAL_TABLES always stay on the
+primary. Requests select the shard of the authenticated user before the
+view runs; jobs and CLI commands select it with using_shard().
+
+Config (app.config):
+    DATABASE_SHARD_URLS    comma-separated URLs of shards 1..N
+                           (default: none, everything on the primary)
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import Table, inspect
+
+SHARD_BIND_PREFIX = "shard"
+# Looked up across users (login, job queue), used to find the shard itself,
+# or bookkeeping of each database rather than user data
+GLOBAL_TABLES = {"users", "user_shards", "jobs", "schema_version"}
+
+current_shard = ContextVar("current_shard", default=0)
+
+
+def shard_bind_key(shard):
+    """Flask-SQLAlchemy bind key of a shard (None for the primary)"""
+    return None if shard == 0 else f"{SHARD_BIND_PREFIX}{shard}"
+
+
+def shard_urls(config):
+    """URLs of shards 1..N from DATABASE_SHARD_URLS"""
+    return [
+        url.strip()
+        for url in (config.get("DATABASE_SHARD_URLS") or "").split(",")
+        if url.strip()
+    ]
+
+
+def shard_count(engines):
+    """Number of shards, counting the primary"""
+    return 1 + sum(1 for key in engines if key and key.startswith(SHARD_BIND_PREFIX))
+
+
+@contextmanager
+def using_shard(shard):
+    """Route user-data queries to shard for the duration of the block"""
+    token = current_shard.set(shard)
+    try:
+        yield shard
+    finally:
+        current_shard.reset(token)
+
+
+def _table_for(mapper, clause):
+    if mapper is not None:
+        return inspect(mapper).local_table
+    if isinstance(clause, Table):
+        return clause
+    # INSERT / UPDATE / DELETE statements
+    table = getattr(clause, "table", None)
+    return table if isinstance(table, Table) else None
+
+
+def shard_engine(engines, mapper=None, clause=None):
+    """
+    Engine of the current shard for a query, or None to use the primary
+
+    Queries whose table cannot be determined (text, unions) are user-data
+    queries and go to the shard.
+    """
+    shard = current_shard.get()
+    if shard == 0:
+        return None
+
+    table = _table_for(mapper, clause)
+    if table is not None and table.name in GLOBAL_TABLES:
+        return None
+    return engines[shard_bind_key(shard)]
@@ -0,0 +1,309 @@
+"""
+Exercise name suggestions for GET /api/exercises/suggest.
+
+Each user's exercise names are held in memory as a sorted array of
+(term, exercise key) pairs, where the terms are the case-folded name and
+every later word of it ("bench press", "press"), so both "ben" and "pre"
+find "Bench Press". A prefix lookup is two bisects into that array; the
+matches are ranked by how often the user has logged or planned each
+exercise. Names from the global catalog (COMMON_EXERCISES, most popular
+first) that the user has never used fill the remaining slots.
+
+A user's index is built from the database the first time they ask (three
+grouped queries on their shard). After that the write handlers keep it
+current through record_usage(), so lookups never touch the database. Writes
+recorded while an index is being built are replayed onto it before it is
+stored; a write that committed just before the build read its rows can be
+counted twice, but no name is lost. Bulk writes (imports) call
+forget_suggestions() instead, and the index is rebuilt on the next lookup.
+
+Indexes are held in an LRU bounded by SUGGEST_INDEX_MAX_USERS and rebuilt
+after SUGGEST_INDEX_TTL seconds, which bounds how long changes made through
+other worker processes go unseen.
+
+Config (app.config):
+    SUGGEST_INDEX_MAX_USERS   default 10000
+    SUGGEST_INDEX_TTL         seconds, default 3600
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from sqlalchemy import func, select
+from models import db, Exercise, TemplateExercise, WorkoutExercise, WorkoutTemplate
+from exercises import canonical_name, exercise_key
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+COMMON_EXERCISES = [
+    "Bench Press",
+    "Squat",
+    "Deadlift",
+    "Overhead Press",
+    "Barbell Row",
+    "Pull Up",
+    "Chin Up",
+    "Dip",
+    "Push Up",
+    "Incline Bench Press",
+    "Dumbbell Bench Press",
+    "Incline Dumbbell Press",
+    "Romanian Deadlift",
+    "Front Squat",
+    "Leg Press",
+    "Lunge",
+    "Bulgarian Split Squat",
+    "Hip Thrust",
+    "Leg Curl",
+    "Leg Extension",
+    "Calf Raise",
+    "Lat Pulldown",
+    "Seated Cable Row",
+    "Dumbbell Row",
+    "Face Pull",
+    "Lateral Raise",
+    "Dumbbell Shoulder Press",
+    "Rear Delt Fly",
+    "Shrug",
+    "Barbell Curl",
+    "Dumbbell Curl",
+    "Hammer Curl",
+    "Preacher Curl",
+    "Tricep Pushdown",
+    "Skull Crusher",
+    "Overhead Tricep Extension",
+    "Close Grip Bench Press",
+    "Cable Fly",
+    "Dumbbell Fly",
+    "Good Morning",
+    "Hack Squat",
+    "Goblet Squat",
+    "Sumo Deadlift",
+    "Trap Bar Deadlift",
+    "Power Clean",
+    "Kettlebell Swing",
+    "Plank",
+    "Hanging Leg Raise",
+    "Cable Crunch",
+    "Ab Wheel Rollout",
+]
+
+
+class PrefixIndex:
+    """Exercise names searchable by word prefix, each with a usage count"""
+
+    def __init__(self):
+        self.names = {}  # key -> display name
+        self.uses = {}  # key -> times logged or planned
+        self._terms = []  # sorted (term, key)
+
+    def add(self, name, uses=1):
+        key = exercise_key(name)
+        if key not in self.names:
+            self.names[key] = canonical_name(name)
+            self.uses[key] = 0
+            words = key.split(" ")
+            for i in range(len(words)):
+                insort(self._terms, (" ".join(words[i:]), key))
+        self.uses[key] += uses
+
+    def remove(self, name, uses=1):
+        """Lower the usage count; the name stays, as it is still in the catalog"""
+        key = exercise_key(name)
+        if key in self.uses:
+            self.uses[key] = max(self.uses[key] - uses, 0)
+
+    def search(self, prefix, limit, exclude=()):
+        """
+        Keys of the most used names with a word starting with prefix
+
+        Ties are broken alphabetically.
+        """
+        prefix = exercise_key(prefix)
+        lo = bisect_left(self._terms, (prefix,))
+        # Every term starting with prefix sorts below prefix + the top code point
+        hi = bisect_left(self._terms, (prefix + "\U0010ffff",), lo)
+        keys = {key for _, key in self._terms[lo:hi] if key not in exclude}
+        return heapq.nsmallest(
+            limit, keys, key=lambda k: (-self.uses[k], self.names[k])
+        )
+
+
+def build_common_index():
+    index = PrefixIndex()
+    for rank, name in enumerate(COMMON_EXERCISES):
+        index.add(name, uses=len(COMMON_EXERCISES) - rank)
+    return index
+
+
+common_index = build_common_index()
+
+
+def load_user_index(user_id):
+    """PrefixIndex of the user's catalog with logged + planned counts"""
+    uses = {}
+    logged = (
+        select(WorkoutExercise.exercise_id, func.count())
+        .where(WorkoutExercise.user_id == user_id)
+        .group_by(WorkoutExercise.exercise_id)
+    )
+    planned = (
+        select(TemplateExercise.exercise_id, func.count())
+        .join(WorkoutTemplate, WorkoutTemplate.id == TemplateExercise.template_id)
+        .where(WorkoutTemplate.user_id == user_id)
+        .group_by(TemplateExercise.exercise_id)
+    )
+    for query in (logged, planned):
+        for exercise_id, count in db.session.execute(query):
+            uses[exercise_id] = uses.get(exercise_id, 0) + count
+
+    index = PrefixIndex()
+    catalog = db.session.execute(
+        select(Exercise.id, Exercise.name).where(Exercise.user_id == user_id)
+    )
+    for exercise_id, name in catalog:
+        index.add(name, uses=uses.get(exercise_id, 0))
+    return index
+
+
+# Marks a build that must not be stored (see SuggestionIndexes.forget)
+FORGOTTEN = object()
+
+
+def _apply(index, added, removed):
+    for name in removed:
+        index.remove(name)
+    for name in added:
+        index.add(name)
+
+
+class SuggestionIndexes:
+    """Per-user PrefixIndex objects in an LRU with a TTL"""
+
+    def __init__(self, max_users=10000, ttl=3600):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._indexes = OrderedDict()  # user_id -> (expires_at, PrefixIndex)
+        # user_id -> one list of (added, removed) per build in progress
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _get(self, user_id):
+        entry = self._indexes.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._indexes[user_id]
+            return None
+        self._indexes.move_to_end(user_id)
+        return entry[1]
+
+    def suggest(self, user_id, prefix, limit):
+        """
+        Ranked suggestions for prefix
+
+        Returns:
+            list of {"name", "uses", "source"} dicts, "history" ones first
+        """
+        with self._lock:
+            index = self._get(user_id)
+            if index is None:
+                pending = []
+                self._pending.setdefault(user_id, []).append(pending)
+        if index is None:
+            try:
+                index = load_user_index(user_id)
+            except Exception:
+                with self._lock:
+                    self._end_build(user_id, pending)
+                raise
+            # Stored under the same lock record() takes, so no write falls
+            # between the replay and the store
+            with self._lock:
+                self._end_build(user_id, pending)
+                if not any(entry is FORGOTTEN for entry in pending):
+                    for added, removed in pending:
+                        _apply(index, added, removed)
+                    self._store(user_id, index)
+
+        with self._lock:
+            keys = index.search(prefix, limit)
+            suggestions = [
+                {"name": index.names[k], "uses": index.uses[k], "source": "history"}
+                for k in keys
+            ]
+            used = index.names
+            if len(suggestions) < limit:
+                for key in common_index.search(
+                    prefix, limit - len(suggestions), exclude=used
+                ):
+                    suggestions.append(
+                        {
+                            "name": common_index.names[key],
+                            "uses": 0,
+                            "source": "catalog",
+                        }
+                    )
+        return suggestions
+
+    def _end_build(self, user_id, pending):
+        builds = [b for b in self._pending[user_id] if b is not pending]
+        if builds:
+            self._pending[user_id] = builds
+        else:
+            del self._pending[user_id]
+
+    def _store(self, user_id, index):
+        self._indexes[user_id] = (time.monotonic() + self.ttl, index)
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+
+    def record(self, user_id, added=(), removed=()):
+        """Apply a committed write to the user's index, loaded or being built"""
+        with self._lock:
+            for pending in self._pending.get(user_id, ()):
+                pending.append((list(added), list(removed)))
+            index = self._get(user_id)
+            if index is not None:
+                _apply(index, added, removed)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._indexes.pop(user_id, None)
+            # Builds in progress may have read the rows before the bulk write
+            for pending in self._pending.get(user_id, ()):
+                pending.append(FORGOTTEN)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            for builds in self._pending.values():
+                for pending in builds:
+                    pending.append(FORGOTTEN)
+
+
+suggestion_indexes = SuggestionIndexes()
+
+
+def init_suggestions(app):
+    """Configure the shared suggestion indexes from app.config"""
+    suggestion_indexes.max_users = app.config.get("SUGGEST_INDEX_MAX_USERS", 10000)
+    suggestion_indexes.ttl = app.config.get("SUGGEST_INDEX_TTL", 3600)
+    suggestion_indexes.clear()
+
+
+def suggest(user_id, prefix, limit=DEFAULT_LIMIT):
+    return suggestion_indexes.suggest(user_id, prefix, limit)
+
+
+def record_usage(user_id, added=(), removed=()):
+    """Count exercise names written or deleted by a committed write"""
+    suggestion_indexes.record(user_id, added, removed)
+
+
+def forget_suggestions(user_id):
+    """Drop the user's index after a bulk write; it is rebuilt on next use"""
+    suggestion_indexes.forget(user_id)
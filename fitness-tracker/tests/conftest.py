@@ -0,0 +1,70 @@
+"""
+Shared fixtures: an app on a fresh in-memory database, the auth headers of
+two registered users, and a counter of the SQL statements the app executes.
+"""
+
+import pytest
+from sqlalchemy import event
+from app import create_app
+from config import TestingConfig
+from models import db
+
+
+class StatementCounter:
+    """before_cursor_execute listener counting statements since reset()"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def register(client, username):
+    """Register a user; returns their Authorization headers"""
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "pw",
+        },
+    )
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def auth_headers(client):
+    return register(client, "tester")
+
+
+@pytest.fixture
+def other_auth_headers(client, auth_headers):
+    """A second user, for checking that users never see each other's data"""
+    return register(client, "other")
+
+
+@pytest.fixture
+def statements(app):
+    counter = StatementCounter()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter)
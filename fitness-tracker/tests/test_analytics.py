@@ -0,0 +1,146 @@
+"""Strength analytics through GET /api/analytics/exercises/<name>"""
+
+import pytest
+
+URL = "/api/analytics/exercises/Bench%20Press"
+
+# (date, [(reps, weight), ...]) per workout
+SESSIONS = [
+    ("2024-01-01", [(5, 100.0), (3, 110.0)]),
+    ("2024-01-08", [(5, 105.0), (1, 130.0)]),
+    ("2024-02-20", [(8, 90.0), (5, 105.0)]),
+]
+
+
+def log_sessions(client, headers, sessions=SESSIONS, name="Bench Press"):
+    ids = []
+    for date, sets in sessions:
+        response = client.post(
+            "/api/workouts",
+            headers=headers,
+            json={
+                "date": f"{date}T10:00:00",
+                "exercises": [
+                    {
+                        "name": name,
+                        "sets": [
+                            {"set_number": n, "reps": reps, "weight": weight}
+                            for n, (reps, weight) in enumerate(sets, start=1)
+                        ],
+                    }
+                ],
+            },
+        )
+        assert response.status_code == 201
+        ids.append(response.get_json()["id"])
+    return ids
+
+
+def get_report(client, headers, url=URL):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_sessions_and_records(client, auth_headers):
+    ids = log_sessions(client, auth_headers)
+
+    report = get_report(client, auth_headers)
+
+    assert report["summary"] == {
+        "sessions": 3,
+        "total_sets": 6,
+        "total_reps": 27,
+        "total_volume": 2730.0,
+        "first_date": "2024-01-01T10:00:00",
+        "last_date": "2024-02-20T10:00:00",
+    }
+    sessions = report["sessions"]
+    assert sessions["workout_id"] == ids
+    assert sessions["sets"] == [2, 2, 2]
+    assert sessions["reps"] == [8, 6, 13]
+    assert sessions["top_weight"] == [110.0, 130.0, 105.0]
+    assert sessions["volume"] == [830.0, 655.0, 1245.0]
+    # Epley: 110 * (1 + 3/30); a single rep counts as the weight itself
+    assert sessions["best_e1rm"] == [121.0, 130.0, 122.5]
+    assert sessions["rolling_volume"] == [830.0, 1485.0, 1245.0]
+    assert sessions["pr"] == [True, True, False]
+
+    records = report["personal_records"]
+    assert records["e1rm"] == {
+        "value": 130.0,
+        "reps": 1,
+        "weight": 130.0,
+        "date": "2024-01-08T10:00:00",
+        "workout_id": ids[1],
+    }
+    assert records["heaviest"]["weight"] == 130.0
+    # 5 x 105 was done twice; the earlier set holds the record
+    assert [
+        (r["reps"], r["weight"], r["workout_id"]) for r in records["rep_maxes"]
+    ] == [
+        (1, 130.0, ids[1]),
+        (3, 110.0, ids[0]),
+        (5, 105.0, ids[1]),
+        (8, 90.0, ids[2]),
+    ]
+
+
+def test_name_matches_regardless_of_case_and_spacing(client, auth_headers):
+    log_sessions(client, auth_headers)
+
+    report = get_report(
+        client, auth_headers, "/api/analytics/exercises/bench%20%20PRESS"
+    )
+
+    assert report["summary"]["sessions"] == 3
+
+
+def test_window_and_days(client, auth_headers):
+    log_sessions(client, auth_headers)
+
+    report = get_report(client, auth_headers, f"{URL}?window=7")
+    assert report["rolling_days"] == 7
+    # 2024-01-01 falls outside the 7 days ending 2024-01-08
+    assert report["sessions"]["rolling_volume"] == [830.0, 655.0, 1245.0]
+
+    # Sessions are only listed from the last day; records still cover all
+    report = get_report(client, auth_headers, f"{URL}?days=1")
+    assert report["sessions"]["workout_id"] == []
+    assert report["summary"]["sessions"] == 3
+    assert report["personal_records"]["e1rm"]["value"] == 130.0
+
+
+@pytest.mark.parametrize(
+    "query, error",
+    [
+        ("window=0", "window must be between 1 and 365"),
+        ("window=366", "window must be between 1 and 365"),
+        ("days=0", "days must be positive"),
+    ],
+)
+def test_invalid_parameters(client, auth_headers, query, error):
+    log_sessions(client, auth_headers)
+
+    response = client.get(f"{URL}?{query}", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_unknown_exercise(client, auth_headers):
+    response = client.get(URL, headers=auth_headers)
+
+    assert response.status_code == 404
+
+
+def test_reports_cover_only_the_callers_sets(client, auth_headers, other_auth_headers):
+    log_sessions(client, auth_headers)
+
+    assert client.get(URL, headers=other_auth_headers).status_code == 404
+
+    log_sessions(client, other_auth_headers, [("2024-03-01", [(5, 60.0)])])
+    report = get_report(client, other_auth_headers)
+    assert report["summary"]["sessions"] == 1
+    assert report["personal_records"]["heaviest"]["weight"] == 60.0
+    assert get_report(client, auth_headers)["summary"]["sessions"] == 3
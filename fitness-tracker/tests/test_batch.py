@@ -0,0 +1,119 @@
+"""POST /api/nutrition/batch and /api/weight/batch"""
+
+from datetime import datetime, timedelta
+from models import Goal
+
+
+def nutrition(calories=2000, **fields):
+    return {"protein": 150, "carbs": 200, "fats": 70, "calories": calories, **fields}
+
+
+def test_nutrition_batch_creates_every_item(client, auth_headers):
+    items = [nutrition(date=f"2024-01-{d:02d}T12:00:00") for d in range(1, 4)]
+
+    response = client.post(
+        "/api/nutrition/batch", headers=auth_headers, json={"items": items}
+    )
+
+    assert response.status_code == 201
+    assert response.get_json() == {"created": 3}
+    logs = client.get("/api/nutrition?days=100000", headers=auth_headers).get_json()
+    assert sorted(log["date"] for log in logs) == [
+        "2024-01-01T12:00:00",
+        "2024-01-02T12:00:00",
+        "2024-01-03T12:00:00",
+    ]
+
+
+def test_weight_batch_creates_every_item(client, auth_headers):
+    items = [{"weight": 180.0, "date": "2024-01-01T07:00:00"}, {"weight": 179.5}]
+
+    response = client.post(
+        "/api/weight/batch", headers=auth_headers, json={"items": items}
+    )
+
+    assert response.status_code == 201
+    assert response.get_json() == {"created": 2}
+    logs = client.get("/api/weight?days=100000", headers=auth_headers).get_json()
+    assert sorted(log["weight"] for log in logs) == [179.5, 180.0]
+
+
+def test_aware_timestamps_count_toward_goals(app, client, auth_headers):
+    response = client.post(
+        "/api/goals",
+        headers=auth_headers,
+        json={"goal_type": "calories", "target_value": 5000, "period": "month"},
+    )
+    assert response.status_code == 201
+    now = datetime.utcnow().replace(microsecond=0)
+    # The same instant, written with an offset two hours ahead of UTC
+    local = (now + timedelta(hours=2)).isoformat() + "+02:00"
+    items = [
+        nutrition(1000, date=now.isoformat() + "Z"),
+        nutrition(1500, date=local),
+    ]
+
+    response = client.post(
+        "/api/nutrition/batch", headers=auth_headers, json={"items": items}
+    )
+
+    assert response.status_code == 201
+    logs = client.get("/api/nutrition", headers=auth_headers).get_json()
+    assert [log["date"] for log in logs] == [now.isoformat()] * 2
+    with app.app_context():
+        assert Goal.query.one().current_value == 2500
+
+
+def test_aware_timestamp_in_weight_batch(client, auth_headers):
+    items = [{"weight": 180.0, "date": "2024-01-01T07:00:00-05:00"}]
+
+    response = client.post(
+        "/api/weight/batch", headers=auth_headers, json={"items": items}
+    )
+
+    assert response.status_code == 201
+    logs = client.get("/api/weight?days=100000", headers=auth_headers).get_json()
+    assert [log["date"] for log in logs] == ["2024-01-01T12:00:00"]
+
+
+def test_invalid_item_rejects_whole_batch(client, auth_headers):
+    items = [nutrition(), nutrition(calories=-1), nutrition(date="yesterday"), "x"]
+
+    response = client.post(
+        "/api/nutrition/batch", headers=auth_headers, json={"items": items}
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"index": 1, "error": "Values must be non-negative"},
+        {"index": 2, "error": "Invalid date format"},
+        {"index": 3, "error": "Item must be an object"},
+    ]
+    assert client.get("/api/nutrition", headers=auth_headers).get_json() == []
+
+
+def test_batch_body_validation(app, client, auth_headers):
+    for body in ({}, {"items": []}, {"items": "x"}):
+        response = client.post("/api/weight/batch", headers=auth_headers, json=body)
+        assert response.status_code == 400
+
+    app.config["BATCH_MAX_ITEMS"] = 2
+    response = client.post(
+        "/api/weight/batch",
+        headers=auth_headers,
+        json={"items": [{"weight": 180.0}] * 3},
+    )
+    assert response.status_code == 413
+
+
+def test_batch_rows_belong_to_the_caller(client, auth_headers, other_auth_headers):
+    client.post(
+        "/api/nutrition/batch", headers=auth_headers, json={"items": [nutrition()]}
+    )
+    client.post(
+        "/api/weight/batch", headers=auth_headers, json={"items": [{"weight": 180.0}]}
+    )
+
+    assert client.get("/api/nutrition", headers=other_auth_headers).get_json() == []
+    assert client.get("/api/weight", headers=other_auth_headers).get_json() == []
+    assert len(client.get("/api/nutrition", headers=auth_headers).get_json()) == 1
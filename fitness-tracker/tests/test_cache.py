@@ -0,0 +1,91 @@
+"""Response cache and ETags against writes made outside the request handlers"""
+
+from datetime import datetime
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, User, Workout
+from tests.test_workouts import log_workouts
+
+URL = "/api/workouts?days=100000"
+
+
+class CachedTestingConfig(TestingConfig):
+    RESPONSE_CACHE_ENABLED = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(CachedTestingConfig)
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+def write_from_another_process(app):
+    """Insert a workout the way a CLI command or other worker would"""
+    with app.app_context():
+        user = User.query.filter_by(username="tester").one()
+        db.session.add(Workout(user_id=user.id, date=datetime(2024, 2, 1, 10)))
+        db.session.commit()
+
+
+def test_cache_hit_skips_the_view(client, auth_headers, statements):
+    log_workouts(client, auth_headers, 3)
+
+    statements.reset()
+    first = client.get(URL, headers=auth_headers)
+    miss = statements.count
+
+    statements.reset()
+    second = client.get(URL, headers=auth_headers)
+    assert second.get_data() == first.get_data()
+    assert statements.count < miss
+
+
+def test_out_of_process_write_changes_body_and_etag(app, client, auth_headers):
+    log_workouts(client, auth_headers, 2)
+    before = client.get(URL, headers=auth_headers)
+    assert len(before.get_json()) == 2
+
+    write_from_another_process(app)
+
+    after = client.get(URL, headers=auth_headers)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert len(after.get_json()) == 3
+
+    # The new ETag belongs to the new body: revalidating with it is a 304,
+    # with the old one a fresh 200
+    fresh = client.get(
+        URL, headers={**auth_headers, "If-None-Match": after.headers["ETag"]}
+    )
+    assert fresh.status_code == 304
+    stale = client.get(
+        URL, headers={**auth_headers, "If-None-Match": before.headers["ETag"]}
+    )
+    assert stale.status_code == 200
+    assert len(stale.get_json()) == 3
+
+
+def test_item_view_follows_out_of_process_writes(app, client, auth_headers):
+    log_workouts(client, auth_headers, 1)
+    workout_id = client.get(URL, headers=auth_headers).get_json()[0]["id"]
+    item_url = f"/api/workouts/{workout_id}"
+
+    before = client.get(item_url, headers=auth_headers)
+    assert before.status_code == 200
+
+    with app.app_context():
+        workout = db.session.get(Workout, workout_id)
+        workout.date = datetime(2024, 3, 1, 10)
+        db.session.commit()
+
+    after = client.get(item_url, headers=auth_headers)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.get_json()["date"] == "2024-03-01T10:00:00"
+
+    with app.app_context():
+        db.session.delete(db.session.get(Workout, workout_id))
+        db.session.commit()
+
+    assert client.get(item_url, headers=auth_headers).status_code == 404
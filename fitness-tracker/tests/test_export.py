@@ -0,0 +1,113 @@
+"""Streaming history export through GET /api/export"""
+
+import csv
+import io
+import json
+import pytest
+import exporter
+from exporter import EXPORT_CSV_COLUMNS
+from tests.test_import import post_import
+from tests.test_sync import log_weights
+from tests.test_workouts import log_workouts
+
+
+def log_history(client, headers):
+    log_workouts(client, headers, 3, exercises=2, sets=2)
+    log_weights(client, headers, 2)
+    response = client.post(
+        "/api/nutrition",
+        headers=headers,
+        json={
+            "protein": 150,
+            "carbs": 200,
+            "fats": 70,
+            "calories": 2100,
+            "date": "2024-01-01T12:00:00",
+        },
+    )
+    assert response.status_code == 201
+    response = client.post(
+        "/api/goals",
+        headers=headers,
+        json={"goal_type": "workout_count", "target_value": 10, "period": "month"},
+    )
+    assert response.status_code == 201
+    response = client.post(
+        "/api/templates",
+        headers=headers,
+        json={"name": "Leg Day", "exercises": [{"name": "Squat", "sets": 5}]},
+    )
+    assert response.status_code == 201
+
+
+def export(client, headers, fmt):
+    response = client.get(f"/api/export?format={fmt}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"].endswith(f"fitness-export.{fmt}")
+    return response.get_data(as_text=True)
+
+
+def jsonl_types(body):
+    return [json.loads(line)["type"] for line in body.splitlines()]
+
+
+def test_jsonl_export_holds_every_record(monkeypatch, client, auth_headers):
+    log_history(client, auth_headers)
+    # Several batches and flushes per resource
+    monkeypatch.setattr(exporter, "EXPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(exporter, "FLUSH_BYTES", 100)
+
+    body = export(client, auth_headers, "jsonl")
+
+    assert jsonl_types(body) == (
+        ["workout"] * 3 + ["nutrition"] + ["weight"] * 2 + ["goal", "template"]
+    )
+    workout = json.loads(body.splitlines()[0])
+    assert [len(e["sets"]) for e in workout["exercises"]] == [2, 2]
+
+
+def test_csv_export_flattens_sets(client, auth_headers):
+    log_history(client, auth_headers)
+
+    rows = list(csv.DictReader(io.StringIO(export(client, auth_headers, "csv"))))
+
+    assert list(rows[0]) == EXPORT_CSV_COLUMNS
+    types = [row["type"] for row in rows]
+    assert types.count("set") == 3 * 2 * 2
+    assert types.count("template_exercise") == 1
+    assert {"nutrition", "weight", "goal"} <= set(types)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_export_imports_into_another_account(
+    client, auth_headers, other_auth_headers, fmt
+):
+    log_history(client, auth_headers)
+
+    body = export(client, auth_headers, fmt)
+    response = post_import(client, other_auth_headers, body, fmt)
+
+    assert response.status_code == 201
+    for resource in ("workouts", "nutrition", "weight"):
+        url = f"/api/{resource}?days=100000"
+        mine = client.get(url, headers=auth_headers).get_json()
+        copied = client.get(url, headers=other_auth_headers).get_json()
+        assert len(copied) == len(mine)
+
+
+def test_export_format_is_validated(client, auth_headers):
+    response = client.get("/api/export?format=xml", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert "jsonl, csv" in response.get_json()["error"]
+    assert client.get("/api/export").status_code == 401
+
+
+def test_export_holds_only_the_callers_records(
+    client, auth_headers, other_auth_headers
+):
+    log_history(client, auth_headers)
+
+    assert export(client, other_auth_headers, "jsonl") == ""
+    rows = list(csv.DictReader(io.StringIO(export(client, other_auth_headers, "csv"))))
+    assert rows == []
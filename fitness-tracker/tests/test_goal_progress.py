@@ -0,0 +1,122 @@
+"""Goal progress and completion"""
+
+from types import SimpleNamespace
+import pytest
+from goal_progress import check_goals, progress_percent
+
+
+def goal(goal_type, target, current, start=None):
+    return SimpleNamespace(
+        goal_type=goal_type,
+        target_value=target,
+        current_value=current,
+        start_value=start,
+    )
+
+
+@pytest.mark.parametrize(
+    "start, current, expected",
+    [
+        (190, 190, 0),
+        (190, 180, 50),
+        (190, 170, 100),
+        (190, 165, 100),  # past the target
+        (190, 195, 0),  # moved away from it
+        (150, 160, 50),  # weight gain
+    ],
+)
+def test_weight_progress_runs_from_start_to_target(start, current, expected):
+    assert progress_percent(goal("weight", 170, current, start)) == expected
+
+
+def test_weight_progress_without_start_is_zero():
+    assert progress_percent(goal("weight", 170, 180)) == 0
+
+
+@pytest.mark.parametrize("current, expected", [(0, 0), (6, 50), (12, 100), (20, 100)])
+def test_count_progress_is_share_of_target(current, expected):
+    assert progress_percent(goal("workout_count", 12, current)) == expected
+
+
+def log_workout(client, headers):
+    response = client.post(
+        "/api/workouts",
+        headers=headers,
+        json={
+            "exercises": [
+                {"name": "Squat", "sets": [{"set_number": 1, "reps": 5, "weight": 100}]}
+            ]
+        },
+    )
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def get_goal(client, headers, goal_id):
+    return client.get(f"/api/goals/{goal_id}", headers=headers).get_json()
+
+
+def test_deleting_a_log_uncompletes_the_goal(app, client, auth_headers):
+    response = client.post(
+        "/api/goals",
+        headers=auth_headers,
+        json={"goal_type": "workout_count", "target_value": 1, "period": "month"},
+    )
+    goal_id = response.get_json()["id"]
+
+    workout_id = log_workout(client, auth_headers)
+    assert get_goal(client, auth_headers, goal_id)["completed"] is True
+
+    client.delete(f"/api/workouts/{workout_id}", headers=auth_headers)
+    goal = get_goal(client, auth_headers, goal_id)
+    assert goal["current_value"] == 0
+    assert goal["completed"] is False
+
+    with app.app_context():
+        assert check_goals() == []
+
+
+def test_marked_complete_survives_later_logs(app, client, auth_headers):
+    response = client.post(
+        "/api/goals",
+        headers=auth_headers,
+        json={"goal_type": "workout_count", "target_value": 5, "period": "month"},
+    )
+    goal_id = response.get_json()["id"]
+
+    response = client.put(
+        f"/api/goals/{goal_id}", headers=auth_headers, json={"completed": True}
+    )
+    assert response.get_json()["completed"] is True
+
+    workout_id = log_workout(client, auth_headers)
+    client.delete(f"/api/workouts/{workout_id}", headers=auth_headers)
+    goal = get_goal(client, auth_headers, goal_id)
+    assert goal["completed"] is True
+    assert goal["marked_complete"] is True
+    with app.app_context():
+        assert check_goals() == []
+
+    # Removing the mark hands completion back to progress
+    response = client.put(
+        f"/api/goals/{goal_id}", headers=auth_headers, json={"completed": False}
+    )
+    assert response.get_json()["completed"] is False
+    log_workout(client, auth_headers)
+    assert get_goal(client, auth_headers, goal_id)["completed"] is False
+
+
+def test_weight_goal_reports_progress_from_start(client, auth_headers):
+    client.post("/api/weight", headers=auth_headers, json={"weight": 190})
+    response = client.post(
+        "/api/goals",
+        headers=auth_headers,
+        json={"goal_type": "weight", "target_value": 170, "period": "month"},
+    )
+    goal_id = response.get_json()["id"]
+    assert response.get_json()["progress_percent"] == 0
+
+    client.post("/api/weight", headers=auth_headers, json={"weight": 185})
+
+    # current / target would claim 108.8%
+    assert get_goal(client, auth_headers, goal_id)["progress_percent"] == 25.0
@@ -0,0 +1,151 @@
+"""POST /api/import and importer.run_import"""
+
+import io
+import json
+from datetime import datetime
+import pytest
+from models import db, Goal, ImportRun, User
+from importer import run_import, start_import
+from jobs import JobCancelled
+
+CSV = """type,date,workout,exercise,set_number,reps,weight,protein,carbs,fats,calories
+nutrition,2024-01-01T12:00:00,,,,,,150,200,70,2100
+weight,2024-01-01T07:00:00,,,,,180.5,,,,
+set,2024-01-02T10:00:00,w1,Squat,1,5,100,,,,
+set,2024-01-02T10:00:00,w1,Squat,2,5,100,,,,
+set,2024-01-02T10:00:00,w1,Bench Press,1,5,80,,,,
+"""
+
+
+def jsonl(*records):
+    return "\n".join(json.dumps(r) for r in records) + "\n"
+
+
+def post_import(client, headers, body, fmt, **args):
+    query = "&".join(f"{k}={v}" for k, v in {"format": fmt, **args}.items())
+    return client.post(f"/api/import?{query}", headers=headers, data=body.encode())
+
+
+def test_csv_import_writes_every_record(client, auth_headers):
+    response = post_import(client, auth_headers, CSV, "csv")
+
+    assert response.status_code == 201
+    assert response.get_json()["records_done"] == 3
+    workouts = client.get("/api/workouts?days=100000", headers=auth_headers).get_json()
+    assert [(e["name"], len(e["sets"])) for e in workouts[0]["exercises"]] == [
+        ("Squat", 2),
+        ("Bench Press", 1),
+    ]
+    nutrition = client.get("/api/nutrition?days=100000", headers=auth_headers)
+    assert [log["calories"] for log in nutrition.get_json()] == [2100]
+    weight = client.get("/api/weight?days=100000", headers=auth_headers)
+    assert [log["weight"] for log in weight.get_json()] == [180.5]
+
+
+def test_aware_date_in_jsonl_import(app, client, auth_headers):
+    client.post(
+        "/api/goals",
+        headers=auth_headers,
+        json={"goal_type": "calories", "target_value": 5000, "period": "month"},
+    )
+    now = datetime.utcnow().replace(microsecond=0)
+    body = jsonl(
+        {
+            "type": "nutrition",
+            "date": now.isoformat() + "Z",
+            "protein": 1,
+            "carbs": 1,
+            "fats": 1,
+            "calories": 1200,
+        },
+        {
+            "type": "workout",
+            "date": now.isoformat() + "+00:00",
+            "exercises": [
+                {"name": "Squat", "sets": [{"set_number": 1, "reps": 5, "weight": 1}]}
+            ],
+        },
+    )
+
+    response = post_import(client, auth_headers, body, "jsonl")
+
+    assert response.status_code == 201
+    logs = client.get("/api/nutrition", headers=auth_headers).get_json()
+    assert [log["date"] for log in logs] == [now.isoformat()]
+    with app.app_context():
+        assert Goal.query.one().current_value == 1200
+
+
+def test_invalid_record_fails_with_its_line(client, auth_headers):
+    body = jsonl(
+        {"type": "weight", "weight": 180, "date": "2024-01-01T07:00:00"},
+        {"type": "weight", "weight": -1},
+    )
+
+    response = post_import(client, auth_headers, body, "jsonl")
+
+    assert response.status_code == 400
+    run = response.get_json()
+    assert run["status"] == "failed"
+    assert run["error"] == "line 2: Weight must be positive"
+
+
+def test_failed_import_resumes_where_it_stopped(app, client, auth_headers):
+    good = {"type": "weight", "weight": 180, "date": "2024-01-01T07:00:00"}
+    with app.app_context():
+        user = User.query.filter_by(username="tester").one()
+        run = start_import(user.id, "jsonl")
+        bad = jsonl(good, {"type": "weight", "weight": -1})
+        run_import(run, io.StringIO(bad), chunk_size=1)
+        assert (run.status, run.records_done) == ("failed", 1)
+        run_id = run.id
+
+    fixed = jsonl(good, {"type": "weight", "weight": 179})
+    response = post_import(client, auth_headers, fixed, "jsonl", resume=run_id)
+
+    assert response.status_code == 201
+    weight = client.get("/api/weight?days=100000", headers=auth_headers).get_json()
+    assert sorted(log["weight"] for log in weight) == [179, 180]
+
+
+def test_request_validation(client, auth_headers, other_auth_headers):
+    assert post_import(client, auth_headers, CSV, "xml").status_code == 400
+    assert post_import(client, auth_headers, "", "csv", resume=999).status_code == 404
+
+    run_id = post_import(client, auth_headers, CSV, "csv").get_json()["id"]
+    response = post_import(client, auth_headers, CSV, "csv", resume=run_id)
+    assert response.status_code == 400
+
+
+def test_imports_belong_to_the_caller(client, auth_headers, other_auth_headers):
+    run_id = post_import(client, auth_headers, CSV, "csv").get_json()["id"]
+
+    assert client.get(f"/api/import/{run_id}", headers=auth_headers).status_code == 200
+    other = client.get(f"/api/import/{run_id}", headers=other_auth_headers)
+    assert other.status_code == 404
+    response = post_import(client, other_auth_headers, CSV, "csv", resume=run_id)
+    assert response.status_code == 404
+    assert client.get("/api/workouts", headers=other_auth_headers).get_json() == []
+
+
+def test_cancelled_import_is_not_failed(app, auth_headers):
+    checks = []
+
+    def check_cancelled():
+        checks.append(1)
+        if len(checks) > 1:
+            raise JobCancelled()
+
+    body = jsonl(
+        *[{"type": "weight", "weight": 180 - n, "date": "2024-01-01"} for n in range(3)]
+    )
+    with app.app_context():
+        user = User.query.filter_by(username="tester").one()
+        run = start_import(user.id, "jsonl")
+        with pytest.raises(JobCancelled):
+            run_import(
+                run, io.StringIO(body), chunk_size=2, check_cancelled=check_cancelled
+            )
+
+        run = db.session.get(ImportRun, run.id)
+        assert (run.status, run.records_done, run.error) == ("cancelled", 2, None)
@@ -0,0 +1,85 @@
+"""The list and child-row queries are planned on the composite / FK indexes"""
+
+from datetime import datetime
+import pytest
+from sqlalchemy import select
+from models import (
+    db,
+    Goal,
+    NutritionLog,
+    TemplateExercise,
+    WeightLog,
+    Workout,
+    WorkoutExercise,
+    WorkoutSet,
+    WorkoutTemplate,
+)
+
+CUTOFF = datetime(2024, 1, 1)
+
+
+def query_plan(statement):
+    """SQLite's EXPLAIN QUERY PLAN details for statement, one line per step"""
+    compiled = statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}", params
+    )
+    return [row[3] for row in rows]
+
+
+@pytest.mark.parametrize(
+    "model, index",
+    [
+        (Workout, "ix_workouts_user_id_date"),
+        (NutritionLog, "ix_nutrition_logs_user_id_date"),
+        (WeightLog, "ix_weight_logs_user_id_date"),
+    ],
+)
+def test_date_range_lists_use_user_date_index(app, model, index):
+    statement = (
+        select(model)
+        .where(model.user_id == 1, model.date >= CUTOFF)
+        .order_by(model.date.desc())
+    )
+    with app.app_context():
+        plan = query_plan(statement)
+
+    assert any(f"INDEX {index} (user_id=? AND date>?)" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+@pytest.mark.parametrize(
+    "model, index",
+    [
+        (Goal, "ix_goals_user_id_created_at"),
+        (WorkoutTemplate, "ix_workout_templates_user_id_created_at"),
+    ],
+)
+def test_created_at_lists_use_user_created_at_index(app, model, index):
+    statement = (
+        select(model).where(model.user_id == 1).order_by(model.created_at.desc())
+    )
+    with app.app_context():
+        plan = query_plan(statement)
+
+    assert any(f"INDEX {index} (user_id=?)" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+@pytest.mark.parametrize(
+    "column, index",
+    [
+        (WorkoutExercise.workout_id, "ix_workout_exercises_workout_id"),
+        (WorkoutSet.exercise_id, "ix_workout_sets_exercise_id"),
+        (TemplateExercise.template_id, "ix_template_exercises_template_id"),
+    ],
+)
+def test_child_rows_use_foreign_key_index(app, column, index):
+    statement = select(column.class_).where(column.in_([1, 2, 3]))
+    with app.app_context():
+        plan = query_plan(statement)
+
+    assert any(f"INDEX {index} ({column.key}=?)" in step for step in plan)
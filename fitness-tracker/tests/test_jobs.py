@@ -0,0 +1,129 @@
+"""Job leases, retry backoff and job file cleanup"""
+
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Job, User
+from jobs import JobRunner, job_handler, job_files_dir
+
+calls = []
+
+
+@job_handler("test_ok")
+def ok_job(ctx, params):
+    calls.append(ctx.job_id)
+    return {"ok": True}
+
+
+@job_handler("test_boom")
+def boom_job(ctx, params):
+    calls.append(ctx.job_id)
+    raise RuntimeError("boom")
+
+
+@pytest.fixture
+def app(tmp_path):
+    class JobsTestingConfig(TestingConfig):
+        # Job threads need a database they can share
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'jobs.db'}"
+        JOB_FILES_DIR = str(tmp_path / "job_files")
+
+    app = create_app(JobsTestingConfig)
+    with app.app_context():
+        db.session.add(User(username="tester", email="t@example.com", password="x"))
+        db.session.commit()
+    calls.clear()
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def runner(app):
+    runner = JobRunner(app, workers=1, lease=60, retry_backoff=30)
+    yield runner
+    runner.shutdown()
+
+
+def add_job(app, kind="test_ok", params="{}", **columns):
+    with app.app_context():
+        job = Job(user_id=1, kind=kind, params=params, **columns)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def job_row(app, job_id):
+    with app.app_context():
+        return db.session.get(Job, job_id)
+
+
+def run_poll(runner):
+    runner.poll()
+    runner.executor.shutdown(wait=True)
+
+
+def test_only_lapsed_leases_are_requeued(app, runner):
+    now = datetime.utcnow()
+    live = add_job(
+        app, status="running", attempts=1, lease_expires_at=now + timedelta(minutes=1)
+    )
+    lapsed = add_job(
+        app, status="running", attempts=1, lease_expires_at=now - timedelta(seconds=1)
+    )
+    exhausted = add_job(
+        app,
+        status="running",
+        attempts=3,
+        lease_expires_at=now - timedelta(seconds=1),
+    )
+
+    run_poll(runner)
+
+    # Another process still holds the live lease; the lapsed job runs here once
+    assert job_row(app, live).status == "running"
+    assert calls == [lapsed]
+    assert job_row(app, lapsed).status == "succeeded"
+    assert job_row(app, lapsed).attempts == 2
+    assert job_row(app, exhausted).status == "failed"
+
+
+def test_retry_waits_for_backoff(app, runner):
+    job_id = add_job(app, kind="test_boom")
+
+    runner._run(job_id)
+    job = job_row(app, job_id)
+    assert job.status == "queued"
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=25)
+
+    # Not due yet: neither a poll nor a stray submission runs it
+    runner._run(job_id)
+    run_poll(runner)
+    assert calls == [job_id]
+
+    with app.app_context():
+        db.session.get(Job, job_id).run_after = datetime.utcnow()
+        db.session.commit()
+    runner._run(job_id)
+    job = job_row(app, job_id)
+    assert calls == [job_id, job_id]
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=55)
+
+
+def test_expired_job_files_are_removed(app, runner):
+    directory = job_files_dir(app)
+    old = time.time() - 25 * 3600
+    for name in ("export-1.csv", "upload-pending.jsonl", "export-2.csv"):
+        open(os.path.join(directory, name), "w").close()
+    os.utime(os.path.join(directory, "export-1.csv"), (old, old))
+    os.utime(os.path.join(directory, "upload-pending.jsonl"), (old, old))
+    add_job(app, kind="import", params='{"file": "upload-pending.jsonl"}')
+
+    with app.app_context():
+        removed = runner.remove_expired_files()
+
+    assert removed == ["export-1.csv"]
+    assert sorted(os.listdir(directory)) == ["export-2.csv", "upload-pending.jsonl"]
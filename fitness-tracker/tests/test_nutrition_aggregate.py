@@ -0,0 +1,157 @@
+"""Macro totals per day, week and month through GET /api/nutrition/aggregate"""
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from buckets import date_bucket
+from models import NutritionLog
+
+URL = "/api/nutrition/aggregate"
+
+
+def log_meal(client, headers, date, calories=1000.0, protein=50.0):
+    response = client.post(
+        "/api/nutrition",
+        headers=headers,
+        json={
+            "protein": protein,
+            "carbs": 100,
+            "fats": 30,
+            "calories": calories,
+            "date": date,
+        },
+    )
+    assert response.status_code == 201
+
+
+def aggregate(client, headers, query):
+    response = client.get(f"{URL}?{query}", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def starts(body):
+    return [(b["start"], b["logs"]) for b in body["buckets"]]
+
+
+def test_totals_and_daily_averages(client, auth_headers):
+    log_meal(client, auth_headers, "2024-01-08T08:00:00", 500, protein=30)
+    log_meal(client, auth_headers, "2024-01-08T19:00:00", 1500, protein=90)
+    log_meal(client, auth_headers, "2024-01-10T12:00:00", 1000, protein=45)
+
+    body = aggregate(client, auth_headers, "bucket=week&from=2024-01-01&to=2024-01-31")
+
+    assert (body["bucket"], body["from"], body["to"]) == (
+        "week",
+        "2024-01-01",
+        "2024-01-31",
+    )
+    [week] = body["buckets"]
+    assert (week["start"], week["logs"], week["days"]) == ("2024-01-08", 3, 2)
+    assert week["totals"] == {
+        "protein": 165.0,
+        "carbs": 300.0,
+        "fats": 90.0,
+        "calories": 3000.0,
+    }
+    # Averaged over the 2 days with logs, not the 7 of the week
+    assert week["daily_average"]["calories"] == 1500.0
+    assert week["daily_average"]["protein"] == 82.5
+
+
+def test_day_boundaries(client, auth_headers):
+    log_meal(client, auth_headers, "2024-01-01T00:00:00")
+    log_meal(client, auth_headers, "2024-01-01T23:59:59")
+    log_meal(client, auth_headers, "2024-01-02T00:00:00")
+
+    body = aggregate(client, auth_headers, "bucket=day&from=2024-01-01&to=2024-01-02")
+
+    assert starts(body) == [("2024-01-01", 2), ("2024-01-02", 1)]
+
+
+def test_week_boundaries(client, auth_headers):
+    # Sunday 2023-12-31 closes the week of Monday 2023-12-25
+    log_meal(client, auth_headers, "2023-12-31T23:59:59")
+    log_meal(client, auth_headers, "2024-01-01T00:00:00")  # Monday
+    log_meal(client, auth_headers, "2024-01-07T23:59:59")  # Sunday
+    log_meal(client, auth_headers, "2024-01-08T00:00:00")  # Monday
+
+    body = aggregate(client, auth_headers, "bucket=week&from=2023-12-25&to=2024-01-14")
+
+    assert starts(body) == [
+        ("2023-12-25", 1),
+        ("2024-01-01", 2),
+        ("2024-01-08", 1),
+    ]
+
+
+def test_month_boundaries(client, auth_headers):
+    log_meal(client, auth_headers, "2024-01-31T23:59:59")
+    log_meal(client, auth_headers, "2024-02-01T00:00:00")
+    log_meal(client, auth_headers, "2024-02-29T12:00:00")  # leap day
+    log_meal(client, auth_headers, "2024-03-01T00:00:00")
+    # 23:30 on Jan 31 at UTC-1 is Feb 1 in UTC
+    log_meal(client, auth_headers, "2024-01-31T23:30:00-01:00")
+
+    body = aggregate(client, auth_headers, "bucket=month&from=2024-01-01&to=2024-03-31")
+
+    assert starts(body) == [
+        ("2024-01-01", 1),
+        ("2024-02-01", 3),
+        ("2024-03-01", 1),
+    ]
+
+
+def test_range_is_inclusive_of_whole_days(client, auth_headers):
+    log_meal(client, auth_headers, "2024-01-09T23:59:59")
+    log_meal(client, auth_headers, "2024-01-10T00:00:00")
+    log_meal(client, auth_headers, "2024-01-12T23:59:59")
+    log_meal(client, auth_headers, "2024-01-13T00:00:00")
+
+    body = aggregate(client, auth_headers, "bucket=day&from=2024-01-10&to=2024-01-12")
+
+    assert starts(body) == [("2024-01-10", 1), ("2024-01-12", 1)]
+
+
+def test_defaults_to_days_of_the_last_year(client, auth_headers):
+    body = aggregate(client, auth_headers, "")
+
+    assert body["bucket"] == "day"
+    assert body["buckets"] == []
+    assert body["from"] < body["to"]
+
+
+@pytest.mark.parametrize(
+    "query, error",
+    [
+        ("bucket=year", "bucket must be one of: day, week, month"),
+        ("from=yesterday", "Invalid date format"),
+        ("from=2024-02-01&to=2024-01-01", "from must not be after to"),
+    ],
+)
+def test_invalid_parameters(client, auth_headers, query, error):
+    response = client.get(f"{URL}?{query}", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_aggregate_covers_only_the_callers_logs(
+    client, auth_headers, other_auth_headers
+):
+    log_meal(client, auth_headers, "2024-01-08T08:00:00")
+    log_meal(client, other_auth_headers, "2024-01-08T09:00:00", 700)
+
+    query = "bucket=month&from=2024-01-01&to=2024-01-31"
+    mine = aggregate(client, auth_headers, query)["buckets"]
+    theirs = aggregate(client, other_auth_headers, query)["buckets"]
+
+    assert [b["totals"]["calories"] for b in mine] == [1000.0]
+    assert [b["totals"]["calories"] for b in theirs] == [700.0]
+
+
+def test_postgresql_buckets_use_date_trunc():
+    column = date_bucket("week", NutritionLog.date)
+
+    sql = str(column.compile(dialect=postgresql.dialect()))
+
+    assert sql == "CAST(date_trunc('week', nutrition_logs.date) AS DATE)"
@@ -0,0 +1,97 @@
+"""Routing GET reads to a read replica, with read-your-writes stickiness"""
+
+import pytest
+from sqlalchemy import insert, select
+from app import create_app
+from config import TestingConfig
+from models import db, Workout
+from replicas import REPLICA_BIND, copy_to_replica, sticky_writes
+from tests.conftest import register
+from tests.test_workouts import log_workouts
+
+
+@pytest.fixture
+def app(tmp_path):
+    class ReplicaTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        DATABASE_REPLICA_URL = f"sqlite:///{tmp_path / 'replica.db'}"
+
+    app = create_app(ReplicaTestingConfig)
+    sticky_writes.clear()
+    yield app
+    sticky_writes.clear()
+    with app.app_context():
+        db.session.remove()
+
+
+def refresh_replica(app):
+    with app.app_context():
+        copy_to_replica(db)
+
+
+def workout_count(client, headers):
+    response = client.get("/api/workouts?days=100000", headers=headers)
+    assert response.status_code == 200
+    return len(response.get_json())
+
+
+def test_get_reads_the_replica(app, client, auth_headers):
+    refresh_replica(app)
+    log_workouts(client, auth_headers, 2, exercises=1, sets=1)
+    sticky_writes.clear()
+
+    # The replica has not caught up with the primary yet
+    assert workout_count(client, auth_headers) == 0
+    refresh_replica(app)
+    assert workout_count(client, auth_headers) == 2
+
+
+def test_writer_reads_the_primary(app, client, auth_headers):
+    refresh_replica(app)
+
+    log_workouts(client, auth_headers, 2, exercises=1, sets=1)
+
+    assert workout_count(client, auth_headers) == 2
+
+
+def test_writes_inside_a_get_go_to_the_primary(app):
+    with app.test_request_context("/api/workouts", method="GET"):
+        primary, replica = db.engines[None], db.engines[REPLICA_BIND]
+        assert db.session.get_bind(clause=select(Workout)) is replica
+        assert db.session.get_bind(clause=insert(Workout)) is primary
+
+    with app.test_request_context("/api/workouts", method="POST"):
+        assert db.session.get_bind(clause=select(Workout)) is primary
+
+
+def test_failed_write_is_not_sticky(app, client, auth_headers):
+    refresh_replica(app)
+    sticky_writes.clear()
+
+    response = client.post("/api/workouts", headers=auth_headers, json={})
+
+    assert response.status_code == 400
+    # The first registered user is user 1
+    assert not sticky_writes.is_sticky("1")
+
+
+def test_stickiness_is_per_user(app, client, auth_headers):
+    other_headers = register(client, "other")
+    refresh_replica(app)
+    sticky_writes.clear()
+    log_workouts(client, other_headers, 1, exercises=1, sets=1)
+    log_workouts(client, auth_headers, 1, exercises=1, sets=1)
+    sticky_writes.clear()
+    log_workouts(client, auth_headers, 1, exercises=1, sets=1)
+
+    # Only the user who just wrote reads the primary
+    assert workout_count(client, auth_headers) == 2
+    assert workout_count(client, other_headers) == 0
+
+
+def test_copy_to_replica_needs_a_replica():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        with pytest.raises(ValueError, match="DATABASE_REPLICA_URL"):
+            copy_to_replica(db)
@@ -0,0 +1,88 @@
+"""Moving a user between shards, as seen by a sync client"""
+
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+import shard_directory
+from app import create_app
+from config import TestingConfig
+from models import db, Workout
+from shard_directory import MoveConflict, directory_entry, move_user, shard_for_user
+from shards import using_shard
+from tests.test_workouts import log_workouts
+
+
+@pytest.fixture
+def app(tmp_path):
+    class ShardedTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'shard0.db'}"
+        DATABASE_SHARD_URLS = f"sqlite:///{tmp_path / 'shard1.db'}"
+
+    app = create_app(ShardedTestingConfig)
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+def register(client, name):
+    response = client.post(
+        "/api/auth/register",
+        json={"username": name, "email": f"{name}@example.com", "password": "pw"},
+    )
+    body = response.get_json()
+    return body["user_id"], {"Authorization": f"Bearer {body['access_token']}"}
+
+
+def test_move_never_deletes_a_reused_id(app, client):
+    _, first_headers = register(client, "first")
+    user_id, headers = register(client, "second")
+    with app.app_context():
+        assert shard_for_user(user_id) == 1
+
+    # Shard 0 already used workout id 1, so ids 1-3 become 2-4 there
+    log_workouts(client, first_headers, 1, exercises=1, sets=1)
+    log_workouts(client, headers, 3, exercises=1, sets=1)
+    token = client.get("/api/sync", headers=headers).get_json()["next_token"]
+
+    with app.app_context():
+        move_user(user_id, 0)
+
+    changes = client.get(f"/api/sync?since={token}", headers=headers).get_json()
+    workouts = changes["changes"]["workouts"]
+    sent = {w["id"] for w in workouts["created"] + workouts["updated"]}
+    assert sent == {2, 3, 4}
+    assert workouts["deleted"] == [1]
+
+
+def test_write_during_copy_aborts_the_move(app, client, monkeypatch):
+    register(client, "first")
+    user_id, headers = register(client, "second")
+    log_workouts(client, headers, 2, exercises=1, sets=1)
+    copy_user_rows = shard_directory.copy_user_rows
+
+    def copy_then_write(source, target, user_id):
+        copied = copy_user_rows(source, target, user_id)
+        # A request that resolved the old shard before the move commits now
+        source.execute(
+            insert(Workout.__table__).values(user_id=user_id, date=datetime(2024, 2, 1))
+        )
+        source.commit()
+        return copied
+
+    monkeypatch.setattr(shard_directory, "copy_user_rows", copy_then_write)
+    with app.app_context():
+        with pytest.raises(MoveConflict):
+            move_user(user_id, 0)
+        assert shard_for_user(user_id) == 1
+        assert not directory_entry(user_id).moving
+        with using_shard(0):
+            assert Workout.query.filter_by(user_id=user_id).count() == 0
+
+    workouts = client.get("/api/workouts?days=100000", headers=headers).get_json()
+    assert len(workouts) == 3
+
+    monkeypatch.undo()
+    with app.app_context():
+        move_user(user_id, 0)
+    workouts = client.get("/api/workouts?days=100000", headers=headers).get_json()
+    assert len(workouts) == 3
@@ -0,0 +1,63 @@
+"""Suggestion index writes that race with an index build"""
+
+import pytest
+import suggest
+from suggest import PrefixIndex, SuggestionIndexes
+
+
+@pytest.fixture
+def indexes():
+    return SuggestionIndexes()
+
+
+def building_with(monkeypatch, during_build):
+    """Make index builds return the database's old state after during_build()"""
+    builds = []
+
+    def load_user_index(user_id):
+        builds.append(user_id)
+        index = PrefixIndex()
+        index.add("Squat")
+        during_build()
+        return index
+
+    monkeypatch.setattr(suggest, "load_user_index", load_user_index)
+    return builds
+
+
+def names(indexes, prefix=""):
+    return [
+        s["name"] for s in indexes.suggest(1, prefix, 10) if s["source"] == "history"
+    ]
+
+
+def test_write_during_build_is_kept(monkeypatch, indexes):
+    builds = building_with(
+        monkeypatch, lambda: indexes.record(1, added=["Zercher Squat"])
+    )
+
+    assert "Zercher Squat" in names(indexes, "z")
+    # Stored with the write applied: the next lookup doesn't rebuild
+    assert "Zercher Squat" in names(indexes, "z")
+    assert builds == [1]
+
+
+def test_forget_during_build_discards_it(monkeypatch, indexes):
+    builds = building_with(monkeypatch, lambda: indexes.forget(1))
+
+    names(indexes)
+    names(indexes)
+
+    assert builds == [1, 1]
+
+
+def test_failed_build_is_not_stored(monkeypatch, indexes):
+    def load_user_index(user_id):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(suggest, "load_user_index", load_user_index)
+    with pytest.raises(RuntimeError):
+        indexes.suggest(1, "", 10)
+
+    indexes.record(1, added=["Squat"])
+    assert indexes._pending == {}
@@ -0,0 +1,53 @@
+"""Exercise validation of the template endpoints"""
+
+import pytest
+from models import Exercise
+
+
+def create_template(client, headers):
+    response = client.post(
+        "/api/templates",
+        headers=headers,
+        json={"name": "Leg Day", "exercises": [{"name": "Squat", "sets": 5}]},
+    )
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+@pytest.mark.parametrize(
+    "exercises",
+    [
+        [{"name": "   ", "sets": 3}],
+        [{"sets": 3}],
+        [{"name": "Lunge"}],
+        ["Lunge"],
+        "Lunge",
+    ],
+)
+def test_update_rejects_invalid_exercises(app, client, auth_headers, exercises):
+    template_id = create_template(client, auth_headers)
+
+    response = client.put(
+        f"/api/templates/{template_id}",
+        headers=auth_headers,
+        json={"exercises": exercises},
+    )
+
+    assert response.status_code == 400
+    template = client.get(f"/api/templates/{template_id}", headers=auth_headers)
+    assert [e["name"] for e in template.get_json()["exercises"]] == ["Squat"]
+    with app.app_context():
+        assert Exercise.query.filter_by(key="").count() == 0
+
+
+def test_update_replaces_exercises(client, auth_headers):
+    template_id = create_template(client, auth_headers)
+
+    response = client.put(
+        f"/api/templates/{template_id}",
+        headers=auth_headers,
+        json={"exercises": [{"name": " front  squat ", "sets": 3}]},
+    )
+
+    assert response.status_code == 200
+    assert [e["name"] for e in response.get_json()["exercises"]] == ["front squat"]
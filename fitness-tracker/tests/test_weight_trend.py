@@ -0,0 +1,146 @@
+"""Weight trend, weekly rate and goal projections through GET /api/weight/trend"""
+
+import math
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytest
+from analytics import exponential_trend
+
+
+def log_daily_weights(client, headers, weights, end=None):
+    """Log one weight per day, the last on end (default today)"""
+    end = end or datetime.utcnow().date()
+    for n, weight in enumerate(weights):
+        day = end - timedelta(days=len(weights) - 1 - n)
+        response = client.post(
+            "/api/weight",
+            headers=headers,
+            json={"weight": weight, "date": f"{day.isoformat()}T07:00:00"},
+        )
+        assert response.status_code == 201
+
+
+def get_trend(client, headers, query=""):
+    response = client.get(f"/api/weight/trend?{query}", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def create_weight_goal(client, headers, target):
+    response = client.post(
+        "/api/goals",
+        headers=headers,
+        json={"goal_type": "weight", "target_value": target, "period": "year"},
+    )
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_steady_loss(client, auth_headers):
+    # 0.2 a day for 60 days
+    log_daily_weights(client, auth_headers, [200 - 0.2 * n for n in range(60)])
+
+    trend = get_trend(client, auth_headers, "days=30")
+
+    assert trend["half_life_days"] == 7
+    assert trend["current"]["date"] == datetime.utcnow().date().isoformat()
+    assert trend["current"]["weight"] == 188.2
+    # A daily EMA lags a steady slope by slope * (1 - a) / a
+    alpha = 1 - 0.5 ** (1 / 7)
+    lag = 0.2 * (1 - alpha) / alpha
+    assert trend["current"]["trend"] == pytest.approx(188.2 + lag, abs=0.1)
+    assert trend["weekly_rate"] == pytest.approx(-1.4, abs=0.05)
+    # Points are listed for the last 30 days only
+    assert len(trend["points"]["date"]) == 31
+    assert trend["points"]["date"][-1] == trend["current"]["date"]
+
+
+def test_logs_of_one_day_are_averaged(client, auth_headers):
+    log_daily_weights(client, auth_headers, [180.0, 181.0])
+    log_daily_weights(client, auth_headers, [182.0])
+
+    trend = get_trend(client, auth_headers)
+
+    assert trend["points"]["weight"] == [180.0, 181.5]
+    assert trend["current"]["weight"] == 181.5
+
+
+def test_goal_projection(client, auth_headers):
+    log_daily_weights(client, auth_headers, [200 - 0.2 * n for n in range(60)])
+    reachable = create_weight_goal(client, auth_headers, 180.0)
+    away = create_weight_goal(client, auth_headers, 210.0)
+
+    trend = get_trend(client, auth_headers)
+
+    projections = {p["goal_id"]: p for p in trend["projections"]}
+    ahead = projections[reachable]
+    current = trend["current"]["trend"]
+    assert ahead["remaining"] == pytest.approx(180.0 - current, abs=0.1)
+    days_to_goal = (180.0 - current) / (trend["weekly_rate"] / 7)
+    assert ahead["days_to_goal"] == pytest.approx(days_to_goal, abs=1)
+    projected = date.fromisoformat(trend["current"]["date"]) + timedelta(
+        days=ahead["days_to_goal"]
+    )
+    assert ahead["projected_date"] == projected.isoformat()
+    assert ahead["on_track"]
+
+    # Losing weight never reaches a higher target
+    assert projections[away]["projected_date"] is None
+    assert not projections[away]["on_track"]
+
+
+def test_constant_weight_is_flat():
+    days = np.arange(10).astype("datetime64[D]")
+    values = np.full(10, 180.0)
+
+    assert exponential_trend(days, values) == pytest.approx([180.0] * 10)
+
+
+def test_gap_of_one_half_life_moves_halfway():
+    days = np.array(["2024-01-01", "2024-01-08"], dtype="datetime64[D]")
+
+    trend = exponential_trend(days, np.array([100.0, 90.0]), half_life_days=7)
+
+    assert trend.tolist() == pytest.approx([100.0, 95.0])
+
+
+def test_long_irregular_history_matches_the_recursion():
+    rng = np.random.default_rng(1)
+    offsets = np.cumsum(rng.integers(1, 5, size=3000))
+    offsets[1500:] += 5000  # a gap far longer than any chunk
+    days = np.datetime64("2000-01-01") + offsets.astype("timedelta64[D]")
+    values = 180 + rng.normal(0, 2, size=3000)
+
+    trend = exponential_trend(days, values, half_life_days=1)
+
+    tau = 1 / math.log(2)
+    expected = [values[0]]
+    for gap, value in zip(np.diff(offsets), values[1:]):
+        alpha = 1 - math.exp(-gap / tau)
+        expected.append(expected[-1] + alpha * (value - expected[-1]))
+    assert np.all(np.isfinite(trend))
+    assert trend == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "query", ["days=0", "rate_days=1", "half_life=0", "half_life=366"]
+)
+def test_invalid_parameters(client, auth_headers, query):
+    log_daily_weights(client, auth_headers, [180.0])
+
+    response = client.get(f"/api/weight/trend?{query}", headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_trend_covers_only_the_callers_logs(client, auth_headers, other_auth_headers):
+    log_daily_weights(client, auth_headers, [200.0, 199.0])
+    create_weight_goal(client, auth_headers, 190.0)
+
+    response = client.get("/api/weight/trend", headers=other_auth_headers)
+    assert response.status_code == 404
+
+    log_daily_weights(client, other_auth_headers, [150.0])
+    trend = get_trend(client, other_auth_headers)
+    assert trend["points"]["weight"] == [150.0]
+    assert trend["projections"] == []
@@ -0,0 +1,61 @@
+"""Statement counts of the workout read endpoints"""
+
+
+def log_workouts(client, headers, count, exercises=3, sets=4):
+    for n in range(count):
+        response = client.post(
+            "/api/workouts",
+            headers=headers,
+            json={
+                "date": f"2024-01-{n + 1:02d}T10:00:00",
+                "exercises": [
+                    {
+                        "name": f"Exercise {e}",
+                        "sets": [
+                            {"set_number": s, "reps": 5, "weight": 100.0}
+                            for s in range(1, sets + 1)
+                        ],
+                    }
+                    for e in range(exercises)
+                ],
+            },
+        )
+        assert response.status_code == 201
+
+
+def count_get(client, headers, statements, url):
+    statements.reset()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return statements.count, response.get_json()
+
+
+def test_list_workouts_statement_count_is_constant(client, auth_headers, statements):
+    url = "/api/workouts?days=100000"
+
+    log_workouts(client, auth_headers, 1)
+    one, body = count_get(client, auth_headers, statements, url)
+    assert len(body) == 1
+
+    log_workouts(client, auth_headers, 9)
+    many, body = count_get(client, auth_headers, statements, url)
+    assert len(body) == 10
+    assert all(len(w["exercises"]) == 3 for w in body)
+
+    assert many == one
+
+
+def test_paginated_workouts_statement_count_is_constant(
+    client, auth_headers, statements
+):
+    url = "/api/workouts?days=100000&limit=20"
+
+    log_workouts(client, auth_headers, 1)
+    one, body = count_get(client, auth_headers, statements, url)
+    assert len(body["items"]) == 1
+
+    log_workouts(client, auth_headers, 9)
+    many, body = count_get(client, auth_headers, statements, url)
+    assert len(body["items"]) == 10
+
+    assert many == one
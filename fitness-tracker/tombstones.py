@@ -0,0 +1,38 @@
+"""
+Tombstones for deleted rows.
+
+Delete handlers call record_deletion() in the same transaction as the delete,
+so GET /api/sync can report ids removed since a client's token. Tombstones
+older than SYNC_TOMBSTONE_RETENTION_DAYS are pruned by prune_tombstones();
+tokens older than that are rejected and the client does a full sync.
+"""
+
+from datetime import datetime, timedelta
+from models import db, DeletedRecord
+
+
+def record_deletion(user_id, resource, record_id):
+    """Add a tombstone for a row deleted in the current transaction"""
+    db.session.add(
+        DeletedRecord(
+            user_id=user_id,
+            resource=resource,
+            record_id=record_id,
+            deleted_at=datetime.utcnow(),
+        )
+    )
+
+
+def prune_tombstones(retention_days):
+    """
+    Delete tombstones older than retention_days
+
+    Returns:
+        number of tombstones deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = DeletedRecord.query.filter(DeletedRecord.deleted_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return deleted